@@ -1,223 +1,116 @@
 import sys
-import heapq
-from PIL import Image, ImageDraw
+import time
 from enum import Enum
-
-class Node():
-    def __init__(self, state, parent, action, cost, heuristic):
-        self.state = state
-        self.parent = parent
-        self.action = action
-        self.cost = cost
-        self.heuristic = heuristic
-
-    def __lt__(self, other):
-        return (self.cost + self.heuristic) < (other.cost + other.heuristic)
-
-class PriorityQueue():
-    def __init__(self):
-        self.heap = []
-
-    def add(self, node, priority):
-        heapq.heappush(self.heap, (priority, node))
-
-    def contains_state(self, state):
-        return any(node.state == state for _, node in self.heap)
-
-    def empty(self):
-        return len(self.heap) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            _, node = heapq.heappop(self.heap)
-            return node
-
-class Maze():
+from anytime import INITIAL_WEIGHT, WEIGHT_STEP, AnytimeSearch, NoPathInTime
+from maze_grid import GridMaze
+from distance_transform import distance_transform
+from heuristics import make_heuristic
+from instrument import phase
+from movement import MOVEMENTS, theta_star
+from search_core import INF, NoSolution, grid_search
+
+class Maze(GridMaze):
     class CostLevel(Enum):
         HIGH_COST = 5
         MEDIUM_COST = 3
         LOW_COST = 1
 
-    def __init__(self, filename):
-        with open(filename) as f:
-            contents = f.read()
-
-        if contents.count("A") != 1 or contents.count("B") != 1:
-            raise Exception("maze must have exactly one start and one goal")
-
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
-
-        self.solution = None
-
-    def assign_costs(self):
-        self.costs = [[float('inf') for _ in range(self.width)] for _ in range(self.height)]
-        self.costs[self.start[0]][self.start[1]] = 0
-
-        start_node = Node(state=self.start, parent=None, action=None, cost=0, heuristic=self.heuristic(self.start))
-
-        frontier = PriorityQueue()
-        frontier.add(start_node, priority=start_node.cost + start_node.heuristic)
-
-        while not frontier.empty():
-            node = frontier.remove()
-
-            for action, state, cost in self.neighbors(node.state):
-                total_cost = node.cost + cost
-                if total_cost < self.costs[state[0]][state[1]]:
-                    self.costs[state[0]][state[1]] = total_cost
-                    child = Node(state=state, parent=node, action=action, cost=total_cost, heuristic=self.heuristic(state))
-                    frontier.add(child, priority=child.cost + child.heuristic)
-
-    def print_maze(self):
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("██", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
+    def assign_costs(self, method="auto", max_cost=INF):
+        """Fills self.costs with the cost to reach every cell from the start.
+
+        method is "bfs" (uniform terrain), "dijkstra" (weighted terrain) or
+        "auto".
+        Cells farther than max_cost, or unreachable, are left at infinity.
+        """
+        with phase(self.stats, "costs"):
+            grid = self.flat_grid()
+            distance, _ = distance_transform(grid, grid.index(self.start), method, max_cost, self.stats)
+            self.costs = grid.to_array(distance)
 
     def heuristic(self, state):
         return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
 
-    def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
-        ]
-
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c), 1))
-
-        return result
-
-    def solve(self):
-        self.num_explored = 0
-        start = Node(state=self.start, parent=None, action=None, cost=0, heuristic=self.heuristic(self.start))
-
-        frontier = PriorityQueue()
-        frontier.add(start, priority=0)
-        self.explored = set()
-
-        while True:
-            if frontier.empty():
-                raise Exception("no solution")
-
-            node = frontier.remove()
-            self.num_explored += 1
-
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                return
-
-            self.explored.add(node.state)
-
-            for action, state, cost in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action, cost=node.cost + cost, heuristic=self.heuristic(state))
-
-                    frontier.add(child, priority=child.cost)
-
-    def output_cost_image(self, filename):
-        cell_size = 50
-        cell_border = 2
-
-        img = Image.new(
-            "RGBA",
-            (len(self.costs[0]) * cell_size, len(self.costs) * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        for i, row in enumerate(self.costs):
-            for j, cost in enumerate(row):
-                fill = (255, 0, 0) if cost == self.CostLevel.HIGH_COST.value else (0, 255, 0)
-
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-    def output_image(self, filename, show_explored=True):
-        cell_size = 50
-        cell_border = 2
-
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    fill = (40, 40, 40)
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-                elif solution is not None and show_explored and (i, j) in solution:
-                    fill = (220, 235, 113)
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-                else:
-                    fill = (237, 240, 252)
-
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
+    def solve(self, heuristic="auto", weight=1.0, diagonal=None):
+        """Finds a path with A* ordered by g + weight * h.
+
+        Moves follow the maze's movement model (see set_movement);
+        diagonal=True or False overrides it with 8- or 4-connected moves.
+        heuristic is one of "manhattan", "octile" or "euclidean", "landmarks"
+        for ALT (4-connected moves only; see prepare_landmarks), "auto" for
+        the one matching the moves, or None for uniform-cost search. "auto"
+        picks "landmarks" on 4-connected moves once they are prepared. A weight
+        above 1 trades optimality for speed: the path found costs at most
+        weight times the optimum.
+
+        Any-angle movement runs Theta*, and the turning points of its path
+        are kept in self.waypoints.
+        """
+        movement = self.movement if diagonal is None else ("8" if diagonal else "4")
+        with phase(self.stats, "search"):
+            grid = self.flat_grid(movement != "4", self.corners)
+            start = grid.index(self.start)
+            goal = grid.index(self.goal)
+            heuristic = self.search_heuristic(grid, movement, heuristic, weight)
+
+            if movement == "any-angle":
+                result = theta_star(grid, start, goal, heuristic, self.stats)
+            else:
+                result = grid_search(grid, start, goal, heuristic, stats=self.stats)
+
+        self.store_result(result)
+        if movement == "any-angle":
+            self.waypoints = [self.start] + [grid.state(index) for index in result.waypoints()]
+
+    def search_heuristic(self, grid, movement, heuristic, weight=1.0):
+        """The index -> estimate function for a heuristic name toward the goal, as solve takes it, or None."""
+        goal = grid.index(self.goal)
+        if heuristic == "auto":
+            heuristic = "landmarks" if movement == "4" and self.landmarks is not None else MOVEMENTS[movement]
+        if heuristic == "landmarks":
+            if movement != "4":
+                raise ValueError("the landmark heuristic needs 4-connected movement")
+            table = self.landmarks if self.landmarks is not None else self.prepare_landmarks()
+            return table.heuristic(grid, goal, weight, grid.index(self.start))
+        if heuristic is not None:
+            return make_heuristic(heuristic, grid, goal, weight)
+        return None
+
+    def solve_anytime(self, budget, weight=INITIAL_WEIGHT, heuristic="auto", diagonal=None, step=WEIGHT_STEP,
+                      callback=None):
+        """Finds the best path it can within budget seconds with ARA*; see anytime.AnytimeSearch.
+
+        The first path comes from weighted A* with the given weight, and each
+        refinement lowers the weight by step toward an optimal path. callback
+        is called with every AnytimeResult as it is found. The last one is
+        stored like solve's, and its bound (its cost over the optimum at most)
+        is kept in self.suboptimality. Moves and heuristics are as in solve,
+        except that any-angle movement is not supported. Raises if there is
+        no path, or if none was found in time.
+        """
+        movement = self.movement if diagonal is None else ("8" if diagonal else "4")
+        if movement == "any-angle":
+            raise ValueError("anytime search needs 4- or 8-connected movement")
+        if heuristic is None:
+            raise ValueError("anytime search needs a heuristic")
+        deadline = time.perf_counter() + budget
+        self.suboptimality = None
+
+        with phase(self.stats, "search"):
+            grid = self.flat_grid(movement != "4", self.corners)
+            search = AnytimeSearch(grid, grid.index(self.start), grid.index(self.goal),
+                                   self.search_heuristic(grid, movement, heuristic), weight, step)
+            result = None
+            for result in search.results(deadline):
+                if callback is not None:
+                    callback(result)
+
+        if result is None:
+            self.num_explored = search.num_explored
+            if search.finished:
+                raise NoSolution()
+            raise NoPathInTime("no path found within %g s" % budget)
+        self.store_result(result)
+        self.suboptimality = result.bound
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -238,7 +131,7 @@ if __name__ == "__main__":
     maze.assign_costs()
 
     print("Cost Grid:")
-    for row in maze.costs:
+    for row in maze.costs.tolist():
         print(row)
 
     maze.output_image("astar_maze_solution.png", show_explored=True)
@@ -0,0 +1,236 @@
+import heapq
+import time
+
+from search_core import F_DIGITS, INF, SQRT2, NoSolution, SearchResult
+
+# Weighted A* factor of the first pass, lowered by WEIGHT_STEP for each refinement
+INITIAL_WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+
+# The search looks at the clock once every this many expansions
+CLOCK_INTERVAL = 256
+
+
+class NoPathInTime(NoSolution):
+    """Raised when the deadline passes before the first path is found."""
+
+
+class AnytimeResult(SearchResult):
+    """One path from an AnytimeSearch, kept apart from the search as it goes on refining.
+
+    weight is the factor the pass that found it ran with, bound a proven
+    limit on its cost over the optimum, and elapsed the seconds since the
+    search began. explored_mask shows every cell the search had expanded
+    by the time it is called.
+    """
+
+    def __init__(self, grid, start, goal, path, cost, weight, bound, done, num_explored, elapsed):
+        # path runs from start to goal, so each cell's parent is the one before it
+        SearchResult.__init__(self, grid, start, goal, {goal: cost}, dict(zip(path[1:], path)), done,
+                              num_explored)
+        self.weight = weight
+        self.bound = bound
+        self.elapsed = elapsed
+
+
+class AnytimeSearch():
+    """Anytime Repairing A* (ARA*) between two flat indices of a FlatGrid.
+
+    The first pass is weighted A* on f = g + weight * h, which finds a path
+    quickly. Each later pass lowers the weight by step, or straight to the
+    bound proven so far if that is lower, and carries on where the last one
+    stopped: cells whose cost improved after they were expanded are set
+    aside and put back on the frontier for the next pass, so no pass starts
+    over. heuristic is an unweighted, consistent
+    index -> estimate function. Moves and costs are those of grid_search.
+
+    results yields one AnytimeResult per pass until the deadline, and can
+    be called again with a later deadline to go on refining, say on the
+    next tick of a control loop. Once a pass runs with weight 1 (or the
+    bound reaches 1 sooner) the path is optimal and the search is done.
+    """
+
+    def __init__(self, grid, start, goal, heuristic, weight=INITIAL_WEIGHT, step=WEIGHT_STEP):
+        if weight < 1:
+            raise ValueError("heuristic weight must be at least 1")
+        if step <= 0:
+            raise ValueError("weight step must be positive")
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.heuristic = heuristic
+        self.weight = weight
+        self.step = step
+        self.began = time.perf_counter()
+
+        self.g = [INF] * grid.size
+        self.parent = [-1] * grid.size
+        self.h = {}
+        # closed holds the cells expanded in the current pass, expanded those of any pass
+        self.closed = bytearray(grid.blocked)
+        self.expanded = bytearray(grid.blocked)
+        self.open = set()
+        self.inconsistent = set()
+        self.frontier = []
+        self.num_explored = 0
+        self.bound = INF
+        self.passed = False
+        self.finished = False
+
+        self.g[start] = 0
+        self.insert(start)
+
+    def f(self, index):
+        f = self.g[index] + self.weight * self.h[index]
+        return round(f, F_DIGITS) if self.grid.diagonal_moves else f
+
+    def insert(self, index):
+        if index not in self.h:
+            self.h[index] = self.heuristic(index)
+        self.open.add(index)
+        heapq.heappush(self.frontier, (self.f(index), -self.g[index], index))
+
+    def improve(self, deadline=None):
+        """Runs the current pass; returns False if the deadline came first, leaving it to resume later.
+
+        The pass ends once no frontier cell's f is below the goal's cost, so
+        the path to the goal costs at most weight times the optimum.
+        """
+        grid = self.grid
+        blocked = grid.blocked
+        step_costs = grid.step_costs
+        moves = grid.moves
+        diagonal_moves = grid.diagonal_moves
+        goal = self.goal
+        weight = self.weight
+        heuristic = self.heuristic
+        g = self.g
+        h = self.h
+        parent = self.parent
+        closed = self.closed
+        expanded = self.expanded
+        open_cells = self.open
+        inconsistent = self.inconsistent
+        frontier = self.frontier
+        push = heapq.heappush
+        pop = heapq.heappop
+        num_explored = self.num_explored
+        goal_f = round(g[goal], F_DIGITS) if diagonal_moves else g[goal]
+
+        while frontier:
+            f, negative_g, index = frontier[0]
+            if index not in open_cells or -negative_g != g[index]:
+                # Left behind by a cheaper push or by the cell's expansion
+                pop(frontier)
+                continue
+            if goal_f <= f:
+                break
+            # Checked before the pop, so a pass cut short resumes with nothing lost
+            if deadline is not None and num_explored % CLOCK_INTERVAL == 0 and time.perf_counter() > deadline:
+                self.num_explored = num_explored
+                return False
+            pop(frontier)
+            open_cells.discard(index)
+            closed[index] = 1
+            expanded[index] = 1
+            num_explored += 1
+
+            base = g[index]
+            for move in moves:
+                neighbor = index + move
+                cost = base + step_costs[neighbor]
+                if blocked[neighbor] or cost >= g[neighbor]:
+                    continue
+                g[neighbor] = cost
+                parent[neighbor] = index
+                if closed[neighbor]:
+                    # Expanded this pass already; the next pass takes it up again
+                    inconsistent.add(neighbor)
+                    continue
+                if neighbor not in h:
+                    h[neighbor] = heuristic(neighbor)
+                open_cells.add(neighbor)
+                if diagonal_moves:
+                    push(frontier, (round(cost + weight * h[neighbor], F_DIGITS), -cost, neighbor))
+                else:
+                    push(frontier, (cost + weight * h[neighbor], -cost, neighbor))
+
+            for move, corner in diagonal_moves:
+                neighbor = index + move
+                cost = base + SQRT2 * step_costs[neighbor]
+                if blocked[neighbor] or corner[index] or cost >= g[neighbor]:
+                    continue
+                g[neighbor] = cost
+                parent[neighbor] = index
+                if closed[neighbor]:
+                    inconsistent.add(neighbor)
+                    continue
+                if neighbor not in h:
+                    h[neighbor] = heuristic(neighbor)
+                open_cells.add(neighbor)
+                push(frontier, (round(cost + weight * h[neighbor], F_DIGITS), -cost, neighbor))
+            goal_f = round(g[goal], F_DIGITS) if diagonal_moves else g[goal]
+
+        self.num_explored = num_explored
+        return True
+
+    def next_pass(self):
+        """Lowers the weight and puts the set-aside cells back on a frontier ordered by the new f."""
+        # A pass with a weight above the proven bound would stop straight away
+        self.weight = max(1.0, min(self.weight - self.step, self.bound))
+        self.open |= self.inconsistent
+        self.inconsistent = set()
+        self.closed = bytearray(self.grid.blocked)
+        self.frontier = [(self.f(index), -self.g[index], index) for index in self.open]
+        heapq.heapify(self.frontier)
+
+    def suboptimality(self, cost):
+        """Bound on cost over the optimum, for a path no dearer than the goal's g.
+
+        That is the weight, or less if the open cells prove it: every
+        cheaper path runs through a frontier or set-aside cell, so the
+        optimum is at least their least g + h.
+        """
+        lowest = min((self.g[index] + self.h[index] for index in self.open | self.inconsistent), default=INF)
+        if cost == 0 or lowest >= cost:
+            return 1.0
+        return min(self.weight, cost / lowest)
+
+    def path(self):
+        """(indices from start to goal, cost) along the parent pointers.
+
+        Cells set aside since the goal was reached may have found cheaper
+        parents, so the path can cost less than the goal's g.
+        """
+        grid = self.grid
+        indices = [self.goal]
+        while indices[-1] != self.start:
+            indices.append(self.parent[indices[-1]])
+        indices.reverse()
+
+        # Summed from the start, in the order the search adds costs up
+        cost = 0
+        for previous, index in zip(indices, indices[1:]):
+            straight = abs(index - previous) in (1, grid.stride)
+            cost += grid.step_costs[index] if straight else SQRT2 * grid.step_costs[index]
+        return indices, cost
+
+    def results(self, deadline=None):
+        """Yields an AnytimeResult for each pass that ends before deadline, a time.perf_counter() value."""
+        while not self.finished:
+            if self.passed:
+                self.next_pass()
+                self.passed = False
+            if not self.improve(deadline):
+                return
+            self.passed = True
+            if self.g[self.goal] == INF:
+                # The frontier ran dry without reaching the goal
+                self.finished = True
+                return
+
+            path, cost = self.path()
+            self.bound = self.suboptimality(cost)
+            self.finished = self.weight == 1 or self.bound == 1
+            yield AnytimeResult(self.grid, self.start, self.goal, path, cost, self.weight, self.bound,
+                                self.expanded, self.num_explored, time.perf_counter() - self.began)
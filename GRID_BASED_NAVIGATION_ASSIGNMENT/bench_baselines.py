@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import os
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from map_format import TERRAIN_TABLE
+
+# Map writers for the benchmark cases
+
+
+def write_maze_file(directory, size, density=0.2, seed=0, start=None, goal=None, terrain=0.0):
+    """Writes a size x size random-obstacle maze, by default with A and B in opposite corners.
+
+    terrain is the fraction of open cells given medium ("~") or high ("^") cost.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        row = []
+        for j in range(size):
+            if rng.random() < density:
+                row.append("#")
+            elif rng.random() < terrain:
+                row.append(rng.choice("~^"))
+            else:
+                row.append(" ")
+        rows.append(row)
+
+    # Keep the corners and a border corridor open so a path always exists
+    for j in range(size):
+        rows[0][j] = " "
+    for i in range(size):
+        rows[i][size - 1] = " "
+    for i in range(size):
+        rows[i][0] = " "
+    start = start or (size - 1, 0)
+    goal = goal or (0, size - 1)
+    rows[start[0]][start[1]] = "A"
+    rows[goal[0]][goal[1]] = "B"
+
+    filename = os.path.join(directory, "maze_%d_%d.txt" % (size, seed))
+    with open(filename, "w") as f:
+        f.write("\n".join("".join(row) for row in rows))
+    return filename
+
+
+def write_corridor_file(directory, size):
+    """Writes a serpentine single-corridor maze with A and B at its two ends."""
+    rows = [[" "] * size for _ in range(size)]
+    for i in range(1, size - 1, 2):
+        gap = size - 1 if (i // 2) % 2 == 0 else 0
+        for j in range(size):
+            if j != gap:
+                rows[i][j] = "#"
+    rows[0][0] = "A"
+    rows[size - 1 if (size - 1) % 2 == 0 else size - 2][0] = "B"
+
+    filename = os.path.join(directory, "corridor_%d.txt" % size)
+    with open(filename, "w") as f:
+        f.write("\n".join("".join(row) for row in rows))
+    return filename
+
+
+def tile_maze_file(directory, source, repeat):
+    """Tiles a maze.txt-style file repeat x repeat times, with A and B in far corners."""
+    with open(source) as f:
+        pattern = [line.replace("A", " ").replace("B", " ") for line in f.read().splitlines()]
+    width = max(len(line) for line in pattern)
+    pattern = [line.ljust(width) for line in pattern]
+
+    rows = [list(line * repeat) for _ in range(repeat) for line in pattern]
+    open_cells = [(i, j) for i in (0, len(rows) - 1) for j in range(len(rows[0])) if rows[i][j] == " "]
+    start, goal = open_cells[0], open_cells[-1]
+    rows[start[0]][start[1]] = "A"
+    rows[goal[0]][goal[1]] = "B"
+
+    filename = os.path.join(directory, "tiled_%d.txt" % repeat)
+    with open(filename, "w") as f:
+        f.write("\n".join("".join(row) for row in rows))
+    return filename
+
+
+def write_noise_file(directory, size, density=0.2, seed=0):
+    """Writes a size x size random-obstacle maze band by band with NumPy, for maps too big for write_maze_file."""
+    rng = np.random.default_rng(seed)
+    filename = os.path.join(directory, "noise_%d_%d.txt" % (size, seed))
+    band = max(1, 2 ** 24 // size)
+    with open(filename, "wb") as f:
+        for top in range(0, size, band):
+            rows = min(band, size - top)
+            chars = np.full((rows, size + 1), ord(" "), dtype=np.uint8)
+            chars[:, :size][rng.random((rows, size)) < density] = ord("#")
+            chars[:, size] = ord("\n")
+            if top == 0:
+                chars[0, 0] = ord("A")
+            if top + rows == size:
+                chars[-1, size - 1] = ord("B")
+            f.write(chars.tobytes())
+    return filename
+
+
+def random_queries(maze, count, seed=0):
+    """count (start, goal) pairs of open cells, drawn at random."""
+    rng = np.random.default_rng(seed)
+    cells = np.argwhere(~maze.walls)
+    picks = cells[rng.integers(len(cells), size=(count, 2))]
+    return [(tuple(int(v) for v in start), tuple(int(v) for v in goal)) for start, goal in picks]
+
+
+# The code as it was before each change, which the cases measure against
+
+
+class LegacyNode():
+    def __init__(self, state, parent, action, cost):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+    def __lt__(self, other):
+        return self.cost < other.cost
+
+
+class LegacyPriorityQueue():
+    """The original frontier whose contains_state scans the whole heap."""
+
+    def __init__(self):
+        self.heap = []
+
+    def add(self, node, priority):
+        heapq.heappush(self.heap, (priority, node))
+
+    def contains_state(self, state):
+        return any(node.state == state for _, node in self.heap)
+
+    def empty(self):
+        return len(self.heap) == 0
+
+    def remove(self):
+        _, node = heapq.heappop(self.heap)
+        return node
+
+
+class IndexedPriorityQueue():
+    """Legacy comparison only: the Node frontier with a state index, as it was before the flat-index engine.
+
+    contains_state is a dict lookup instead of LegacyPriorityQueue's heap
+    scan. legacy_solve never adds a state twice, so there is no decrease-key;
+    the engine's own frontier is the lazy-deletion heap in grid_search.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def add(self, node, priority):
+        self.entries[node.state] = node
+        heapq.heappush(self.heap, (priority, next(self.counter), node))
+
+    def contains_state(self, state):
+        return state in self.entries
+
+    def empty(self):
+        return len(self.entries) == 0
+
+    def remove(self):
+        _, _, node = heapq.heappop(self.heap)
+        del self.entries[node.state]
+        return node
+
+
+def legacy_solve(maze, frontier_class, step_cost):
+    """The Node-based solve loop, kept as the benchmark baseline."""
+    maze.num_explored = 0
+    frontier = frontier_class()
+    frontier.add(LegacyNode(maze.start, None, None, 0), priority=0)
+    explored = set()
+
+    while True:
+        if frontier.empty():
+            raise Exception("no solution")
+
+        node = frontier.remove()
+        maze.num_explored += 1
+
+        if node.state == maze.goal:
+            return
+
+        explored.add(node.state)
+
+        for action, state, cost in maze.neighbors(node.state):
+            if not frontier.contains_state(state) and state not in explored:
+                child = LegacyNode(state, node, action, node.cost + step_cost(maze, state))
+                frontier.add(child, priority=child.cost)
+
+
+def astar_step(maze, state):
+    return 1
+
+
+def dijkstra_step(maze, state):
+    return int(maze.costs[state])
+
+
+def legacy_flood(maze):
+    """The label-correcting assign_costs flood, kept as the benchmark baseline."""
+    costs = [[float("inf")] * maze.width for _ in range(maze.height)]
+    costs[maze.start[0]][maze.start[1]] = 0
+    frontier = [(maze.heuristic(maze.start), 0, maze.start)]
+    while frontier:
+        _, cost, state = heapq.heappop(frontier)
+        for action, neighbor, step in maze.neighbors(state):
+            total_cost = cost + step
+            if total_cost < costs[neighbor[0]][neighbor[1]]:
+                costs[neighbor[0]][neighbor[1]] = total_cost
+                heapq.heappush(frontier, (total_cost + maze.heuristic(neighbor), total_cost, neighbor))
+    return costs
+
+
+def legacy_load(filename):
+    """The pre-NumPy list-of-lists parser, kept as the benchmark baseline."""
+    with open(filename) as f:
+        contents = f.read().splitlines()
+    width = max(len(line) for line in contents)
+    walls = []
+    for line in contents:
+        row = []
+        for j in range(width):
+            try:
+                row.append(line[j] not in " AB")
+            except IndexError:
+                row.append(False)
+        walls.append(row)
+    return walls
+
+
+def splitlines_load(filename):
+    """The read-and-splitlines NumPy parser, kept as the benchmark baseline."""
+    with open(filename, "rb") as f:
+        contents = f.read()
+    lines = contents.splitlines()
+    width = max(len(line) for line in lines)
+    chars = np.array([line.ljust(width) for line in lines], dtype="S%d" % width)
+    chars = chars.view(np.uint8).reshape(len(lines), width)
+    return TERRAIN_TABLE[chars] == 0
+
+
+def legacy_render(maze, filename):
+    """The per-cell rectangle renderer at a fixed 50px, kept as the benchmark baseline."""
+    cell_size = 50
+    cell_border = 2
+    img = Image.new("RGBA", (maze.width * cell_size, maze.height * cell_size), "black")
+    draw = ImageDraw.Draw(img)
+    solution = maze.solution[1]
+    explored = maze.explored.tolist()
+    for i, row in enumerate(maze.walls.tolist()):
+        for j, col in enumerate(row):
+            if col:
+                fill = (40, 40, 40)
+            elif (i, j) == maze.start:
+                fill = (255, 0, 0)
+            elif (i, j) == maze.goal:
+                fill = (0, 171, 28)
+            elif (i, j) in solution:
+                fill = (220, 235, 113)
+            elif explored[i][j]:
+                fill = (212, 97, 85)
+            else:
+                fill = (237, 240, 252)
+            draw.rectangle(
+                ([(j * cell_size + cell_border, i * cell_size + cell_border),
+                  ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
+                fill=fill
+            )
+    img.save(filename)
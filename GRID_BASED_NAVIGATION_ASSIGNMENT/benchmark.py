@@ -0,0 +1,851 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import A_star_algo
+import dijkstra_algo
+import dijkstra_maze
+import maze_generator
+import parallel
+import planner
+from anytime import INITIAL_WEIGHT
+from bench_baselines import (
+    IndexedPriorityQueue, LegacyPriorityQueue, astar_step, dijkstra_step, legacy_flood, legacy_load, legacy_render,
+    legacy_solve, random_queries, splitlines_load, tile_maze_file, write_corridor_file, write_maze_file,
+    write_noise_file)
+from hierarchical import DEFAULT_CLUSTER_SIZE, ClusterAbstraction
+from flow_field import FlowField
+from incremental import IncrementalPlanner
+from landmarks import LandmarkTable
+from multi_agent import first_conflict
+from map_format import load_binary, load_text, save_binary
+from render import auto_cell_size
+from search_core import FlatGrid, grid_search
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def measure(function, *args):
+    """Returns (seconds, peak traced bytes) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def suite_in_child(filename, solver):
+    """Loads and solves one map with one solver; returns a result row for the suite.
+
+    Peak memory is this process's peak RSS, and solve_mib how far the solve
+    raised it above the peak reached while loading.
+    """
+    began = time.perf_counter()
+    maze = planner.load_maze(filename, solver)
+    load = time.perf_counter() - began
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    _, solve = planner.SOLVERS[solver]
+    # The anytime solver runs without a deadline, so it ends on an optimal path
+    options = argparse.Namespace(heuristic="auto", weight=1.0, diagonal=False, movement="4",
+                                 corners="never", cluster_size=DEFAULT_CLUSTER_SIZE, abstraction=None,
+                                 initial_weight=INITIAL_WEIGHT, deadline=math.inf)
+    seconds = time_call(solve, maze, options)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    explored = maze.num_explored
+    cost = maze.solution_cost
+
+    return {
+        "solver": solver,
+        "load_seconds": load,
+        "seconds": seconds,
+        "explored": explored,
+        "expansions_per_second": explored / seconds if seconds else None,
+        "cost": cost,
+        "peak_mib": peak,
+        "solve_mib": peak - before,
+    }
+
+
+def bench_solvers(args):
+    """Every solver on seeded generated maps: speed, expansions/s, peak memory, cost agreement.
+
+    Dijkstra's cost is the reference; the exact solvers must match it, and
+    HPA*'s near-optimal cost is reported as a ratio. HPA* times include
+    building its abstraction. The unit-step bfs solver, like jps, only runs
+    on maps without terrain.
+    """
+    mismatched = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in args.maps:
+            for size in args.sizes:
+                walls, start, goal, terrain = maze_generator.generate(kind, size, args.seed)
+                filename = os.path.join(directory, "%s_%d.map" % (kind, size))
+                maze_generator.write_map(filename, walls, start, goal, terrain)
+                uniform = bool((terrain == terrain.flat[0]).all())
+                del walls, terrain
+
+                reference = None
+                for solver in args.solvers:
+                    if solver in ("jps", "bfs") and not uniform:
+                        continue
+                    if solver == "hpa" and size > args.hpa_limit:
+                        continue
+                    # A fresh process per run, so its peak RSS belongs to that run alone
+                    with context.Pool(1) as pool:
+                        row = {"map": kind, "size": size}
+                        row.update(pool.apply(suite_in_child, (filename, solver)))
+
+                    if solver == "dijkstra":
+                        reference = row["cost"]
+                    if reference is None or row["cost"] is None:
+                        row["cost_ratio"] = None
+                    else:
+                        row["cost_ratio"] = row["cost"] / reference if reference else 1.0
+                    row["agrees"] = row["cost_ratio"] is not None and abs(row["cost_ratio"] - 1.0) < 1e-9
+                    if solver != "hpa" and row["cost_ratio"] is not None and not row["agrees"]:
+                        mismatched.append("%s/%d/%s" % (kind, size, solver))
+                    yield row
+
+    if mismatched:
+        raise Exception("path costs disagree with Dijkstra: %s" % ", ".join(mismatched))
+
+
+def bench_frontier(args):
+    """Solve time against grid size, before and after the indexed frontier."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_maze_file(directory, size, seed=args.seed)
+            for name, module, step in (("astar", A_star_algo, astar_step), ("dijkstra", dijkstra_maze, dijkstra_step)):
+                maze = module.Maze(filename)
+                if module is dijkstra_maze:
+                    maze.assign_costs()
+
+                before = None
+                if size <= args.legacy_limit:
+                    before = time_call(legacy_solve, maze, LegacyPriorityQueue, step)
+                seconds = time_call(maze.solve)
+                yield {"solver": name, "size": size, "before_seconds": before, "seconds": seconds,
+                       "explored": maze.num_explored}
+
+
+def bench_throughput(args):
+    """Expansions per second, Node objects against the flat-index engine."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_maze_file(directory, size, seed=args.seed)
+            for name, module, step in (("astar", A_star_algo, astar_step), ("dijkstra", dijkstra_maze, dijkstra_step)):
+                maze = module.Maze(filename)
+                if module is dijkstra_maze:
+                    maze.assign_costs()
+
+                seconds = time_call(legacy_solve, maze, IndexedPriorityQueue, step)
+                before = maze.num_explored / seconds
+                # The legacy loop is uniform-cost search, so A* runs without its heuristic here too
+                seconds = time_call(maze.solve, None) if module is A_star_algo else time_call(maze.solve)
+                after = maze.num_explored / seconds
+                yield {"solver": name, "size": size, "nodes_per_second": before, "flat_per_second": after,
+                       "speedup": after / before}
+
+
+def bench_heuristics(args):
+    """num_explored, path cost and time for each A* mode."""
+    modes = [("uniform-cost", None, 1.0)]
+    modes += [(name, name, 1.0) for name in ("manhattan", "octile", "euclidean")]
+    modes += [("manhattan e=%g" % weight, "manhattan", weight) for weight in args.weights]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_maze_file(directory, size, density=args.density, seed=args.seed)
+            maze = A_star_algo.Maze(filename)
+            for label, heuristic, weight in modes:
+                seconds = time_call(maze.solve, heuristic, weight)
+                yield {"size": size, "mode": label, "explored": maze.num_explored, "cost": len(maze.solution[0]),
+                       "seconds": seconds}
+
+
+def bench_jump_points(args):
+    """A* against Jump Point Search on tiled maze.txt maps and open floor."""
+    with tempfile.TemporaryDirectory() as directory:
+        for repeat in args.tiles:
+            maps = [("tiled " + os.path.basename(args.source), tile_maze_file(directory, args.source, repeat))]
+            tiled = A_star_algo.Maze(maps[0][1])
+            maps.append(("open", write_maze_file(directory, max(tiled.height, tiled.width), density=0.0)))
+
+            for label, filename in maps:
+                maze = A_star_algo.Maze(filename)
+                for diagonal in (False, True):
+                    astar_time = time_call(maze.solve, "auto", 1.0, diagonal)
+                    astar_explored = maze.num_explored
+                    astar_cost = maze.solution_cost
+                    seconds = time_call(maze.solve_jump_points, diagonal)
+                    if not math.isclose(maze.solution_cost, astar_cost):
+                        raise Exception("jump point path cost differs from A*")
+                    yield {"map": label, "size": maze.height, "moves": "8" if diagonal else "4",
+                           "astar_explored": astar_explored, "explored": maze.num_explored,
+                           "astar_seconds": astar_time, "seconds": seconds, "cost": astar_cost}
+
+
+def bench_bidirectional(args):
+    """One-directional against bidirectional Dijkstra and A* on the same mazes."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            # Start and goal sit inside the map so each search can grow in every direction
+            start = (size // 2, size // 4)
+            goal = (size // 2, size - 1 - size // 4)
+            maps = [
+                ("random", write_maze_file(directory, size, args.density, args.seed, start, goal)),
+                ("open", write_maze_file(directory, size, 0.0, args.seed + 1, start, goal)),
+                ("corridor", write_corridor_file(directory, size)),
+                ("tiled maze.txt", tile_maze_file(directory, "maze.txt", max(1, size // 9))),
+            ]
+            for label, filename in maps:
+                maze = dijkstra_maze.Maze(filename)
+                maze.assign_costs()
+                costs = []
+                for name, bidirectional, heuristic in (
+                        ("dijkstra", False, None),
+                        ("bidirectional dijkstra", True, None),
+                        ("astar", False, "manhattan"),
+                        ("bidirectional astar", True, "manhattan")):
+                    seconds = time_call(maze.solve, bidirectional, heuristic)
+                    costs.append(maze.solution_cost)
+                    yield {"map": label, "size": maze.height, "solver": name, "explored": maze.num_explored,
+                           "seconds": seconds, "cost": maze.solution_cost}
+                if len(set(costs)) != 1:
+                    raise Exception("solvers disagree on path cost: %s" % costs)
+
+                grid = maze.walls.astype(int).tolist()
+                for name, bidirectional in (("dijkstra_algo", False), ("bidirectional dijkstra_algo", True)):
+                    seconds = time_call(dijkstra_algo.dijkstra, grid, maze.start, maze.goal, bidirectional)
+                    yield {"map": label, "size": maze.height, "solver": name, "explored": None,
+                           "seconds": seconds, "cost": None}
+
+
+def bench_replan(args):
+    """D* Lite repair latency after small edits against a full A* re-solve."""
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            start = (size // 2, size // 4)
+            goal = (size // 2, size - 1 - size // 4)
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed, start, goal))
+            replanner = IncrementalPlanner(maze)
+            replanner.plan()
+
+            replan_time = resolve_time = repaired = explored = 0
+            for _ in range(args.trials):
+                # Toggle cells on and around the current path, never the endpoints
+                path = maze.solution[1]
+                edits = {}
+                for _ in range(args.edits):
+                    row, col = path[rng.randrange(len(path))]
+                    row = min(max(row + rng.randint(-2, 2), 0), size - 1)
+                    col = min(max(col + rng.randint(-2, 2), 0), size - 1)
+                    if (row, col) not in (maze.start, maze.goal):
+                        edits[(row, col)] = not maze.walls[row, col]
+
+                replan_time += time_call(replanner.update_cells, edits)
+                try:
+                    replan_time += time_call(replanner.plan)
+                except Exception:
+                    # Edits cut the goal off; undo them and carry on
+                    replanner.update_cells({cell: not wall for cell, wall in edits.items()})
+                    replanner.plan()
+                    continue
+                repaired += maze.num_explored
+                cost = maze.solution_cost
+
+                resolve_time += time_call(maze.solve)
+                explored += maze.num_explored
+                if maze.solution_cost != cost:
+                    raise Exception("replanned cost %s differs from re-solve %s" % (cost, maze.solution_cost))
+                replanner.plan()
+
+            yield {"size": size, "edits": args.edits, "replan_ms": 1000 * replan_time / args.trials,
+                   "resolve_ms": 1000 * resolve_time / args.trials, "repaired": repaired / args.trials,
+                   "explored": explored / args.trials}
+
+
+def bench_flow(args):
+    """Many agents to one goal: one A* per agent against one flow field, and field repair against a rebuild."""
+    rng = random.Random(args.seed)
+    for kind in args.maps:
+        for size in args.sizes:
+            for count in args.agents:
+                # A fresh maze for each count, since the repair trials edit its walls
+                maze = A_star_algo.Maze.from_walls(*maze_generator.generate(kind, size, args.seed))
+                goal = maze.goal
+                agents = [start for start, _ in random_queries(maze, count, args.seed)]
+
+                costs = []
+                began = time.perf_counter()
+                for maze.start in agents:
+                    try:
+                        maze.solve()
+                        costs.append(maze.solution_cost)
+                    except Exception:
+                        # Random starts can be walled in
+                        costs.append(math.inf)
+                searches = time.perf_counter() - began
+                reached = [(start, cost) for start, cost in zip(agents, costs) if cost < math.inf]
+
+                began = time.perf_counter()
+                field = maze.flow_field()
+                build = time.perf_counter() - began
+                routes = time_call(lambda: [field.route(start) for start, _ in reached])
+                for start, cost in reached:
+                    if field.cost(start) != cost:
+                        raise Exception("flow field cost %s differs from A* %s" % (field.cost(start), cost))
+
+                # Toggle a few cells at random, never the goal, and compare repairing with rebuilding
+                repair = rebuild = repaired = 0
+                for _ in range(args.trials):
+                    edits = {}
+                    for _ in range(args.edits):
+                        cell = (rng.randrange(size), rng.randrange(size))
+                        if cell != goal:
+                            edits[cell] = not maze.walls[cell]
+                    repair += time_call(field.update_cells, edits)
+                    repaired += field.num_expanded
+                    rebuild += time_call(FlowField, maze)
+                yield {"map": kind, "size": size, "agents": len(reached), "astar_seconds": searches,
+                       "field_seconds": build, "route_seconds": routes, "speedup": searches / (build + routes),
+                       "repair_ms": 1000 * repair / args.trials, "rebuild_ms": 1000 * rebuild / args.trials,
+                       "repaired": repaired / args.trials}
+
+
+def bench_agents(args):
+    """Prioritized multi-agent planning as the number of agents grows, and conflict-based search on small groups."""
+    for kind in args.maps:
+        for size in args.sizes:
+            maze = A_star_algo.Maze.from_walls(*maze_generator.generate(kind, size, args.seed))
+            grid = FlatGrid(maze.walls, maze.terrain)
+            cells = np.argwhere(~maze.walls)
+            runs = [("prioritized", count, args.budget) for count in args.agents]
+            runs += [(mode, count, args.cbs_budget) for count in args.cbs_agents for mode in ("prioritized", "cbs")]
+            for mode, count, budget in runs:
+                # Distinct cells, so no two agents share a start or a goal
+                picks = cells[np.random.default_rng(args.seed).permutation(len(cells))[:2 * count]]
+                picks = [tuple(int(v) for v in cell) for cell in picks]
+                began = time.perf_counter()
+                result = maze.plan_agents(picks[:count], picks[count:], mode, budget)
+                seconds = time.perf_counter() - began
+                if first_conflict([[grid.index(cell) for cell in path] for path in result.paths]) is not None:
+                    raise Exception("%s plan for %d agents has a collision" % (mode, count))
+                yield {"map": kind, "size": size, "mode": mode, "agents": count, "optimal": result.optimal,
+                       "seconds": seconds, "planned": count - len(result.failed) - len(result.deferred),
+                       "failed": len(result.failed), "deferred": len(result.deferred),
+                       "sum_of_costs": result.sum_of_costs, "makespan": result.makespan,
+                       "explored": result.num_explored}
+
+
+def bench_anytime(args):
+    """ARA* refinements against time, next to plain A* and to weighted A* restarted for each weight."""
+    for kind in args.maps:
+        for size in args.sizes:
+            maze = A_star_algo.Maze.from_walls(*maze_generator.generate(kind, size, args.seed))
+            seconds = time_call(maze.solve)
+            optimum = maze.solution_cost
+            yield {"map": kind, "size": size, "search": "A*", "weight": 1.0, "ms": 1000 * seconds, "cost": optimum,
+                   "cost_ratio": 1.0, "bound": None, "explored": maze.num_explored, "restart_ms": None}
+
+            results = []
+            maze.solve_anytime(math.inf, args.weight, step=args.step, callback=results.append)
+            restart = 0
+            for result in results:
+                # What the same weights cost searched from scratch each time
+                restart += time_call(maze.solve, "auto", result.weight)
+                yield {"map": kind, "size": size, "search": "ARA*", "weight": result.weight,
+                       "ms": 1000 * result.elapsed, "cost": result.cost, "cost_ratio": result.cost / optimum,
+                       "bound": result.bound, "explored": result.num_explored, "restart_ms": 1000 * restart}
+
+
+def bench_terrain(args):
+    """Unit-cost against weighted-terrain Dijkstra, on the bucket queue and on a heap."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            start = (size // 2, size // 4)
+            goal = (size // 2, size - 1 - size // 4)
+            unit = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed, start, goal))
+            weighted = A_star_algo.Maze(write_maze_file(
+                directory, size, args.density, args.seed + 1, start, goal, terrain=args.terrain))
+
+            for label, maze, heap in (
+                    ("unit, buckets", unit, False),
+                    ("weighted, buckets", weighted, False),
+                    ("weighted, heap", weighted, True)):
+                grid = FlatGrid(maze.walls, maze.terrain)
+                # A zero heuristic keeps grid_search on its heap
+                heuristic = (lambda index: 0) if heap else None
+                seconds = time_call(grid_search, grid, grid.index(start), grid.index(goal), heuristic)
+                result = grid_search(grid, grid.index(start), grid.index(goal), heuristic)
+                yield {"size": size, "search": label, "explored": result.num_explored, "seconds": seconds,
+                       "cost": result.cost}
+
+
+def bench_assign_costs(args):
+    """A* assign_costs: old flood against BFS, Dijkstra and bounded transforms."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            start = (size // 2, size // 2)
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed, start))
+            runs = [("bfs", "bfs", math.inf), ("dijkstra", "dijkstra", math.inf)]
+            runs += [("bfs radius %d" % radius, "bfs", radius) for radius in args.radii]
+            if size <= args.legacy_limit:
+                yield {"size": size, "method": "old flood", "seconds": time_call(legacy_flood, maze), "reached": None}
+            reference = None
+            for label, method, max_cost in runs:
+                seconds = time_call(maze.assign_costs, method, max_cost)
+                if max_cost == math.inf:
+                    if reference is not None and not (reference == maze.costs).all():
+                        raise Exception("distance transforms disagree")
+                    reference = maze.costs
+                yield {"size": size, "method": label, "seconds": seconds, "reached": int((maze.costs < math.inf).sum())}
+
+
+def bench_load(args):
+    """Maze load time and peak traced memory: old parsers, mmap text and the binary format."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_noise_file(directory, size, seed=args.seed)
+            binary = filename + ".map"
+            walls, starts, goals, terrain = load_text(filename)
+            save_binary(binary, walls, starts, goals, terrain)
+            del walls, terrain
+
+            runs = []
+            if size <= args.legacy_limit:
+                runs.append(("lists", filename, legacy_load))
+            if size <= args.splitlines_limit:
+                runs.append(("splitlines", filename, splitlines_load))
+            runs.append(("mmap text", filename, load_text))
+            runs.append(("binary", binary, load_binary))
+            for label, path, loader in runs:
+                seconds, peak = measure(loader, path)
+                yield {"size": size, "file_mib": os.path.getsize(path) / 2 ** 20, "loader": label,
+                       "seconds": seconds, "peak_mib": peak / 2 ** 20}
+
+
+def render_heatmap(maze, filename):
+    maze.assign_costs()
+    maze.output_cost_image(filename, heatmap=True)
+
+
+def bench_render(args):
+    """output_image: per-cell rectangles against the vectorized renderer."""
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "maze.png")
+        for size in args.sizes:
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed))
+            maze.solve()
+            auto = auto_cell_size(size, size)
+            runs = []
+            if size <= args.legacy_limit:
+                runs.append(("old, 50px", 50, legacy_render, (maze, filename)))
+                runs.append(("new, 50px", 50, maze.output_image, (filename, True, 50)))
+            runs.append(("new, auto", auto, maze.output_image, (filename,)))
+            runs.append(("new, heatmap", auto, render_heatmap, (maze, filename)))
+            for label, cell_size, function, call_args in runs:
+                seconds = time_call(function, *call_args)
+                yield {"size": size, "renderer": label, "seconds": seconds,
+                       "image": "%dx%d" % (size * cell_size, size * cell_size)}
+
+
+def export_in_child(filename, mode, target, cell_size):
+    """Loads, solves and exports one maze; returns (seconds, peak RSS in MiB) of this process."""
+    maze = A_star_algo.Maze(filename)
+    maze.solve()
+    start = time.perf_counter()
+    if mode == "single image":
+        maze.output_image(target, True, cell_size)
+    elif mode == "strips":
+        maze.output_strip_image(target, True, cell_size)
+    else:
+        maze.output_tiles(target, True, cell_size)
+    seconds = time.perf_counter() - start
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_export(args):
+    """Export time and peak process memory: one canvas against strips and tiles."""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_maze_file(directory, size, args.density, args.seed)
+            modes = ["strips", "tiles"]
+            if size <= args.single_limit:
+                modes.insert(0, "single image")
+            for mode in modes:
+                target = os.path.join(directory, "tiles" if mode == "tiles" else "maze.png")
+                # A fresh process per export, so its peak RSS belongs to that export alone
+                with context.Pool(1) as pool:
+                    seconds, peak = pool.apply(export_in_child, (filename, mode, target, args.cell_size))
+                yield {"size": size, "export": mode, "image": "%dx%d" % (size * args.cell_size, size * args.cell_size),
+                       "seconds": seconds, "peak_mib": peak}
+
+
+def bench_parallel(args):
+    """Batch planning throughput on a shared-memory process pool against one process."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed))
+            queries = random_queries(maze, args.queries, args.seed)
+
+            options = argparse.Namespace(heuristic="auto", weight=1.0, diagonal=False, movement="4",
+                                         corners="never", no_path=True)
+            serial = time_call(lambda: [planner.plan(maze, planner.solve_astar, options, start, goal)
+                                        for start, goal in queries])
+            yield {"size": size, "processes": "serial", "pool_seconds": None, "seconds": serial,
+                   "queries_per_second": len(queries) / serial, "speedup": 1.0}
+
+            for processes in args.processes:
+                # An empty batch times the pool start-up, shared memory and worker attach alone
+                pool = time_call(parallel.plan_batch, maze, [], "astar", processes)
+                seconds = time_call(parallel.plan_batch, maze, queries, "astar", processes, no_path=True)
+                yield {"size": size, "processes": str(processes), "pool_seconds": pool, "seconds": seconds,
+                       "queries_per_second": len(queries) / seconds, "speedup": serial / seconds}
+
+
+def bench_movement(args):
+    """num_explored, path cost and time for each movement model and corner rule."""
+    modes = [("4", "never"), ("8", "never"), ("8", "one"), ("8", "always"), ("any-angle", "never")]
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            start = (size // 2, size // 8)
+            goal = (size // 3, size - 1 - size // 8)
+            maps = [
+                ("random", write_maze_file(directory, size, args.density, args.seed, start, goal)),
+                ("open", write_maze_file(directory, size, 0.02, args.seed + 1, start, goal)),
+            ]
+            for label, filename in maps:
+                maze = A_star_algo.Maze(filename)
+                for movement, corners in modes:
+                    maze.set_movement(movement, corners)
+                    seconds = time_call(maze.solve)
+                    yield {"map": label, "size": size, "movement": movement + ", " + corners,
+                           "explored": maze.num_explored, "seconds": seconds, "cost": maze.solution_cost,
+                           "cells": len(maze.solution[1]),
+                           "waypoints": len(maze.waypoints) if movement == "any-angle" else None}
+
+
+def bench_hierarchical(args):
+    """HPA* preprocessing cost and query latency against flat A* on the same queries."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed, terrain=args.terrain))
+            queries = random_queries(maze, args.queries, args.seed)
+
+            flat_costs = []
+            flat_explored = 0
+            began = time.perf_counter()
+            for maze.start, maze.goal in queries:
+                maze.solve()
+                flat_costs.append(maze.solution_cost)
+                flat_explored += maze.num_explored
+            flat_time = time.perf_counter() - began
+
+            for cluster_size in args.cluster_sizes:
+                filename = os.path.join(directory, "abstraction_%d_%d.npz" % (size, cluster_size))
+                began = time.perf_counter()
+                abstraction = ClusterAbstraction(maze.walls, maze.terrain, cluster_size)
+                build = time.perf_counter() - began
+                save = time_call(abstraction.save, filename)
+                began = time.perf_counter()
+                maze.abstraction = ClusterAbstraction.load(filename, maze.walls, maze.terrain)
+                load = time.perf_counter() - began
+
+                ratios = []
+                explored = 0
+                began = time.perf_counter()
+                for (maze.start, maze.goal), flat_cost in zip(queries, flat_costs):
+                    maze.solve_hierarchical(cluster_size)
+                    ratios.append(maze.solution_cost / flat_cost if flat_cost else 1.0)
+                    explored += maze.num_explored
+                seconds = time.perf_counter() - began
+                yield {"size": size, "cluster": cluster_size, "build_seconds": build, "save_seconds": save,
+                       "load_seconds": load, "nodes": len(abstraction.cells), "edges": abstraction.num_edges,
+                       "astar_ms": 1000 * flat_time / len(queries), "ms": 1000 * seconds / len(queries),
+                       "astar_explored": flat_explored // len(queries), "explored": explored // len(queries),
+                       "cost_ratio": sum(ratios) / len(ratios)}
+
+
+def bench_nearest(args):
+    """Nearest-goal search in one pass against one A* search per goal."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            maze = A_star_algo.Maze(write_maze_file(directory, size, args.density, args.seed))
+            start = maze.start
+            for count in args.goals:
+                goals = [goal for _, goal in random_queries(maze, count, args.seed + count)]
+
+                began = time.perf_counter()
+                best = math.inf
+                explored = 0
+                maze.start = start
+                for maze.goal in goals:
+                    maze.solve()
+                    best = min(best, maze.solution_cost)
+                    explored += maze.num_explored
+                per_goal = time.perf_counter() - began
+
+                for heuristic in ("auto", None):
+                    seconds = time_call(maze.solve_nearest, [start], goals, heuristic)
+                    if maze.solution_cost != best:
+                        raise Exception("nearest-goal search found cost %s, expected %s" % (maze.solution_cost, best))
+                    yield {"size": size, "goals": count, "heuristic": heuristic or "none",
+                           "per_goal_seconds": per_goal, "per_goal_explored": explored, "seconds": seconds,
+                           "explored": maze.num_explored, "cost": best}
+
+
+def bench_instrument(args):
+    """Solve time with instrumentation off, counting, and tracing, plus the counters it reports."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            filename = write_maze_file(directory, size, args.density, args.seed, terrain=args.terrain)
+            for name, module in (("astar", A_star_algo), ("dijkstra", dijkstra_maze)):
+                maze = module.Maze(filename)
+                if module is dijkstra_maze:
+                    maze.assign_costs()
+                off = min(time_call(maze.solve) for _ in range(args.repeats))
+                stats = maze.instrument()
+                counted = time_call(maze.solve)
+                with open(os.path.join(directory, "trace.csv"), "w") as trace:
+                    maze.instrument(trace)
+                    traced = time_call(maze.solve)
+                maze.stats = None
+                yield {"size": size, "solver": name, "seconds": off, "stats_seconds": counted,
+                       "trace_seconds": traced, "pushes": stats.pushes, "pops": stats.pops,
+                       "stale": stats.stale_pops, "decrease": stats.decrease_keys, "peak": stats.peak_frontier}
+
+
+def bench_landmarks(args):
+    """ALT preprocessing cost, and num_explored and latency per query against Manhattan A*, on mazes."""
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in args.maps:
+            for size in args.sizes:
+                maze = A_star_algo.Maze.from_walls(*maze_generator.generate(kind, size, args.seed))
+                queries = random_queries(maze, args.queries, args.seed)
+
+                costs = []
+                explored = 0
+                began = time.perf_counter()
+                for maze.start, maze.goal in queries:
+                    maze.solve("manhattan")
+                    costs.append(maze.solution_cost)
+                    explored += maze.num_explored
+                baseline = time.perf_counter() - began
+                yield {"map": kind, "size": size, "heuristic": "manhattan", "build_seconds": None,
+                       "save_seconds": None, "load_seconds": None, "mib": None,
+                       "ms": 1000 * baseline / len(queries), "explored": explored // len(queries), "speedup": 1.0}
+
+                for count in args.landmarks:
+                    filename = os.path.join(directory, "landmarks_%s_%d_%d.npz" % (kind, size, count))
+                    began = time.perf_counter()
+                    table = LandmarkTable(maze.walls, maze.terrain, count)
+                    build = time.perf_counter() - began
+                    save = time_call(table.save, filename)
+                    began = time.perf_counter()
+                    maze.landmarks = LandmarkTable.load(filename, maze.walls, maze.terrain)
+                    load = time.perf_counter() - began
+
+                    explored = 0
+                    began = time.perf_counter()
+                    for (maze.start, maze.goal), cost in zip(queries, costs):
+                        maze.solve("landmarks")
+                        if maze.solution_cost != cost:
+                            raise Exception("ALT found cost %s, expected %s" % (maze.solution_cost, cost))
+                        explored += maze.num_explored
+                    seconds = time.perf_counter() - began
+                    yield {"map": kind, "size": size, "heuristic": "alt k=%d" % count, "build_seconds": build,
+                           "save_seconds": save, "load_seconds": load, "mib": os.path.getsize(filename) / 2 ** 20,
+                           "ms": 1000 * seconds / len(queries), "explored": explored // len(queries),
+                           "speedup": baseline / seconds}
+                maze.landmarks = None
+
+
+# Each case: the function yielding its result rows, the row fields that tell
+# rows apart between runs, and the defaults for the options it reads
+CASES = {
+    "solvers": (bench_solvers, ("map", "size", "solver"), {
+        "maps": ["perfect", "random", "dense", "rooms", "terrain"], "sizes": [10, 100, 1000],
+        "solvers": ["dijkstra", "astar", "bidirectional", "jps", "hpa", "bfs"], "hpa_limit": 1000}),
+    "frontier": (bench_frontier, ("solver", "size"), {"sizes": [25, 50, 100, 200, 400], "legacy_limit": 200}),
+    "throughput": (bench_throughput, ("solver", "size"), {"sizes": [100, 300, 1000]}),
+    "heuristics": (bench_heuristics, ("size", "mode"), {
+        "sizes": [100, 300, 1000], "weights": [1.5, 3.0], "density": 0.2}),
+    "jps": (bench_jump_points, ("map", "size", "moves"), {"source": "maze.txt", "tiles": [10, 50, 200]}),
+    "bidirectional": (bench_bidirectional, ("map", "size", "solver"), {"sizes": [101, 301, 1001], "density": 0.3}),
+    "replan": (bench_replan, ("size", "edits"), {
+        "sizes": [100, 300, 1000], "edits": 5, "trials": 20, "density": 0.2}),
+    "flow": (bench_flow, ("map", "size", "agents"), {
+        "maps": ["random", "rooms", "terrain"], "sizes": [100, 300, 1000], "agents": [50], "edits": 5, "trials": 5}),
+    "agents": (bench_agents, ("map", "size", "mode", "agents"), {
+        "maps": ["random", "rooms"], "sizes": [500], "agents": [50, 100, 200, 400], "budget": None,
+        "cbs_agents": [4, 8], "cbs_budget": 30.0}),
+    "anytime": (bench_anytime, ("map", "size", "search", "weight"), {
+        "maps": ["dense", "rooms", "terrain"], "sizes": [301, 1001], "weight": INITIAL_WEIGHT, "step": 0.5}),
+    "terrain": (bench_terrain, ("size", "search"), {"sizes": [100, 300, 1000], "terrain": 0.4, "density": 0.2}),
+    "assign-costs": (bench_assign_costs, ("size", "method"), {
+        "sizes": [100, 300, 1000, 2000], "radii": [50], "legacy_limit": 1000, "density": 0.2}),
+    "load": (bench_load, ("size", "loader"), {
+        "sizes": [1000, 4000, 16000], "legacy_limit": 2000, "splitlines_limit": 16000}),
+    "render": (bench_render, ("size", "renderer"), {"sizes": [50, 200, 1000], "legacy_limit": 200, "density": 0.2}),
+    "export": (bench_export, ("size", "export"), {
+        "sizes": [100, 200, 400], "cell_size": 50, "single_limit": 200, "density": 0.2}),
+    "parallel": (bench_parallel, ("size", "processes"), {
+        "sizes": [300, 1000], "queries": 200, "processes": [1, 2, 4, 8, 16], "density": 0.2}),
+    "movement": (bench_movement, ("map", "size", "movement"), {"sizes": [100, 300, 1000], "density": 0.2}),
+    "hpa": (bench_hierarchical, ("size", "cluster"), {
+        "sizes": [300, 1000], "cluster_sizes": [8, 16, 32], "queries": 50, "density": 0.2, "terrain": 0.0}),
+    "nearest": (bench_nearest, ("size", "goals", "heuristic"), {
+        "sizes": [300, 1000], "goals": [1, 4, 16, 64], "density": 0.2}),
+    "instrument": (bench_instrument, ("size", "solver"), {
+        "sizes": [300, 1000], "repeats": 3, "density": 0.2, "terrain": 0.3}),
+    "alt": (bench_landmarks, ("map", "size", "heuristic"), {
+        "maps": ["perfect", "rooms"], "sizes": [301, 1001], "landmarks": [4, 8, 16], "queries": 50}),
+}
+
+
+def case_options(args, defaults):
+    """The case's defaults, overridden by every option given on the command line."""
+    options = argparse.Namespace(**defaults)
+    for name, value in vars(args).items():
+        if value is not None:
+            setattr(options, name, value)
+    return options
+
+
+def row_key(case, fields, row):
+    return "/".join([case] + [str(row[field]) for field in fields])
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return "%.0f" % value if abs(value) >= 1000 else "%.4g" % value
+    return str(value)
+
+
+def column_width(name, value):
+    # Labels get room for names like "bidirectional dijkstra"
+    return max(len(name), 22 if isinstance(value, str) else 10)
+
+
+def print_row(row):
+    cells = []
+    for name, value in row.items():
+        width = column_width(name, value)
+        cells.append(value.ljust(width) if isinstance(value, str) else format_value(value).rjust(width))
+    print(" ".join(cells))
+
+
+def bench_suite(args):
+    """Runs the named cases and prints each one's rows as a table.
+
+    Results can be written as JSON with --output, and compared against an
+    earlier run with --compare, which adds each row's time against the row
+    with the same key there.
+    """
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for case, rows in json.load(f)["results"].items():
+                if case in CASES:
+                    previous.update((row_key(case, CASES[case][1], row), row) for row in rows)
+
+    results = {}
+    for case in args.cases:
+        run, fields, defaults = CASES[case]
+        print("%s: %s" % (case, run.__doc__.splitlines()[0]))
+        rows = results[case] = []
+        for row in run(case_options(args, defaults)):
+            if args.compare:
+                old = previous.get(row_key(case, fields, row))
+                row["time_ratio"] = row["seconds"] / old["seconds"] if old and old.get("seconds") else None
+            if not rows:
+                print(" ".join(name.ljust(column_width(name, value)) for name, value in row.items()))
+            rows.append(row)
+            print_row(row)
+        print()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": sys.platform,
+                "cpu_count": os.cpu_count(),
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmarks for the grid navigation solvers. " + bench_suite.__doc__.splitlines()[0],
+        epilog="cases:\n" + "\n".join("  %-14s %s" % (name, CASES[name][0].__doc__.splitlines()[0])
+                                      for name in CASES),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", metavar="case", help="cases to run (default: solvers)")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON results of an earlier run to report time ratios against")
+    parser.add_argument("--seed", type=int, default=0)
+
+    # Every option below overrides the defaults of each case that reads it
+    parser.add_argument("--maps", nargs="+", choices=sorted(maze_generator.GENERATORS))
+    parser.add_argument("--sizes", type=int, nargs="+", help="map widths; the generators go up to 4096")
+    parser.add_argument("--solvers", nargs="+", choices=sorted(planner.SOLVERS))
+    parser.add_argument("--hpa-limit", type=int, help="largest size to build the HPA* abstraction for")
+    parser.add_argument("--legacy-limit", type=int, help="largest size to run the pre-change code on")
+    parser.add_argument("--splitlines-limit", type=int)
+    parser.add_argument("--single-limit", type=int, help="largest size to also export as one in-memory canvas")
+    parser.add_argument("--density", type=float)
+    parser.add_argument("--terrain", type=float)
+    parser.add_argument("--weights", type=float, nargs="+")
+    parser.add_argument("--weight", type=float, help="weight of the first ARA* pass")
+    parser.add_argument("--step", type=float)
+    parser.add_argument("--source")
+    parser.add_argument("--tiles", type=int, nargs="+", help="how many times to tile --source each way")
+    parser.add_argument("--edits", type=int)
+    parser.add_argument("--trials", type=int)
+    parser.add_argument("--agents", type=int, nargs="+")
+    parser.add_argument("--budget", type=float, help="time limit in seconds for each prioritized plan")
+    parser.add_argument("--cbs-agents", type=int, nargs="+")
+    parser.add_argument("--cbs-budget", type=float)
+    parser.add_argument("--radii", type=int, nargs="+")
+    parser.add_argument("--cell-size", type=int)
+    parser.add_argument("--queries", type=int)
+    parser.add_argument("--processes", type=int, nargs="+")
+    parser.add_argument("--cluster-sizes", type=int, nargs="+")
+    parser.add_argument("--goals", type=int, nargs="+")
+    parser.add_argument("--repeats", type=int)
+    parser.add_argument("--landmarks", type=int, nargs="+")
+
+    args = parser.parse_args(argv)
+    args.cases = args.cases or ["solvers"]
+    for case in args.cases:
+        if case not in CASES:
+            parser.error("unknown case %r (choose from %s)" % (case, ", ".join(CASES)))
+    bench_suite(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
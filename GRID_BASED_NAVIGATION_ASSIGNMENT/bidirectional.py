@@ -0,0 +1,152 @@
+import heapq
+
+from heuristics import make_heuristic
+from search_core import INF, SQRT2, SearchResult
+
+
+class BidirectionalResult(SearchResult):
+    """Search result joined from a forward and a backward search tree."""
+
+    def __init__(self, grid, start, goal, cost, meeting, forward, backward, num_explored):
+        g, parent, done = forward
+        SearchResult.__init__(self, grid, start, goal, g, parent, done, num_explored)
+        self.meeting = meeting
+        self.backward = backward
+        self.meeting_cost = cost
+
+    @property
+    def found(self):
+        return self.meeting_cost < INF
+
+    @property
+    def cost(self):
+        return self.meeting_cost
+
+    def path(self):
+        before, after = self.meeting
+        indices = []
+
+        # Forward tree from the meeting edge back to start
+        index = before
+        while index != self.start:
+            indices.append(index)
+            index = self.parent[index]
+        indices.reverse()
+
+        # Backward tree from the meeting edge on to goal
+        successor = self.backward[1]
+        index = after
+        while index != -1:
+            if index != before:
+                indices.append(index)
+            index = successor[index]
+        return indices
+
+    def explored_mask(self):
+        blocked = self.grid.mask(self.grid.blocked)
+        return (self.grid.mask(self.done) | self.grid.mask(self.backward[2])) & ~blocked
+
+
+def bidirectional_search(grid, start, goal, heuristic=None):
+    """Searches from start and from goal at once until the two frontiers meet.
+
+    Stepping onto a cell costs its step cost, so the backward search pays the
+    cost of the cell it steps off. mu is the cheapest start-goal path seen on
+    any edge joining the two trees. The search stops once the two smallest
+    frontier keys add up to at least mu; no unexpanded path can beat it then.
+
+    With a heuristic name, both searches use the average potential
+    p(v) = (h_goal(v) - h_start(v)) / 2 (bidirectional A*). The keys become
+    g + p forward and g - p backward, and the same stopping rule holds.
+    """
+    size = grid.size
+    blocked = grid.blocked
+    step_costs = grid.step_costs
+    push = heapq.heappush
+    pop = heapq.heappop
+
+    # Every move as (offset, cost factor, corner flags); straight moves never
+    # pass a corner, so they share flags that are all clear
+    open_corners = bytearray(size)
+    steps = [(move, 1, open_corners) for move in grid.moves]
+    steps += [(move, SQRT2, corner) for move, corner in grid.diagonal_moves]
+
+    if heuristic is None:
+        def potential(index):
+            return 0
+    else:
+        to_goal = make_heuristic(heuristic, grid, goal)
+        to_start = make_heuristic(heuristic, grid, start)
+
+        def potential(index):
+            return (to_goal(index) - to_start(index)) / 2
+
+    g_forward = [INF] * size
+    g_backward = [INF] * size
+    parent = [-1] * size
+    successor = [-1] * size
+    done_forward = bytearray(blocked)
+    done_backward = bytearray(blocked)
+
+    g_forward[start] = 0
+    g_backward[goal] = 0
+    forward = [(potential(start), 0, start)]
+    backward = [(-potential(goal), 0, goal)]
+    tie = 0
+    num_explored = 0
+
+    best = 0 if start == goal else INF
+    meeting = (start, goal)
+
+    while forward and backward:
+        # Drop entries for cells already expanded in that direction
+        while forward and done_forward[forward[0][2]]:
+            pop(forward)
+        while backward and done_backward[backward[0][2]]:
+            pop(backward)
+        if not forward or not backward:
+            break
+        if forward[0][0] + backward[0][0] >= best:
+            break
+
+        num_explored += 1
+        tie += 1
+        if forward[0][0] <= backward[0][0]:
+            _, _, index = pop(forward)
+            done_forward[index] = 1
+            base = g_forward[index]
+            for move, factor, corner in steps:
+                neighbor = index + move
+                if blocked[neighbor] or corner[index]:
+                    continue
+                cost = base + factor * step_costs[neighbor]
+                if cost + g_backward[neighbor] < best:
+                    best = cost + g_backward[neighbor]
+                    meeting = (index, neighbor)
+                if not done_forward[neighbor] and cost < g_forward[neighbor]:
+                    g_forward[neighbor] = cost
+                    parent[neighbor] = index
+                    push(forward, (cost + potential(neighbor), tie, neighbor))
+        else:
+            _, _, index = pop(backward)
+            done_backward[index] = 1
+            base = g_backward[index]
+            step_cost = step_costs[index]
+            for move, factor, corner in steps:
+                neighbor = index - move
+                if blocked[neighbor] or corner[neighbor]:
+                    continue
+                cost = base + factor * step_cost
+                if cost + g_forward[neighbor] < best:
+                    best = cost + g_forward[neighbor]
+                    meeting = (neighbor, index)
+                if not done_backward[neighbor] and cost < g_backward[neighbor]:
+                    g_backward[neighbor] = cost
+                    successor[neighbor] = index
+                    push(backward, (cost - potential(neighbor), tie, neighbor))
+
+    return BidirectionalResult(
+        grid, start, goal, best, meeting,
+        (g_forward, parent, done_forward), (g_backward, successor, done_backward),
+        num_explored
+    )
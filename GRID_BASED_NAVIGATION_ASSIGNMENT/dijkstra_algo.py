@@ -1,43 +1,74 @@
-import heapq
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-
-def dijkstra(maze, start, end):
-    rows, cols = len(maze), len(maze[0])
-    directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-
-    # Priority queue for Dijkstra's algorithm
-    pq = [(0, start)]
-    distances = {start: 0}
-
-    while pq:
-        current_dist, current_node = heapq.heappop(pq)
-
-        if current_node == end:
-            break
-
-        for dr, dc in directions:
-            new_row, new_col = current_node[0] + dr, current_node[1] + dc
-
-            if 0 <= new_row < rows and 0 <= new_col < cols and maze[new_row][new_col] == 0:
-                new_dist = current_dist + 1
-
-                if (new_row, new_col) not in distances or new_dist < distances[(new_row, new_col)]:
-                    distances[(new_row, new_col)] = new_dist
-                    heapq.heappush(pq, (new_dist, (new_row, new_col)))
+from bidirectional import bidirectional_search
+from instrument import phase
+from search_core import FlatGrid, breadth_first_search
+
+def grid_walls(maze):
+    """Wall mask of a NumPy array or list of lists, where any nonzero cell is a wall."""
+    walls = np.asarray(maze) != 0
+    if walls.ndim != 2:
+        raise ValueError("maze must be a 2-D grid")
+    return walls
+
+def check_bounds(walls, cell):
+    row, col = cell
+    if not (0 <= row < walls.shape[0] and 0 <= col < walls.shape[1]):
+        raise ValueError("%r is outside the %dx%d maze" % (tuple(cell), walls.shape[0], walls.shape[1]))
+
+def dijkstra(maze, start, end, bidirectional=False, stats=None):
+    """Shortest 4-connected path through a grid of 0 (open) and nonzero (wall) cells.
+
+    maze is a NumPy array or a list of lists. end is one (row, col) cell, or
+    a list of cells to stop at whichever is reached first. Returns the path
+    from start to that goal, both included, or None if no goal can be
+    reached. Cells outside the grid raise ValueError.
+
+    stats is an optional instrument.SearchStats, which counts the search
+    (not the bidirectional one) and times its search and reconstruct phases.
+    """
+    walls = grid_walls(maze)
+    start = tuple(start)
+    check_bounds(walls, start)
+    if np.ndim(end) == 1:
+        goals = [tuple(end)]
+    else:
+        goals = [tuple(goal) for goal in end]
+    for goal in goals:
+        check_bounds(walls, goal)
+
+    if bidirectional:
+        if len(goals) != 1:
+            raise ValueError("bidirectional search needs a single goal")
+        return bidirectional_dijkstra(walls, start, goals[0])
+
+    # Every step costs 1, so Dijkstra's frontier is a plain FIFO queue; see breadth_first_search
+    grid = FlatGrid(walls)
+    targets = bytearray(grid.size)
+    for goal in goals:
+        targets[grid.index(goal)] = 1
+    with phase(stats, "search"):
+        result = breadth_first_search(grid, grid.index(start), targets, stats)
+    if not result.found:
+        return None
 
     # Reconstruct the path
-    path = []
-    current = end
-
-    while current != start:
-        path.append(current)
-        neighbors = [(current[0] + dr, current[1] + dc) for dr, dc in directions]
-        current = min(neighbors, key=lambda x: distances.get(x, float('inf')))
-
-    path.append(start)
-    path.reverse()
-    return path
+    with phase(stats, "reconstruct"):
+        return [start] + [grid.state(index) for index in result.path()]
+
+def bidirectional_dijkstra(maze, start, end):
+    """Meet-in-the-middle variant of dijkstra; returns the path or None."""
+    walls = grid_walls(maze)
+    check_bounds(walls, start)
+    check_bounds(walls, end)
+    if walls[tuple(start)] or walls[tuple(end)]:
+        return None
+    grid = FlatGrid(walls)
+    result = bidirectional_search(grid, grid.index(start), grid.index(end))
+    if not result.found:
+        return None
+    return [tuple(start)] + [grid.state(index) for index in result.path()]
 
 def visualize_maze(maze, path):
     fig, ax = plt.subplots()
@@ -49,8 +80,8 @@ def visualize_maze(maze, path):
                 rect = patches.Rectangle((col, row), 1, 1, linewidth=1, edgecolor='black', facecolor='black')
                 ax.add_patch(rect)
 
-    # Plot path
-    for node in path:
+    # Plot path, if there is one
+    for node in path or []:
         rect = patches.Rectangle((node[1], node[0]), 1, 1, linewidth=1, edgecolor='red', facecolor='red')
         ax.add_patch(rect)
 
@@ -59,22 +90,24 @@ def visualize_maze(maze, path):
     plt.ylim(0, len(maze))
     plt.show()
 
-# Example usage for a 5x8 maze:
-
+if __name__ == "__main__":
+    # Example usage for a 5x8 maze:
+    maze_5x8 = [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 1, 1, 0, 0, 0],
+        [0, 0, 1, 1, 0, 1, 1, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0]
+    ]
 
-maze_5x8 = [
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 1, 1, 0, 0, 0],
-    [0, 0, 1, 1, 0, 1, 1, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0]
-]
+    start_point_5x8 = (2, 1)
+    end_point_5x8 = (4, 6)
 
-start_point_5x8 = (2, 1)
-end_point_5x8 = (5, 6)
+    result_path_5x8 = dijkstra(maze_5x8, start_point_5x8, end_point_5x8)
+    print("Shortest path:", result_path_5x8)
 
-result_path_5x8 = dijkstra(maze_5x8, start_point_5x8, end_point_5x8)
-print("Shortest path:", result_path_5x8)
+    # Multi-goal mode: the path to whichever goal is nearest
+    print("Nearest goal path:", dijkstra(maze_5x8, start_point_5x8, [(0, 7), (4, 4)]))
 
-# Visualize maze and path
-visualize_maze(maze_5x8, result_path_5x8)
+    # Visualize maze and path
+    visualize_maze(maze_5x8, result_path_5x8)
@@ -0,0 +1,72 @@
+from collections import deque
+
+from search_core import INF, grid_search
+
+METHODS = ("auto", "bfs", "dijkstra")
+
+
+def bfs_distances(grid, source, max_cost=INF, stats=None):
+    """Unit-cost distance field from source by breadth-first search."""
+    size = grid.size
+    moves = grid.moves
+    done = bytearray(grid.blocked)
+    distance = [INF] * size
+    parent = [-1] * size
+
+    distance[source] = 0
+    done[source] = 1
+    queue = deque([source])
+    pop = queue.popleft
+    append = queue.append
+    if stats is not None:
+        stats.begin(grid)
+        stats.pushed_cell(source, 1)
+        append, pop = stats.queue_ops(queue, distance)
+
+    while queue:
+        index = pop()
+        cost = distance[index] + 1
+        if cost > max_cost:
+            break
+        for move in moves:
+            neighbor = index + move
+            if not done[neighbor]:
+                done[neighbor] = 1
+                distance[neighbor] = cost
+                parent[neighbor] = index
+                append(neighbor)
+
+    if stats is not None:
+        # Cells are expanded unless their neighbors would cost more than max_cost
+        stats.finish(sum(1 for cost in distance if cost < INF and cost + 1 <= max_cost))
+    return distance, parent
+
+
+def dijkstra_distances(grid, source, max_cost=INF, stats=None):
+    """Weighted distance field from source; each cell is settled exactly once."""
+    result = grid_search(grid, source, -1, max_cost=max_cost, stats=stats)
+    distance = result.g
+
+    # Tentative costs beyond the bound were pushed but never settled
+    if max_cost < INF:
+        distance = [cost if cost <= max_cost else INF for cost in distance]
+    return distance, result.parent
+
+
+def distance_transform(grid, source, method="auto", max_cost=INF, stats=None):
+    """Distance field and parent tree from a flat source index.
+
+    method "bfs" needs a uniform-cost grid without diagonal moves; "auto"
+    picks it whenever the grid allows and Dijkstra otherwise. Cells beyond
+    max_cost (a radius, on unit-cost grids) are left at infinity. stats is
+    an optional SearchStats.
+    """
+    if method not in METHODS:
+        raise ValueError("unknown method %r, expected one of %s" % (method, ", ".join(METHODS)))
+
+    unit = grid.uniform_cost and not grid.diagonal
+    if method == "bfs" and not unit:
+        raise ValueError("breadth-first distances need unit step costs and 4-connected moves")
+    if method == "bfs" or (method == "auto" and unit):
+        return bfs_distances(grid, source, max_cost, stats)
+    return dijkstra_distances(grid, source, max_cost, stats)
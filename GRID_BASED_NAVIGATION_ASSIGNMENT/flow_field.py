@@ -0,0 +1,131 @@
+import numpy as np
+
+from distance_transform import distance_transform
+from incremental import LifelongSearch
+from search_core import INF, FlatGrid, NoSolution
+
+# Next-step codes stored per cell: 0 where there is no step (the goal, walls and
+# cells that cannot reach it), otherwise one plus the index of the move in FlatGrid.moves
+NO_STEP = 0
+DIRECTIONS = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class FlowField():
+    """Cost-to-goal and next-step direction for every cell of a Maze, for many agents sharing one goal.
+
+    The field is one distance transform from the goal, so routing an agent
+    is a lookup per step instead of a search per agent. Moves are
+    4-connected and a step costs the terrain of the cell entered, so the
+    cost from v to the goal is d(goal, v) + c(goal) - c(v): reversing a path
+    shifts its cost by the terrain at its two ends.
+
+    update_cells takes the same edits as IncrementalPlanner and repairs the
+    field with Lifelong Planning A* without a heuristic, re-expanding only
+    the cells whose cost-to-goal changed.
+    """
+
+    def __init__(self, maze, goal=None):
+        self.maze = maze
+        self.grid = FlatGrid(maze.walls, maze.terrain)
+        grid = self.grid
+        self.goal = grid.index(maze.goal if goal is None else goal)
+        if grid.blocked[self.goal]:
+            raise ValueError("flow field goal %r is a wall" % (grid.state(self.goal),))
+
+        distance, _ = distance_transform(grid, self.goal)
+        goal_cost = grid.step_costs[self.goal]
+        g = [cost + goal_cost - step if cost < INF else INF for cost, step in zip(distance, grid.step_costs)]
+        self.lpa = LifelongSearch(grid, self.goal, self.key, g=g)
+        self.g = self.lpa.g
+
+        # directions is a (height, width) view of the flat codes, so both always agree
+        self.codes = bytearray(self.initial_codes())
+        padded = np.frombuffer(self.codes, dtype=np.uint8).reshape(grid.height + 2, grid.stride)
+        self.directions = padded[1:-1, 1:-1]
+
+    def initial_codes(self):
+        """Next-step codes for every cell at once, taking the first cheapest move like best_code."""
+        grid = self.grid
+        shape = (grid.height + 2, grid.stride)
+        g = np.array(self.g, dtype=np.float64).reshape(shape)
+        # Walls and the border have infinite cost-to-goal, so they are never the cheapest move
+        onward = g + np.array(grid.step_costs, dtype=np.float64).reshape(shape)
+
+        # Cost through each neighbor, in FlatGrid.moves order; the border is never a source
+        through = np.full((len(grid.moves),) + shape, INF)
+        through[0, 1:, :] = onward[:-1, :]
+        through[1, :-1, :] = onward[1:, :]
+        through[2, :, 1:] = onward[:, :-1]
+        through[3, :, :-1] = onward[:, 1:]
+        codes = (np.argmin(through, axis=0) + 1).astype(np.uint8)
+        codes[~np.isfinite(g) | ~np.isfinite(through.min(axis=0))] = NO_STEP
+        codes.flat[self.goal] = NO_STEP
+        return codes.tobytes()
+
+    def best_code(self, index):
+        grid = self.grid
+        if index == self.goal or grid.blocked[index] or self.g[index] == INF:
+            return NO_STEP
+        best = INF
+        code = NO_STEP
+        for number, move in enumerate(grid.moves, 1):
+            neighbor = index + move
+            if not grid.blocked[neighbor] and grid.step_costs[neighbor] + self.g[neighbor] < best:
+                best = grid.step_costs[neighbor] + self.g[neighbor]
+                code = number
+        return code
+
+    def key(self, index, best):
+        # No heuristic: the whole field is repaired, cheapest cells first
+        return best
+
+    @property
+    def num_expanded(self):
+        return self.lpa.num_expanded
+
+    def update_cells(self, walls=None, costs=None):
+        """Applies a batch of edits and repairs the field: walls maps cells to True/False, costs maps cells to step costs.
+
+        The edits are written to the maze's walls and terrain too, and what
+        it worked out from them is dropped (see GridMaze.map_changed).
+        """
+        grid = self.grid
+        self.lpa.num_expanded = 0
+        edited = self.lpa.apply_edits(self.maze, walls, costs)
+
+        # A cell's step depends on the terrain and cost-to-goal of its neighbors
+        changed = self.lpa.compute() | edited
+        for index in changed:
+            self.codes[index] = self.best_code(index)
+            for move in grid.moves:
+                self.codes[index + move] = self.best_code(index + move)
+
+    def cost(self, state):
+        """Cost from a cell to the goal, infinite if it cannot get there."""
+        return self.g[self.grid.index(state)]
+
+    def next_step(self, state):
+        """The cell to move to from state, or None at the goal or where the goal is out of reach."""
+        code = self.codes[self.grid.index(state)]
+        if code == NO_STEP:
+            return None
+        row, col = DIRECTIONS[code]
+        return (state[0] + row, state[1] + col)
+
+    def route(self, state):
+        """Path from state to the goal in the (actions, cells) form used by Maze.solution."""
+        grid = self.grid
+        index = grid.index(state)
+        if self.g[index] == INF:
+            raise NoSolution()
+
+        codes = self.codes
+        moves = grid.moves
+        actions = []
+        cells = []
+        while index != self.goal:
+            move = moves[codes[index] - 1]
+            index += move
+            actions.append(grid.actions[move])
+            cells.append(grid.state(index))
+        return actions, cells
@@ -0,0 +1,76 @@
+import math
+
+SQRT2 = math.sqrt(2)
+
+# With more goals than this, evaluating the min-over-goals heuristic costs
+# more than the expansions it saves, so "auto" searches without one
+MAX_HEURISTIC_GOALS = 16
+
+
+def manhattan(grid, goal, weight=1.0):
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+
+    def estimate(index):
+        row, col = divmod(index, stride)
+        return weight * (abs(row - goal_row) + abs(col - goal_col))
+    return estimate
+
+
+def octile(grid, goal, weight=1.0):
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+    diagonal = SQRT2 - 1
+
+    def estimate(index):
+        row, col = divmod(index, stride)
+        dy = abs(row - goal_row)
+        dx = abs(col - goal_col)
+        return weight * (max(dx, dy) + diagonal * min(dx, dy))
+    return estimate
+
+
+def euclidean(grid, goal, weight=1.0):
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+
+    def estimate(index):
+        row, col = divmod(index, stride)
+        return weight * math.hypot(row - goal_row, col - goal_col)
+    return estimate
+
+
+HEURISTICS = {
+    "manhattan": manhattan,
+    "octile": octile,
+    "euclidean": euclidean,
+}
+
+
+def make_heuristic(name, grid, goal, weight=1.0):
+    """Returns an index -> estimate function for a FlatGrid goal index.
+
+    Every heuristic here is admissible and consistent for unit-or-more step
+    costs. A weight above 1 inflates it for weighted A*, whose paths cost at
+    most weight times the optimum.
+    """
+    if name not in HEURISTICS:
+        raise ValueError("unknown heuristic %r, expected one of %s" % (name, ", ".join(HEURISTICS)))
+    if weight < 1:
+        raise ValueError("heuristic weight must be at least 1")
+    return HEURISTICS[name](grid, goal, weight)
+
+
+def nearest_heuristic(name, grid, goals, weight=1.0):
+    """Estimate to the nearest of several goal indices: the minimum of the per-goal estimates.
+
+    A minimum of admissible, consistent estimates is itself admissible and
+    consistent, so A* toward the nearest goal stays optimal.
+    """
+    estimates = [make_heuristic(name, grid, goal, weight) for goal in goals]
+    if len(estimates) == 1:
+        return estimates[0]
+
+    def estimate(index):
+        return min(h(index) for h in estimates)
+    return estimate
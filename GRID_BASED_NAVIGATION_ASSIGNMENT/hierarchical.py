@@ -0,0 +1,344 @@
+import heapq
+import os
+import zlib
+
+import numpy as np
+
+from heuristics import make_heuristic
+from search_core import INF, FlatGrid, grid_search
+
+DEFAULT_CLUSTER_SIZE = 16
+
+# Entrances narrower than this get one transition in the middle, wider ones one at each end
+MAX_ENTRANCE_WIDTH = 6
+
+ABSTRACTION_VERSION = 1
+
+ACTIONS = {(-1, 0): "up", (1, 0): "down", (0, -1): "left", (0, 1): "right"}
+
+
+def map_checksum(walls, terrain):
+    """CRC of the walls and terrain, so a saved abstraction is never used on another map."""
+    checksum = zlib.crc32(np.packbits(walls))
+    return zlib.crc32(np.ascontiguousarray(terrain, dtype=np.uint8), checksum)
+
+
+def open_runs(row):
+    """(first, end) of every run of True in a 1-D bool array, end exclusive."""
+    edges = np.diff(np.concatenate(([0], row.astype(np.int8), [0])))
+    return zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist())
+
+
+class HierarchicalResult():
+    """Outcome of a ClusterAbstraction search, usable with GridMaze.store_result."""
+
+    def __init__(self, shape, start, cost, cells, num_explored, explored):
+        self.shape = shape
+        self.start = start
+        self.cost = cost
+        self.cells = cells
+        self.num_explored = num_explored
+        self.explored = explored
+
+    @property
+    def found(self):
+        return self.cost < INF
+
+    def solution(self):
+        actions = []
+        previous = self.start
+        for cell in self.cells:
+            actions.append(ACTIONS[cell[0] - previous[0], cell[1] - previous[1]])
+            previous = cell
+        return actions, self.cells
+
+    def explored_mask(self):
+        """Cells expanded by the local searches, which are the only grid searches made."""
+        mask = np.zeros(self.shape, dtype=bool)
+        for top, left, local in self.explored:
+            mask[top:top + local.shape[0], left:left + local.shape[1]] |= local
+        return mask
+
+
+class ClusterAbstraction():
+    """HPA* abstraction of a 4-connected weighted grid.
+
+    The grid is cut into cluster_size square clusters. Every open stretch of
+    a border between two clusters is an entrance, crossed at one or two
+    transitions; the cells on both sides of a transition are the nodes of
+    the abstract graph. Nodes are linked across their transition and, inside
+    each cluster, to every other node of that cluster at the cost of the
+    best path that stays in the cluster.
+
+    A query links start and goal to the nodes of their own clusters, runs A*
+    on the abstract graph and then refines each abstract edge with a search
+    confined to one cluster. Paths are typically within a few percent of optimal.
+    """
+
+    def __init__(self, walls, terrain, cluster_size=DEFAULT_CLUSTER_SIZE):
+        if cluster_size < 2:
+            raise ValueError("cluster size must be at least 2")
+        self.init_abstraction(walls, terrain, cluster_size)
+        self.find_entrances()
+        self.connect_clusters()
+
+    def init_abstraction(self, walls, terrain, cluster_size):
+        # Copies, so the map can be edited after this without the abstraction going out of step with it
+        self.walls = np.array(walls, dtype=bool)
+        self.terrain = np.array(terrain)
+        self.shape = walls.shape
+        self.cluster_size = cluster_size
+        self.cluster_columns = -(-self.shape[1] // cluster_size)
+        self.cells = []
+        self.node_of = {}
+        self.edges = []
+        self.cluster_nodes = {}
+
+    def cluster(self, cell):
+        size = self.cluster_size
+        return cell[0] // size * self.cluster_columns + cell[1] // size
+
+    def cluster_grid(self, cluster):
+        """(FlatGrid of one cluster, top row, left column)."""
+        size = self.cluster_size
+        top = cluster // self.cluster_columns * size
+        left = cluster % self.cluster_columns * size
+        window = (slice(top, top + size), slice(left, left + size))
+        return FlatGrid(self.walls[window], self.terrain[window]), top, left
+
+    def node(self, cell):
+        node = self.node_of.get(cell)
+        if node is None:
+            node = len(self.cells)
+            self.node_of[cell] = node
+            self.cells.append(cell)
+            self.edges.append([])
+            self.cluster_nodes.setdefault(self.cluster(cell), []).append(node)
+        return node
+
+    def add_transition(self, a, b):
+        node_a = self.node(a)
+        node_b = self.node(b)
+        self.edges[node_a].append((node_b, int(self.terrain[b])))
+        self.edges[node_b].append((node_a, int(self.terrain[a])))
+
+    def find_entrances(self):
+        height, width = self.shape
+        size = self.cluster_size
+        walls = self.walls
+
+        # Borders between horizontally adjacent clusters, one band of rows at a time
+        for col in range(size, width, size):
+            crossable = ~walls[:, col - 1] & ~walls[:, col]
+            for top in range(0, height, size):
+                for first, end in open_runs(crossable[top:top + size]):
+                    for row in self.transitions(first, end):
+                        self.add_transition((top + row, col - 1), (top + row, col))
+
+        for row in range(size, height, size):
+            crossable = ~walls[row - 1, :] & ~walls[row, :]
+            for left in range(0, width, size):
+                for first, end in open_runs(crossable[left:left + size]):
+                    for col in self.transitions(first, end):
+                        self.add_transition((row - 1, left + col), (row, left + col))
+
+    def transitions(self, first, end):
+        if end - first < MAX_ENTRANCE_WIDTH:
+            return [(first + end - 1) // 2]
+        return [first, end - 1]
+
+    def connect_clusters(self):
+        """Links the nodes of each cluster by their best paths inside it.
+
+        Reversing a path changes its cost by the difference of its end cells'
+        step costs, so one search per node pair covers both directions.
+        """
+        for cluster, nodes in self.cluster_nodes.items():
+            if len(nodes) < 2:
+                continue
+            grid, top, left = self.cluster_grid(cluster)
+            local = [grid.index((self.cells[node][0] - top, self.cells[node][1] - left)) for node in nodes]
+            step_costs = grid.step_costs
+            for i in range(len(nodes) - 1):
+                g = grid_search(grid, local[i], -1).g
+                for j in range(i + 1, len(nodes)):
+                    cost = g[local[j]]
+                    if cost < INF:
+                        self.edges[nodes[i]].append((nodes[j], cost))
+                        self.edges[nodes[j]].append((nodes[i], cost + step_costs[local[i]] - step_costs[local[j]]))
+
+    @property
+    def num_edges(self):
+        return sum(len(edges) for edges in self.edges)
+
+    def local_search(self, cell, explored, stats=None):
+        """Searches the whole cluster around cell; returns (result, grid, top, left)."""
+        grid, top, left = self.cluster_grid(self.cluster(cell))
+        result = grid_search(grid, grid.index((cell[0] - top, cell[1] - left)), -1, stats=stats)
+        explored.append((top, left, result.explored_mask()))
+        return result, grid, top, left
+
+    def refine(self, a, b, explored, stats=None):
+        """Cells after a up to b along the best path inside their shared cluster."""
+        grid, top, left = self.cluster_grid(self.cluster(a))
+        goal = grid.index((b[0] - top, b[1] - left))
+        result = grid_search(grid, grid.index((a[0] - top, a[1] - left)), goal, make_heuristic("manhattan", grid, goal),
+                             stats=stats)
+        if not result.found:
+            raise Exception("no path from %r to %r inside their cluster; the abstraction is stale" % (a, b))
+        explored.append((top, left, result.explored_mask()))
+        return [(row + top, col + left) for row, col in (grid.state(index) for index in result.path())], result.num_explored
+
+    def search(self, start, goal, stats=None):
+        """Plans from start to goal; returns a HierarchicalResult.
+
+        A SearchStats passed as stats counts the grid searches inside
+        clusters, and traces their pops at cluster coordinates. The abstract
+        graph search is not a grid search, so its expansions only add to
+        the result's num_explored.
+        """
+        start = tuple(start)
+        goal = tuple(goal)
+        explored = []
+
+        # Link start and goal to the nodes of their clusters
+        source, source_grid, source_top, source_left = self.local_search(start, explored, stats)
+        target, target_grid, target_top, target_left = self.local_search(goal, explored, stats)
+        num_explored = source.num_explored + target.num_explored
+
+        start_node = len(self.cells)
+        goal_node = start_node + 1
+        start_edges = []
+        for node in self.cluster_nodes.get(self.cluster(start), []):
+            row, col = self.cells[node]
+            cost = source.g[source_grid.index((row - source_top, col - source_left))]
+            if cost < INF:
+                start_edges.append((node, cost))
+        goal_edges = {}
+        goal_cost = target_grid.step_costs[target_grid.index((goal[0] - target_top, goal[1] - target_left))]
+        for node in self.cluster_nodes.get(self.cluster(goal), []):
+            row, col = self.cells[node]
+            index = target_grid.index((row - target_top, col - target_left))
+            cost = target.g[index]
+            if cost < INF:
+                goal_edges[node] = cost + goal_cost - target_grid.step_costs[index]
+        if self.cluster(start) == self.cluster(goal):
+            direct = source.g[source_grid.index((goal[0] - source_top, goal[1] - source_left))]
+            if direct < INF:
+                start_edges.append((goal_node, direct))
+
+        # A* over the abstract graph; Manhattan distance is admissible for step costs of at least 1
+        cells = self.cells
+        g = {start_node: 0}
+        parent = {start_node: -1}
+        done = set()
+        frontier = [(abs(start[0] - goal[0]) + abs(start[1] - goal[1]), 0, start_node)]
+        while frontier:
+            _, _, node = heapq.heappop(frontier)
+            if node in done:
+                continue
+            done.add(node)
+            num_explored += 1
+            if node == goal_node:
+                break
+
+            if node == start_node:
+                edges = start_edges
+            else:
+                edges = self.edges[node]
+                if node in goal_edges:
+                    edges = edges + [(goal_node, goal_edges[node])]
+            base = g[node]
+            for neighbor, step in edges:
+                cost = base + step
+                if neighbor not in done and cost < g.get(neighbor, INF):
+                    g[neighbor] = cost
+                    parent[neighbor] = node
+                    cell = goal if neighbor == goal_node else cells[neighbor]
+                    heapq.heappush(frontier, (cost + abs(cell[0] - goal[0]) + abs(cell[1] - goal[1]), -cost, neighbor))
+
+        if goal_node not in done:
+            return HierarchicalResult(self.shape, start, INF, [], num_explored, explored)
+
+        nodes = []
+        node = parent[goal_node]
+        while node != start_node:
+            nodes.append(node)
+            node = parent[node]
+        nodes.reverse()
+
+        # Refine: the first and last legs come from the start and goal searches,
+        # transitions are single steps and the rest are searched within a cluster
+        if not nodes:
+            path = self.tree_path(source, source_grid, source_top, source_left, goal)
+        else:
+            path = self.tree_path(source, source_grid, source_top, source_left, cells[nodes[0]])
+            for a, b in zip(nodes, nodes[1:]):
+                if self.cluster(cells[a]) != self.cluster(cells[b]):
+                    path.append(cells[b])
+                else:
+                    segment, count = self.refine(cells[a], cells[b], explored, stats)
+                    path.extend(segment)
+                    num_explored += count
+            back = [goal] + self.tree_path(target, target_grid, target_top, target_left, cells[nodes[-1]])
+            back.reverse()
+            path.extend(back[1:])
+        return HierarchicalResult(self.shape, start, g[goal_node], path, num_explored, explored)
+
+    def tree_path(self, result, grid, top, left, cell):
+        """Cells after the search root up to cell, from a local search's parent tree."""
+        parent = result.parent
+        index = grid.index((cell[0] - top, cell[1] - left))
+        indices = []
+        while index != result.start:
+            indices.append(index)
+            index = parent[index]
+        indices.reverse()
+        return [(row + top, col + left) for row, col in (grid.state(index) for index in indices)]
+
+    def save(self, filename):
+        """Writes the abstraction, with a checksum of its map, as a NumPy .npz archive."""
+        offsets = np.cumsum([0] + [len(edges) for edges in self.edges])
+        with open(filename, "wb") as f:
+            np.savez(
+                f,
+                version=ABSTRACTION_VERSION,
+                shape=self.shape,
+                cluster_size=self.cluster_size,
+                checksum=map_checksum(self.walls, self.terrain),
+                cells=np.array(self.cells, dtype=np.int32).reshape(-1, 2),
+                offsets=offsets,
+                targets=np.array([node for edges in self.edges for node, _ in edges], dtype=np.int32),
+                costs=np.array([cost for edges in self.edges for _, cost in edges], dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, filename, walls, terrain):
+        """Reads an abstraction saved for this map; returns None if it was saved for another."""
+        with np.load(filename) as data:
+            if int(data["version"]) != ABSTRACTION_VERSION:
+                raise Exception("unsupported abstraction version %d" % int(data["version"]))
+            if tuple(data["shape"]) != walls.shape or int(data["checksum"]) != map_checksum(walls, terrain):
+                return None
+
+            abstraction = cls.__new__(cls)
+            abstraction.init_abstraction(walls, terrain, int(data["cluster_size"]))
+            for row, col in data["cells"].tolist():
+                abstraction.node((row, col))
+            offsets = data["offsets"].tolist()
+            pairs = list(zip(data["targets"].tolist(), data["costs"].tolist()))
+        for node, edges in enumerate(abstraction.edges):
+            edges.extend(pairs[offsets[node]:offsets[node + 1]])
+        return abstraction
+
+
+def load_or_build(filename, walls, terrain, cluster_size=DEFAULT_CLUSTER_SIZE):
+    """Loads the abstraction saved in filename, or builds it (and saves it there) if missing or stale."""
+    if filename and os.path.exists(filename):
+        abstraction = ClusterAbstraction.load(filename, walls, terrain)
+        if abstraction is not None and abstraction.cluster_size == cluster_size:
+            return abstraction
+    abstraction = ClusterAbstraction(walls, terrain, cluster_size)
+    if filename:
+        abstraction.save(filename)
+    return abstraction
@@ -0,0 +1,233 @@
+import heapq
+
+import numpy as np
+
+from search_core import INF, FlatGrid, NoSolution
+
+
+class LifelongSearch():
+    """The Lifelong Planning A* core shared by IncrementalPlanner and FlowField.
+
+    g holds each cell's settled cost and rhs its one-step lookahead from the
+    neighbors' g. Cells where the two differ wait in a queue ordered by
+    key(index, best), with best the lower of the two. With backward=True the
+    costs run from each cell to root, paying for every cell entered on the
+    way, as a search from the goal needs; with backward=False they run from
+    root to each cell. Moves are those of the FlatGrid.
+
+    g may be passed already settled, say from a distance transform, in which
+    case nothing is queued until an edit; otherwise only root starts out
+    with a cost.
+    """
+
+    def __init__(self, grid, root, key, backward=True, g=None):
+        self.grid = grid
+        self.root = root
+        self.key = key
+        self.backward = backward
+        self.queue = []
+        self.queued = {}
+        self.num_expanded = 0
+        if g is None:
+            self.g = [INF] * grid.size
+            self.rhs = [INF] * grid.size
+            self.rhs[root] = 0
+            self.insert(root)
+        else:
+            self.g = g
+            self.rhs = list(g)
+
+    def key_of(self, index):
+        return self.key(index, min(self.g[index], self.rhs[index]))
+
+    def insert(self, index):
+        key = self.key_of(index)
+        self.queued[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def top(self):
+        # Skip entries whose cell was removed or requeued with a different key
+        queue = self.queue
+        while queue and self.queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def update_vertex(self, index):
+        grid = self.grid
+        if index != self.root:
+            best = INF
+            if not grid.blocked[index]:
+                blocked = grid.blocked
+                g = self.g
+                step_costs = grid.step_costs
+                if self.backward:
+                    for move in grid.moves:
+                        neighbor = index + move
+                        if not blocked[neighbor] and step_costs[neighbor] + g[neighbor] < best:
+                            best = step_costs[neighbor] + g[neighbor]
+                else:
+                    # Every way in ends by entering this cell
+                    for move in grid.moves:
+                        neighbor = index + move
+                        if not blocked[neighbor] and g[neighbor] < best:
+                            best = g[neighbor]
+                    best += step_costs[index]
+            self.rhs[index] = best
+
+        if self.g[index] != self.rhs[index]:
+            self.insert(index)
+        else:
+            self.queued.pop(index, None)
+
+    def compute(self, done=None):
+        """Expands queued cells in key order until done(top key) is true or none are left.
+
+        Returns the set of cells expanded, whose g may have changed.
+        """
+        g = self.g
+        rhs = self.rhs
+        moves = self.grid.moves
+        expanded = set()
+
+        while True:
+            top = self.top()
+            if top is None:
+                break
+            old_key, index = top
+            if done is not None and done(old_key):
+                break
+
+            heapq.heappop(self.queue)
+            del self.queued[index]
+            self.num_expanded += 1
+
+            new_key = self.key_of(index)
+            if old_key < new_key:
+                self.insert(index)
+                continue
+            expanded.add(index)
+            if g[index] > rhs[index]:
+                # Locally overconsistent: settle it and pass the improvement on
+                g[index] = rhs[index]
+                for move in moves:
+                    self.update_vertex(index + move)
+            else:
+                # Locally underconsistent: forget its cost and let it be recomputed
+                g[index] = INF
+                self.update_vertex(index)
+                for move in moves:
+                    self.update_vertex(index + move)
+        return expanded
+
+    def apply_edits(self, maze, walls=None, costs=None):
+        """Applies update_cells edits to the grid and to maze, and queues the cells they leave inconsistent.
+
+        The maze's cached grids, HPA* abstraction and landmark table are
+        dropped, since they no longer match the map. Returns the edited indices.
+        """
+        grid = self.grid
+        edited = set()
+
+        for state, wall in (walls or {}).items():
+            index = grid.index(state)
+            grid.blocked[index] = 1 if wall else 0
+            maze.walls[state] = wall
+            edited.add(index)
+        for state, cost in (costs or {}).items():
+            index = grid.index(state)
+            grid.step_costs[index] = cost
+            maze.terrain[state] = cost
+            edited.add(index)
+        if edited:
+            maze.map_changed()
+
+        # A changed cell alters its own outgoing edges and every edge into it
+        touched = set(edited)
+        for index in edited:
+            touched.update(index + move for move in grid.moves)
+        for index in touched:
+            self.update_vertex(index)
+        return edited
+
+
+class IncrementalPlanner():
+    """D* Lite replanner over a Maze grid.
+
+    The search runs backward from the goal, so g[s] is the cost from s to the
+    goal. When cells change, only the cells whose cost-to-goal is affected are
+    re-expanded; the rest of the previous search is reused. The start may also
+    move along the path between replans (km keeps the old keys valid).
+    """
+
+    def __init__(self, maze, costs=None):
+        self.maze = maze
+        self.grid = FlatGrid(maze.walls, maze.terrain if costs is None else costs)
+        grid = self.grid
+        self.start = grid.index(maze.start)
+        self.goal = grid.index(maze.goal)
+        self.last_start = self.start
+        self.km = 0
+
+        self.lpa = LifelongSearch(grid, self.goal, self.key)
+        self.g = self.lpa.g
+        maze.explored = np.zeros_like(maze.walls)
+
+    def heuristic(self, a, b):
+        row_a, col_a = divmod(a, self.grid.stride)
+        row_b, col_b = divmod(b, self.grid.stride)
+        return abs(row_a - row_b) + abs(col_a - col_b)
+
+    def key(self, index, best):
+        return (best + self.heuristic(self.start, index) + self.km, best)
+
+    def compute_shortest_path(self):
+        lpa = self.lpa
+        start = self.start
+        # Stop once nothing queued can still lower the start's cost
+        lpa.compute(lambda key: key >= lpa.key_of(start) and lpa.rhs[start] == lpa.g[start])
+
+    def update_cells(self, walls=None, costs=None):
+        """Applies a batch of edits: walls maps cells to True/False, costs maps cells to step costs.
+
+        The edits are written to the maze's walls and terrain too, and what
+        it worked out from them is dropped (see GridMaze.map_changed).
+        """
+        self.lpa.apply_edits(self.maze, walls, costs)
+
+    def move_start(self, state):
+        """Moves the start, e.g. to where the robot now is, without resetting the search."""
+        self.maze.start = state
+        self.start = self.grid.index(state)
+        self.km += self.heuristic(self.last_start, self.start)
+        self.last_start = self.start
+
+    def plan(self):
+        """Repairs the search and stores the new path on the maze."""
+        self.lpa.num_expanded = 0
+        self.compute_shortest_path()
+
+        grid = self.grid
+        g = self.g
+        if g[self.start] == INF:
+            raise NoSolution()
+
+        # Follow the cheapest successor from start down to goal
+        actions = []
+        cells = []
+        index = self.start
+        while index != self.goal:
+            best = INF
+            for move in grid.moves:
+                neighbor = index + move
+                if not grid.blocked[neighbor] and grid.step_costs[neighbor] + g[neighbor] < best:
+                    best = grid.step_costs[neighbor] + g[neighbor]
+                    step = move
+            index += step
+            actions.append(grid.actions[step])
+            cells.append(grid.state(index))
+
+        maze = self.maze
+        maze.solution = (actions, cells)
+        maze.solution_cost = g[self.start]
+        maze.num_explored = self.lpa.num_expanded
+        return maze.solution
@@ -0,0 +1,152 @@
+import heapq
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+# What phase() hands out when instrumentation is off
+NO_PHASE = nullcontext()
+
+TRACE_HEADER = "pop,row,col,key,stale,frontier,seconds\n"
+
+
+def phase(stats, name):
+    """stats.phase(name), or a do-nothing context when stats is None."""
+    return NO_PHASE if stats is None else stats.phase(name)
+
+
+class SearchStats():
+    """Frontier counters and phase timings collected by instrumented solver runs.
+
+    Searches take a stats argument (None by default). When it is given they
+    swap their frontier operations for the counting wrappers below; when it
+    is not, they run exactly the uninstrumented code. Counters add up over
+    every search run with the same stats.
+
+    Every push for a cell that already had one is counted as a decrease-key,
+    and stale pops are the pops that expanded nothing: mostly the entries
+    lazy deletion leaves behind. With a trace file, every pop is written as
+    a CSV line (see TRACE_HEADER), so the expansions are the lines with
+    stale = 0.
+    """
+
+    def __init__(self, trace=None):
+        self.pushes = 0
+        self.pops = 0
+        self.decrease_keys = 0
+        self.peak_frontier = 0
+        self.num_explored = 0
+        self.searches = 0
+        self.phases = {}
+        self.trace = trace
+        self.grid = None
+        self.began = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the wall-clock time of the with block to the named phase."""
+        began = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - began
+
+    def begin(self, grid):
+        """Starts counting one search over a FlatGrid."""
+        self.grid = grid
+        self.searches += 1
+        self.expanded = bytearray(grid.size)
+        self.pushed = bytearray(grid.size)
+        self.frontier = 0
+        if self.trace is not None and self.trace.tell() == 0:
+            self.trace.write(TRACE_HEADER)
+
+    def pushed_cell(self, index, frontier):
+        self.pushes += 1
+        if self.pushed[index]:
+            self.decrease_keys += 1
+        self.pushed[index] = 1
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+
+    def popped_cell(self, index, key, frontier):
+        # Searches expand a cell the first time it is popped and skip it after
+        self.pops += 1
+        stale = self.expanded[index]
+        self.expanded[index] = 1
+        if self.trace is not None:
+            row, col = self.grid.state(index)
+            self.trace.write("%d,%d,%d,%s,%d,%d,%.6f\n" % (
+                self.pops, row, col, key, stale, frontier, time.perf_counter() - self.began))
+
+    def finish(self, num_explored):
+        """Ends one search, which expanded num_explored cells."""
+        self.num_explored += num_explored
+
+    @property
+    def stale_pops(self):
+        return self.pops - self.num_explored
+
+    def heap_ops(self):
+        """(push, pop) for a heap of (key, tie, index) entries."""
+        def push(heap, entry):
+            heapq.heappush(heap, entry)
+            self.pushed_cell(entry[2], len(heap))
+
+        def pop(heap):
+            entry = heapq.heappop(heap)
+            self.popped_cell(entry[2], entry[0], len(heap))
+            return entry
+        return push, pop
+
+    def heap_start(self, heap):
+        """Counts the entries a heap search starts with."""
+        for entry in heap:
+            self.pushed_cell(entry[2], len(heap))
+
+    def queue_ops(self, queue, distance=None):
+        """(append, popleft) for a breadth-first deque of indices, keyed by their distance if given."""
+        def append(index):
+            queue.append(index)
+            self.pushed_cell(index, len(queue))
+
+        def popleft():
+            index = queue.popleft()
+            self.popped_cell(index, distance[index] if distance is not None else "", len(queue))
+            return index
+        return append, popleft
+
+    def bucket_push(self, bucket, index):
+        bucket.append(index)
+        self.frontier += 1
+        self.pushed_cell(index, self.frontier)
+
+    def drained(self, bucket, targets, cost):
+        """Counts the pops of a bucket about to be drained at the given cost.
+
+        Draining stops after the goal is expanded, so the pops are replayed
+        up to there. They are counted (and traced) when the bucket starts
+        rather than one by one, so a bucket search's peak frontier can read
+        low by up to one bucket.
+        """
+        for index in bucket:
+            self.frontier -= 1
+            stale = self.expanded[index]
+            self.popped_cell(index, cost, self.frontier)
+            if targets[index] and not stale:
+                break
+
+    def as_dict(self):
+        return {
+            "searches": self.searches,
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "decrease_keys": self.decrease_keys,
+            "peak_frontier": self.peak_frontier,
+            "num_explored": self.num_explored,
+            "phases": dict(self.phases),
+        }
+
+    def write_json(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
@@ -0,0 +1,226 @@
+import heapq
+
+from heuristics import make_heuristic
+from search_core import INF, SQRT2, SearchResult
+
+
+class JumpPointResult(SearchResult):
+    """Search result whose parent pointers link jump points rather than cells."""
+
+    def path(self):
+        grid = self.grid
+        stride = grid.stride
+        jump_points = SearchResult.path(self)
+
+        # Fill in the straight or diagonal run between consecutive jump points
+        indices = []
+        previous = self.start
+        for index in jump_points:
+            row, col = divmod(index, stride)
+            previous_row, previous_col = divmod(previous, stride)
+            step = ((row > previous_row) - (row < previous_row)) * stride + (col > previous_col) - (col < previous_col)
+            cell = previous
+            while cell != index:
+                cell += step
+                indices.append(cell)
+            previous = index
+        return indices
+
+
+class JumpPointSearch():
+    """Jump Point Search on a uniform-cost FlatGrid.
+
+    Straight runs and diagonal runs that have no forced neighbors are skipped
+    in a single jump, so only their end points ever reach the heap. With
+    diagonal moves the grid forbids corner cutting, matching grid_search.
+    """
+
+    def __init__(self, grid):
+        if not grid.uniform_cost:
+            raise ValueError("jump point search needs a uniform-cost grid")
+        if grid.diagonal and grid.corners != "never":
+            raise ValueError("jump point search only supports the \"never\" corner rule")
+        self.grid = grid
+
+    def search(self, start, goal, stats=None):
+        """Plans between two flat indices; a SearchStats passed as stats counts the jump points' frontier."""
+        grid = self.grid
+        stride = grid.stride
+        blocked = grid.blocked
+        jump = self.jump8 if grid.diagonal else self.jump4
+        successors = self.successors8 if grid.diagonal else self.successors4
+        distance = make_heuristic("octile" if grid.diagonal else "manhattan", grid, goal)
+        push = heapq.heappush
+        pop = heapq.heappop
+        if stats is not None:
+            stats.begin(grid)
+            push, pop = stats.heap_ops()
+
+        self.goal = goal
+        g = [INF] * grid.size
+        parent = [-1] * grid.size
+        done = bytearray(blocked)
+
+        g[start] = 0
+        frontier = [(distance(start), 0, start)]
+        num_explored = 0
+        if stats is not None:
+            stats.heap_start(frontier)
+
+        while frontier:
+            _, _, index = pop(frontier)
+            if done[index]:
+                continue
+            done[index] = 1
+            num_explored += 1
+
+            if index == goal:
+                break
+
+            # Direction of travel into this jump point, as unit row and column steps
+            dr = dc = 0
+            if index != start:
+                row, col = divmod(index, stride)
+                parent_row, parent_col = divmod(parent[index], stride)
+                dr = (row > parent_row) - (row < parent_row)
+                dc = (col > parent_col) - (col < parent_col)
+
+            base = g[index]
+            for step_row, step_col in successors(index, dr, dc):
+                target = jump(index + step_row * stride + step_col, step_row, step_col)
+                if target < 0 or done[target]:
+                    continue
+                cost = base + self.run_cost(index, target)
+                if cost < g[target]:
+                    g[target] = cost
+                    parent[target] = index
+                    push(frontier, (cost + distance(target), -cost, target))
+
+        if stats is not None:
+            stats.finish(num_explored)
+        return JumpPointResult(grid, start, goal, g, parent, done, num_explored)
+
+    def run_cost(self, a, b):
+        """Exact cost of the straight or diagonal run between two indices."""
+        row_a, col_a = divmod(a, self.grid.stride)
+        row_b, col_b = divmod(b, self.grid.stride)
+        dy = abs(row_a - row_b)
+        dx = abs(col_a - col_b)
+        if self.grid.diagonal:
+            return SQRT2 * min(dx, dy) + abs(dx - dy)
+        return dx + dy
+
+    def successors4(self, index, dr, dc):
+        blocked = self.grid.blocked
+        stride = self.grid.stride
+        if dr == 0 and dc == 0:
+            candidates = ((-1, 0), (1, 0), (0, -1), (0, 1))
+        elif dc:
+            candidates = ((-1, 0), (1, 0), (0, dc))
+        else:
+            candidates = ((0, -1), (0, 1), (dr, 0))
+        return [(r, c) for r, c in candidates if not blocked[index + r * stride + c]]
+
+    def successors8(self, index, dr, dc):
+        blocked = self.grid.blocked
+        stride = self.grid.stride
+        if dr == 0 and dc == 0:
+            result = [(r, c) for r, c in ((-1, 0), (1, 0), (0, -1), (0, 1)) if not blocked[index + r * stride + c]]
+            for r in (-1, 1):
+                for c in (-1, 1):
+                    if not blocked[index + r * stride] and not blocked[index + c]:
+                        result.append((r, c))
+            return result
+
+        result = []
+        if dr and dc:
+            vertical = not blocked[index + dr * stride]
+            horizontal = not blocked[index + dc]
+            if vertical:
+                result.append((dr, 0))
+            if horizontal:
+                result.append((0, dc))
+            if vertical and horizontal:
+                result.append((dr, dc))
+        elif dc:
+            ahead = not blocked[index + dc]
+            for r in (-1, 1):
+                if not blocked[index + r * stride]:
+                    result.append((r, 0))
+                    if ahead:
+                        result.append((r, dc))
+            if ahead:
+                result.append((0, dc))
+        else:
+            ahead = not blocked[index + dr * stride]
+            for c in (-1, 1):
+                if not blocked[index + c]:
+                    result.append((0, c))
+                    if ahead:
+                        result.append((dr, c))
+            if ahead:
+                result.append((dr, 0))
+        return result
+
+    def jump4(self, index, dr, dc):
+        """Walks from index in a straight line; returns the next jump point or -1."""
+        blocked = self.grid.blocked
+        stride = self.grid.stride
+        goal = self.goal
+        step = dr * stride + dc
+
+        while True:
+            if blocked[index]:
+                return -1
+            if index == goal:
+                return index
+
+            if dc:
+                # An open side cell that was blocked one step back is a forced neighbor
+                if (not blocked[index - stride] and blocked[index - dc - stride]) or \
+                        (not blocked[index + stride] and blocked[index - dc + stride]):
+                    return index
+            else:
+                back = dr * stride
+                if (not blocked[index - 1] and blocked[index - 1 - back]) or \
+                        (not blocked[index + 1] and blocked[index + 1 - back]):
+                    return index
+
+                # Vertical runs stop wherever a horizontal run would find something
+                if self.jump4(index + 1, 0, 1) >= 0 or self.jump4(index - 1, 0, -1) >= 0:
+                    return index
+
+            index += step
+
+    def jump8(self, index, dr, dc):
+        """Walks from index straight or diagonally; returns the next jump point or -1."""
+        blocked = self.grid.blocked
+        stride = self.grid.stride
+        goal = self.goal
+        vertical = dr * stride
+        step = vertical + dc
+
+        while True:
+            if blocked[index]:
+                return -1
+            if index == goal:
+                return index
+
+            if dr and dc:
+                # Diagonal runs stop wherever a straight run would find something
+                if self.jump8(index + dc, 0, dc) >= 0 or self.jump8(index + vertical, dr, 0) >= 0:
+                    return index
+
+                # Never cut a corner to keep going diagonally
+                if blocked[index + dc] or blocked[index + vertical]:
+                    return -1
+            elif dc:
+                if (not blocked[index - stride] and blocked[index - dc - stride]) or \
+                        (not blocked[index + stride] and blocked[index - dc + stride]):
+                    return index
+            else:
+                if (not blocked[index - 1] and blocked[index - 1 - vertical]) or \
+                        (not blocked[index + 1] and blocked[index + 1 - vertical]):
+                    return index
+
+            index += step
@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+
+from distance_transform import distance_transform
+from hierarchical import map_checksum
+from search_core import FlatGrid
+
+DEFAULT_LANDMARKS = 8
+
+# Landmarks a query's heuristic evaluates, out of those in the table
+ACTIVE_LANDMARKS = 4
+
+LANDMARKS_VERSION = 1
+
+
+class LandmarkTable():
+    """Exact 4-connected distance fields from a few landmark cells, for the ALT heuristic.
+
+    Landmarks are picked farthest-first: each one is the open cell farthest
+    from all landmarks chosen before it (cells none of them reach count as
+    farthest, so every connected region gets one). The first is the cell
+    farthest from a random open cell.
+
+    Each field is stored as uint16, or uint32 if a distance needs it, with
+    the type's largest value marking walls and unreachable cells. Fields are
+    kept in the padded layout of a FlatGrid over the map, so a search reads
+    them by flat index. A step costs the terrain of the cell it enters, so
+    distances are not symmetric, but reversing a path from a to b changes
+    its cost by c(a) - c(b) and one field per landmark gives both directions.
+    """
+
+    def __init__(self, walls, terrain, count=DEFAULT_LANDMARKS, seed=0):
+        if count < 1:
+            raise ValueError("landmark count must be at least 1")
+        # Copies, so save checksums the map the fields were worked out on even if it is edited after this
+        self.walls = walls.copy()
+        self.terrain = terrain.copy()
+        self.count = count
+        self.cells = []
+
+        open_cells = np.flatnonzero(~walls)
+        if len(open_cells) == 0:
+            raise ValueError("maze has no open cells")
+        grid = FlatGrid(walls, terrain)
+        rng = np.random.default_rng(seed)
+        probe = divmod(int(open_cells[rng.integers(len(open_cells))]), walls.shape[1])
+
+        # Distance from each open cell to the nearest landmark so far, infinite where none reaches
+        nearest = self.field(grid, probe)
+        fields = []
+        while len(fields) < count:
+            cell = np.unravel_index(int(open_cells[np.argmax(nearest.flat[open_cells])]), walls.shape)
+            if len(fields) and nearest[cell] == 0:
+                # Every open cell is already a landmark
+                break
+            self.cells.append(tuple(int(v) for v in cell))
+            field = self.field(grid, cell)
+            fields.append(field)
+            nearest = field if len(fields) == 1 else np.minimum(nearest, field)
+        self.set_distances(self.compact(fields))
+
+    def field(self, grid, cell):
+        distance, _ = distance_transform(grid, grid.index(cell))
+        return grid.to_array(distance, np.float64)
+
+    def compact(self, fields):
+        fields = np.array(fields)
+        reached = np.isfinite(fields)
+        dtype = np.uint16 if fields[reached].max(initial=0) < np.iinfo(np.uint16).max else np.uint32
+        distances = np.full(fields.shape, np.iinfo(dtype).max, dtype=dtype)
+        distances[reached] = fields[reached]
+        return distances
+
+    def set_distances(self, distances):
+        """Stores (landmarks, height, width) fields padded, with distances as a view of the map cells."""
+        count, height, width = distances.shape
+        self.unreachable = int(np.iinfo(distances.dtype).max)
+        self.padded = np.full((count, height + 2, width + 2), self.unreachable, dtype=distances.dtype)
+        self.padded[:, 1:-1, 1:-1] = distances
+        self.distances = self.padded[:, 1:-1, 1:-1]
+        self.fields = [memoryview(field.ravel()) for field in self.padded]
+
+    def heuristic(self, grid, goal, weight=1.0, start=None):
+        """An index -> estimate function toward a goal index of a 4-connected FlatGrid over this map.
+
+        For a landmark L the triangle inequality gives both
+        d(v, goal) >= d(L, goal) - d(L, v) and d(v, goal) >= d(v, L) - d(goal, L),
+        and the estimate is the largest of these and the Manhattan distance.
+        Given a start index, only the ACTIVE_LANDMARKS landmarks with the
+        best bounds there are used, which keeps each estimate cheap. Like
+        the other heuristics the estimate is admissible and consistent, and
+        weight inflates it for weighted A*.
+        """
+        if grid.diagonal:
+            raise ValueError("landmark distances are for 4-connected moves")
+        if weight < 1:
+            raise ValueError("heuristic weight must be at least 1")
+        stride = grid.stride
+        step_costs = grid.step_costs
+        unreachable = self.unreachable
+        goal_row, goal_col = divmod(goal, stride)
+        goal_cost = step_costs[goal]
+
+        # With d(v, L) = d(L, v) + c(L) - c(v), the second bound is d(L, v) - d(L, goal) + c(goal) - c(v).
+        # Landmarks that do not reach the goal are left out. A cell a landmark does not reach
+        # cannot reach the goal either (reachability is symmetric on the grid), so the huge bound
+        # its unreachable marker gives is still a lower bound.
+        terms = [(field, field[goal], field[goal] - goal_cost) for field in self.fields
+                 if field[goal] != unreachable]
+
+        if start is not None and len(terms) > ACTIVE_LANDMARKS:
+            start_cost = step_costs[start]
+
+            def at_start(term):
+                field, to_goal, shift = term
+                distance = field[start]
+                if distance == unreachable:
+                    return 0
+                return max(to_goal - distance, distance - shift - start_cost)
+            terms = sorted(terms, key=at_start, reverse=True)[:ACTIVE_LANDMARKS]
+
+        def estimate(index):
+            row, col = divmod(index, stride)
+            best = abs(row - goal_row) + abs(col - goal_col)
+            cost = step_costs[index]
+            for field, to_goal, shift in terms:
+                distance = field[index]
+                ahead = to_goal - distance
+                behind = distance - shift - cost
+                if ahead > best:
+                    best = ahead
+                if behind > best:
+                    best = behind
+            return weight * best if weight != 1 else best
+        return estimate
+
+    def save(self, filename):
+        """Writes the landmarks and their fields, with a checksum of the map, as a NumPy .npz archive."""
+        with open(filename, "wb") as f:
+            np.savez(
+                f,
+                version=LANDMARKS_VERSION,
+                shape=self.walls.shape,
+                checksum=map_checksum(self.walls, self.terrain),
+                count=self.count,
+                cells=np.array(self.cells, dtype=np.int32).reshape(-1, 2),
+                distances=self.distances,
+            )
+
+    @classmethod
+    def load(cls, filename, walls, terrain):
+        """Reads landmarks saved for this map; returns None if they were saved for another."""
+        with np.load(filename) as data:
+            if int(data["version"]) != LANDMARKS_VERSION:
+                raise Exception("unsupported landmark table version %d" % int(data["version"]))
+            if tuple(data["shape"]) != walls.shape or int(data["checksum"]) != map_checksum(walls, terrain):
+                return None
+
+            table = cls.__new__(cls)
+            table.walls = walls.copy()
+            table.terrain = terrain.copy()
+            table.count = int(data["count"])
+            table.cells = [tuple(cell) for cell in data["cells"].tolist()]
+            table.set_distances(data["distances"])
+        return table
+
+
+def load_or_build(filename, walls, terrain, count=DEFAULT_LANDMARKS):
+    """Loads the landmarks saved in filename, or picks them (and saves them there) if missing or stale."""
+    if filename and os.path.exists(filename):
+        table = LandmarkTable.load(filename, walls, terrain)
+        if table is not None and table.count == count:
+            return table
+    table = LandmarkTable(walls, terrain, count)
+    if filename:
+        table.save(filename)
+    return table
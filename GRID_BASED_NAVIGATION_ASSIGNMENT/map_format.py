@@ -0,0 +1,252 @@
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Define cost constants
+HIGH_COST = 5
+MEDIUM_COST = 3
+LOW_COST = 1
+
+SPACE = ord(" ")
+START = ord("A")
+GOAL = ord("B")
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+# Terrain characters and the cost of stepping onto them; digits 1-9 give
+# their own value. Any other character is a wall.
+TERRAIN_CHARS = {" ": LOW_COST, "A": LOW_COST, "B": LOW_COST, "~": MEDIUM_COST, "^": HIGH_COST}
+TERRAIN_CHARS.update((str(cost), cost) for cost in range(1, 10))
+
+TERRAIN_SYMBOLS = {MEDIUM_COST: "~", HIGH_COST: "^"}
+
+TERRAIN_TABLE = np.zeros(256, dtype=np.uint8)
+for char, cost in TERRAIN_CHARS.items():
+    TERRAIN_TABLE[ord(char)] = cost
+
+# Text maps are converted this many bytes at a time
+CHUNK_BYTES = 2 ** 24
+
+# Binary map layout: a 64-byte header, the wall plane bit-packed one row at a
+# time (a set bit is a wall), then, if FLAG_COSTS is set, one uint8 step cost
+# per cell. The header holds the first start and goal; maps with more of
+# either list every start and then every goal as uint32 (row, col) pairs
+# after the planes. Each section starts on a 64-byte boundary. Version 1
+# files, which have one start and one goal, read unchanged.
+MAGIC = b"GRIDMAP\n"
+VERSION = 2
+FLAG_COSTS = 1
+HEADER = struct.Struct("<8sIIIIIIIIII")
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+
+def is_binary_map(filename):
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_grid(filename):
+    """Loads a text or binary map as walls, starts, goals and a uint8 terrain cost array.
+
+    starts and goals list every start (A) and goal (B) cell in row-major
+    order; a map needs at least one of each.
+    """
+    if is_binary_map(filename):
+        return load_binary(filename)
+    return load_text(filename)
+
+
+def text_rows(data, starts, lengths, width):
+    """The characters of a band of lines as a (lines, width) uint8 array."""
+    count = len(starts)
+    pitch = int(starts[1] - starts[0]) if count > 1 else width
+
+    # Equal-length lines at an even spacing are just a strided view of the file
+    if (lengths == width).all() and (np.diff(starts) == pitch).all():
+        return np.lib.stride_tricks.as_strided(data[starts[0]:], shape=(count, width), strides=(pitch, 1))
+
+    # Ragged lines: scatter each line's bytes into a block of open space
+    chars = np.full((count, width), SPACE, dtype=np.uint8)
+    rows = np.repeat(np.arange(count), lengths)
+    cols = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    chars[rows, cols] = data[np.repeat(starts, lengths) + cols]
+    return chars
+
+
+def load_text(filename):
+    """Parses a text maze by memory-mapping it and converting CHUNK_BYTES at a time.
+
+    Short rows are padded with open space. Memory use beyond the returned
+    arrays is one chunk plus a few integers per line.
+    """
+    if os.path.getsize(filename) == 0:
+        raise Exception("maze is empty")
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    size = len(data)
+
+    # Find the line breaks a chunk at a time
+    ends = [np.flatnonzero(data[offset:offset + CHUNK_BYTES] == NEWLINE) + offset
+            for offset in range(0, size, CHUNK_BYTES)]
+    ends = np.concatenate(ends)
+    starts = np.concatenate(([0], ends + 1))
+    ends = np.concatenate((ends, [size]))
+    if starts[-1] == size:
+        # A final line break does not start another line
+        starts = starts[:-1]
+        ends = ends[:-1]
+
+    lengths = ends - starts
+    lengths -= (lengths > 0) & (data[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN)
+    height = len(starts)
+    width = int(lengths.max()) if height else 0
+    if height == 0 or width == 0:
+        raise Exception("maze is empty")
+
+    # One table lookup per cell gives the terrain cost, with 0 marking walls
+    terrain = np.empty((height, width), dtype=np.uint8)
+    start_cells = []
+    goal_cells = []
+    band = max(1, CHUNK_BYTES // width)
+    for top in range(0, height, band):
+        chars = text_rows(data, starts[top:top + band], lengths[top:top + band], width)
+        terrain[top:top + band] = TERRAIN_TABLE[chars]
+        start_cells.extend(np.flatnonzero(chars == START) + top * width)
+        goal_cells.extend(np.flatnonzero(chars == GOAL) + top * width)
+
+    # Validate start and goal
+    if not start_cells:
+        raise Exception("maze must have at least one start point")
+    if not goal_cells:
+        raise Exception("maze must have at least one goal")
+
+    # Walls are the only zeros, so this gives them LOW_COST without a masked write
+    walls = terrain == 0
+    np.maximum(terrain, LOW_COST, out=terrain)
+    starts = [tuple(int(v) for v in divmod(int(cell), width)) for cell in start_cells]
+    goals = [tuple(int(v) for v in divmod(int(cell), width)) for cell in goal_cells]
+    return walls, starts, goals, terrain
+
+
+def aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def plane_offsets(height, width, flags=0):
+    """Byte offsets of the wall plane, the cost plane and the endpoint list."""
+    cost_offset = aligned(HEADER_SIZE + height * ((width + 7) // 8))
+    endpoint_offset = aligned(cost_offset + height * width) if flags & FLAG_COSTS else cost_offset
+    return HEADER_SIZE, cost_offset, endpoint_offset
+
+
+def save_binary(filename, walls, starts, goals, terrain=None):
+    """Writes a map in the binary format; the cost plane is left out when every cell costs LOW_COST."""
+    height, width = walls.shape
+    has_costs = terrain is not None and bool((terrain != LOW_COST).any())
+    flags = FLAG_COSTS if has_costs else 0
+    wall_offset, cost_offset, endpoint_offset = plane_offsets(height, width, flags)
+    start = starts[0]
+    goal = goals[0]
+
+    with open(filename, "wb") as f:
+        header = HEADER.pack(MAGIC, VERSION, flags, height, width, start[0], start[1], goal[0], goal[1],
+                             len(starts), len(goals))
+        f.write(header.ljust(wall_offset, b"\0"))
+        band = max(1, CHUNK_BYTES // width)
+        for top in range(0, height, band):
+            f.write(np.packbits(walls[top:top + band], axis=1).tobytes())
+        if has_costs:
+            f.write(b"\0" * (cost_offset - f.tell()))
+            for top in range(0, height, band):
+                f.write(np.ascontiguousarray(terrain[top:top + band], dtype=np.uint8).tobytes())
+        if len(starts) > 1 or len(goals) > 1:
+            f.write(b"\0" * (endpoint_offset - f.tell()))
+            f.write(np.array(list(starts) + list(goals), dtype="<u4").tobytes())
+
+
+def read_header(filename):
+    with open(filename, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        raise Exception("%s is not a binary map" % filename)
+    _, version, flags, height, width, start_row, start_col, goal_row, goal_col, start_count, goal_count = \
+        HEADER.unpack_from(header)
+    if version not in (1, VERSION):
+        raise Exception("unsupported binary map version %d" % version)
+    if version == 1:
+        start_count = goal_count = 1
+    return flags, height, width, (start_row, start_col), (goal_row, goal_col), start_count, goal_count
+
+
+def load_binary(filename):
+    """Maps a binary map file.
+
+    The cost plane is mapped zero-copy (copy-on-write, so edits never reach
+    the file); the wall plane is unpacked to booleans in one vectorized pass.
+    """
+    flags, height, width, start, goal, start_count, goal_count = read_header(filename)
+    wall_offset, cost_offset, endpoint_offset = plane_offsets(height, width, flags)
+
+    packed = np.memmap(filename, dtype=np.uint8, mode="r", offset=wall_offset, shape=(height, (width + 7) // 8))
+    walls = np.unpackbits(packed, axis=1, count=width).view(bool)
+    if flags & FLAG_COSTS:
+        terrain = np.memmap(filename, dtype=np.uint8, mode="c", offset=cost_offset, shape=(height, width))
+    else:
+        terrain = np.full((height, width), LOW_COST, dtype=np.uint8)
+
+    starts = [start]
+    goals = [goal]
+    if start_count > 1 or goal_count > 1:
+        cells = np.fromfile(filename, dtype="<u4", count=2 * (start_count + goal_count), offset=endpoint_offset)
+        cells = [tuple(cell) for cell in cells.reshape(-1, 2).tolist()]
+        starts = cells[:start_count]
+        goals = cells[start_count:]
+
+    for state in starts + goals:
+        if not (state[0] < height and state[1] < width) or walls[state]:
+            raise Exception("start and goal must be open cells of the map")
+    return walls, starts, goals, terrain
+
+
+def convert(args):
+    """Converts a text maze into the binary map format."""
+    walls, starts, goals, terrain = load_text(args.source)
+    save_binary(args.target, walls, starts, goals, terrain)
+    print("%s: %dx%d map, %d bytes" % (args.target, walls.shape[1], walls.shape[0], os.path.getsize(args.target)))
+
+
+def info(args):
+    """Prints the size, endpoints and wall count of a map file."""
+    walls, starts, goals, terrain = load_grid(args.map)
+    print("format:", "binary" if is_binary_map(args.map) else "text")
+    print("size: %dx%d" % (walls.shape[1], walls.shape[0]))
+    print("start:", starts[0])
+    print("goal:", goals[0])
+    if len(starts) > 1 or len(goals) > 1:
+        print("endpoints: %d starts, %d goals" % (len(starts), len(goals)))
+    print("walls:", int(walls.sum()))
+    print("weighted cells:", int((terrain[~walls] != LOW_COST).sum()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maze map file tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help=convert.__doc__)
+    convert_parser.add_argument("source", help="text maze, e.g. maze.txt")
+    convert_parser.add_argument("target", help="binary map to write")
+    convert_parser.set_defaults(run=convert)
+
+    info_parser = subparsers.add_parser("info", help=info.__doc__)
+    info_parser.add_argument("map")
+    info_parser.set_defaults(run=info)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,193 @@
+import argparse
+import random
+import sys
+
+import numpy as np
+
+from map_format import LOW_COST, TERRAIN_SYMBOLS, save_binary
+
+# Cells per side of the rooms in open_rooms, and of the terrain patches in weighted_terrain
+ROOM_SIZE = 16
+PATCH_SIZE = 32
+
+# Text map character for each step cost: symbols for the named costs, digits for the rest
+COST_CHARS = np.array([ord(" ")] * 10, dtype=np.uint8)
+for cost in range(2, 10):
+    COST_CHARS[cost] = ord(TERRAIN_SYMBOLS.get(cost, str(cost)))
+
+
+def open_border(walls):
+    """Clears the top row and the outer columns, so the left and right edges are always connected."""
+    walls[0, :] = False
+    walls[:, 0] = False
+    walls[:, -1] = False
+
+
+def perfect_maze(size, seed=0):
+    """A maze with exactly one path between any two open cells (randomized depth-first search).
+
+    Cells sit on even rows and columns with walls between them, so an even
+    size leaves the last row and column solid. Start and goal are the top
+    left and bottom right cells.
+    """
+    rows = cols = (size + 1) // 2
+    rng = random.Random(seed)
+
+    # Cell (row, col) is visited[(row + 1) * stride + col + 1], with a visited
+    # border all round. The stride is wide enough that the sum of two
+    # neighboring indices still divides into row and column sums, which are
+    # the passage's position in the maze plus 2.
+    stride = 2 * cols + 1
+    visited = bytearray([1]) * (stride * (rows + 2))
+    for row in range(1, rows + 1):
+        visited[row * stride + 1:row * stride + 1 + cols] = bytes(cols)
+
+    # Walk from the first cell, carving into a random unvisited neighbor and backing up at dead ends
+    first = stride + 1
+    visited[first] = 1
+    stack = [first]
+    passages = []
+    choice = rng.choice
+    while stack:
+        cell = stack[-1]
+        options = []
+        if not visited[cell - stride]:
+            options.append(cell - stride)
+        if not visited[cell + stride]:
+            options.append(cell + stride)
+        if not visited[cell - 1]:
+            options.append(cell - 1)
+        if not visited[cell + 1]:
+            options.append(cell + 1)
+        if not options:
+            stack.pop()
+            continue
+        step = choice(options)
+        visited[step] = 1
+        stack.append(step)
+        passages.append(cell + step)
+
+    walls = np.ones((size, size), dtype=bool)
+    walls[0:2 * rows:2, 0:2 * cols:2] = False
+    passage_rows, passage_cols = np.divmod(np.array(passages, dtype=np.intp), stride)
+    walls[passage_rows - 2, passage_cols - 2] = False
+
+    terrain = np.full((size, size), LOW_COST, dtype=np.uint8)
+    return walls, (0, 0), (2 * rows - 2, 2 * cols - 2), terrain
+
+
+def random_obstacles(size, density=0.2, seed=0):
+    """Walls scattered at random with the given density; A and B halfway down the left and right edges."""
+    rng = np.random.default_rng(seed)
+    walls = rng.random((size, size)) < density
+    open_border(walls)
+    terrain = np.full((size, size), LOW_COST, dtype=np.uint8)
+    return walls, (size // 2, 0), (size // 2, size - 1), terrain
+
+
+def open_rooms(size, seed=0, room_size=ROOM_SIZE):
+    """Square rooms of room_size cells joined by doorways 1 to 3 cells wide.
+
+    Every wall between two neighboring rooms has a door, so all rooms are
+    connected. A is in the top left room and B in the bottom right one.
+    """
+    rng = random.Random(seed)
+    period = room_size + 1
+    lines = np.arange(size) % period == room_size
+    walls = np.zeros((size, size), dtype=bool)
+    walls[lines, :] = True
+    walls[:, lines] = True
+
+    # Room spans along one axis, as (first, end) pairs
+    spans = []
+    for first in range(0, size, period):
+        spans.append((first, min(first + room_size, size)))
+    for line in np.flatnonzero(lines).tolist():
+        for first, end in spans:
+            width = min(rng.randint(1, 3), end - first)
+            door = rng.randint(first, end - width)
+            walls[line, door:door + width] = False
+            door = rng.randint(first, end - width)
+            walls[door:door + width, line] = False
+
+    last = size - 1
+    while lines[last]:
+        last -= 1
+    terrain = np.full((size, size), LOW_COST, dtype=np.uint8)
+    return walls, (0, 0), (last, last), terrain
+
+
+def weighted_terrain(size, density=0.1, seed=0, patch_size=PATCH_SIZE):
+    """Random obstacles over patches of terrain costing 1 to 9, in patch_size squares.
+
+    The border is kept free of walls, so a path always exists, but it costs
+    what the patches under it cost. A and B are placed as in random_obstacles.
+    """
+    rng = np.random.default_rng(seed)
+    walls = rng.random((size, size)) < density
+    open_border(walls)
+
+    patches = -(-size // patch_size)
+    costs = rng.integers(LOW_COST, 10, size=(patches, patches), dtype=np.uint8)
+    terrain = np.repeat(np.repeat(costs, patch_size, axis=0), patch_size, axis=1)[:size, :size].copy()
+
+    # A and B cost LOW_COST, as they do in text maps
+    start, goal = (size // 2, 0), (size // 2, size - 1)
+    terrain[start] = LOW_COST
+    terrain[goal] = LOW_COST
+    return walls, start, goal, terrain
+
+
+# Generator name -> function(size, seed); every map is size x size
+GENERATORS = {
+    "perfect": lambda size, seed: perfect_maze(size, seed),
+    "random": lambda size, seed: random_obstacles(size, 0.2, seed),
+    "dense": lambda size, seed: random_obstacles(size, 0.35, seed),
+    "rooms": lambda size, seed: open_rooms(size, seed),
+    "terrain": lambda size, seed: weighted_terrain(size, 0.1, seed),
+}
+
+
+def generate(kind, size, seed=0):
+    """Returns (walls, start, goal, terrain) for one of the GENERATORS."""
+    if kind not in GENERATORS:
+        raise ValueError("unknown maze kind %r, expected one of %s" % (kind, ", ".join(GENERATORS)))
+    if size < 3:
+        raise ValueError("maze size must be at least 3")
+    return GENERATORS[kind](size, seed)
+
+
+def write_text(filename, walls, start, goal, terrain):
+    """Writes a map as text: # for walls, terrain symbols or digits for weighted cells."""
+    height, width = walls.shape
+    chars = np.empty((height, width + 1), dtype=np.uint8)
+    chars[:, :width] = COST_CHARS[terrain]
+    chars[:, :width][walls] = ord("#")
+    chars[:, width] = ord("\n")
+    chars[start] = ord("A")
+    chars[goal] = ord("B")
+    with open(filename, "wb") as f:
+        f.write(chars.tobytes()[:-1])
+
+
+def write_map(filename, walls, start, goal, terrain):
+    """Writes a .txt text map, or a binary map under any other name."""
+    if filename.endswith(".txt"):
+        write_text(filename, walls, start, goal, terrain)
+    else:
+        save_binary(filename, walls, [start], [goal], terrain)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes a seeded, generated maze.")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("size", type=int, help="maze width and height in cells")
+    parser.add_argument("output", help="map to write: text if it ends in .txt, binary otherwise")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    write_map(args.output, *generate(args.kind, args.size, args.seed))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,295 @@
+import time
+import numpy as np
+from flow_field import FlowField
+from heuristics import MAX_HEURISTIC_GOALS, nearest_heuristic
+from hierarchical import DEFAULT_CLUSTER_SIZE, load_or_build
+from instrument import SearchStats, phase
+from jump_point import JumpPointSearch
+from landmarks import DEFAULT_LANDMARKS, load_or_build as load_or_build_landmarks
+from map_format import HIGH_COST, MEDIUM_COST, LOW_COST, TERRAIN_SYMBOLS, load_grid, save_binary
+from movement import MOVEMENTS, check_movement
+from multi_agent import MultiAgentPlanner
+from render import DEFAULT_CELL_SIZE, TILE_SIZE, CostColors, MazeColors, upscale, write_strips, write_tiles
+from search_core import FlatGrid, NoSolution, breadth_first_search, grid_search
+
+
+class GridMaze():
+    """Maze state shared by the A* and Dijkstra front ends.
+
+    Walls are stored as a (height, width) boolean array and terrain as a
+    uint8 array holding the cost of stepping onto each cell. After a solve,
+    explored is a boolean array of the same shape.
+
+    A map may mark several starts and goals; they are kept in starts and
+    goals, and start and goal are the first of each.
+
+    Instrumentation is off (stats is None) until instrument is called.
+    """
+
+    def __init__(self, filename):
+        began = time.perf_counter()
+        walls, starts, goals, terrain = load_grid(filename)
+        self.init_grid(walls, starts[0], goals[0], terrain)
+        self.starts = starts
+        self.goals = goals
+        self.parse_time = time.perf_counter() - began
+
+    @classmethod
+    def from_walls(cls, walls, start, goal, terrain=None):
+        """Builds a maze from an existing wall array instead of a file."""
+        maze = cls.__new__(cls)
+        walls = np.asarray(walls, dtype=bool)
+        if terrain is not None:
+            terrain = np.asarray(terrain, dtype=np.uint8)
+        maze.init_grid(walls, tuple(start), tuple(goal), terrain)
+        return maze
+
+    def init_grid(self, walls, start, goal, terrain=None):
+        self.walls = walls
+        self.terrain = terrain if terrain is not None else np.full(walls.shape, LOW_COST, dtype=np.uint8)
+        self.height, self.width = walls.shape
+        self.start = start
+        self.goal = goal
+        self.starts = [start]
+        self.goals = [goal]
+        self.solution = None
+        self.movement = "4"
+        self.corners = "never"
+        self.grids = {}
+        self.abstraction = None
+        self.landmarks = None
+        self.suboptimality = None
+        self.stats = None
+        self.parse_time = 0.0
+
+    def set_movement(self, movement, corners="never"):
+        """Chooses how solve moves: "4", "8" or "any-angle", with a corner rule for diagonal steps.
+
+        corners is "never" (no diagonal step past a wall corner), "one"
+        (past one wall but not between two) or "always".
+        """
+        check_movement(movement, corners)
+        if (movement, corners) != (self.movement, self.corners):
+            # Only the grids of the moves in use are kept
+            self.grids = {}
+        self.movement = movement
+        self.corners = corners
+
+    def flat_grid(self, diagonal=False, corners="never"):
+        """The FlatGrid of the walls and terrain for one move set, built on first use and kept.
+
+        Flattening the map costs as much as the map is large, so every query
+        on a loaded maze shares one grid instead of building its own.
+        """
+        key = (diagonal, corners if diagonal else "never")
+        grid = self.grids.get(key)
+        if grid is None:
+            grid = self.grids[key] = FlatGrid(self.walls, self.terrain, *key)
+        return grid
+
+    def map_changed(self):
+        """Drops what was worked out from the walls and terrain: cached grids, HPA* abstraction and landmarks.
+
+        Call it after editing either array in place; IncrementalPlanner and
+        FlowField do so themselves.
+        """
+        self.grids = {}
+        self.abstraction = None
+        self.landmarks = None
+
+    def instrument(self, trace=None):
+        """Turns on instrumentation and returns the SearchStats that collects it.
+
+        solve, solve_bfs, solve_jump_points, solve_hierarchical, solve_nearest
+        and assign_costs count their frontier operations, and search,
+        reconstruct and render times add up per phase, with parse set to
+        the time this maze took to load. trace is an optional open text file
+        for the per-pop CSV trace (see instrument.SearchStats).
+        """
+        self.stats = SearchStats(trace)
+        self.stats.phases["parse"] = self.parse_time
+        return self.stats
+
+    def save_map(self, filename):
+        """Writes the walls, endpoints and terrain in the binary map format."""
+        save_binary(filename, self.walls, self.starts, self.goals, self.terrain)
+
+    def store_result(self, result):
+        """Records a search result as num_explored, explored, solution and its cost."""
+        with phase(self.stats, "reconstruct"):
+            self.num_explored = result.num_explored
+            self.explored = result.explored_mask()
+
+            # If the goal was never reached, then there is no path
+            if not result.found:
+                raise NoSolution()
+            self.solution = result.solution()
+            self.solution_cost = result.cost
+
+    def solve_bfs(self):
+        """Finds a path of fewest 4-connected steps by breadth-first search, as dijkstra_algo does.
+
+        Terrain costs are ignored, so the path is optimal only on uniform terrain.
+        """
+        with phase(self.stats, "search"):
+            grid = self.flat_grid()
+            targets = bytearray(grid.size)
+            targets[grid.index(self.goal)] = 1
+            result = breadth_first_search(grid, grid.index(self.start), targets, self.stats)
+        self.store_result(result)
+
+    def solve_jump_points(self, diagonal=False):
+        """Finds an optimal path with Jump Point Search; the terrain must be uniform."""
+        with phase(self.stats, "search"):
+            grid = self.flat_grid(diagonal)
+            result = JumpPointSearch(grid).search(grid.index(self.start), grid.index(self.goal), self.stats)
+        self.store_result(result)
+
+    def solve_hierarchical(self, cluster_size=DEFAULT_CLUSTER_SIZE, filename=None):
+        """Finds a near-optimal 4-connected path with HPA*; see hierarchical.ClusterAbstraction.
+
+        The cluster abstraction is built on the first call, or loaded from
+        filename if that holds one saved for this map, and is kept for later
+        calls. When filename is given, a newly built abstraction is saved there.
+        It holds its own copy of the map, so call map_changed after editing
+        walls or terrain by hand; IncrementalPlanner does so itself.
+        Building it is left out of the search phase, as loading a map is.
+        """
+        if self.abstraction is None or self.abstraction.cluster_size != cluster_size:
+            self.abstraction = load_or_build(filename, self.walls, self.terrain, cluster_size)
+        with phase(self.stats, "search"):
+            result = self.abstraction.search(self.start, self.goal, self.stats)
+        self.store_result(result)
+
+    def prepare_landmarks(self, count=DEFAULT_LANDMARKS, filename=None):
+        """Picks count landmarks for the ALT heuristic, which 4-connected solves then use.
+
+        The landmark table is loaded from filename if that holds one saved
+        for this map, and otherwise built (and saved there when filename is
+        given). See landmarks.LandmarkTable.
+        """
+        if self.landmarks is None or self.landmarks.count != count:
+            self.landmarks = load_or_build_landmarks(filename, self.walls, self.terrain, count)
+        return self.landmarks
+
+    def flow_field(self, goal=None):
+        """Cost-to-goal and next-step field toward goal (self.goal by default) for routing many agents.
+
+        Each agent then follows FlowField.route or next_step instead of
+        running its own search; see flow_field.FlowField. Moves are 4-connected.
+        """
+        if self.movement != "4":
+            raise ValueError("flow fields need 4-connected movement")
+        return FlowField(self, goal)
+
+    def plan_agents(self, starts=None, goals=None, mode="prioritized", budget=None, heuristic="distance"):
+        """Collision-free paths for several agents, the i-th going from starts[i] to goals[i].
+
+        starts and goals default to the map's own starts and goals. mode is
+        "prioritized" or "cbs", and budget an optional time limit in seconds;
+        see multi_agent.MultiAgentPlanner. Moves are 4-connected. Returns a
+        multi_agent.MultiAgentResult.
+        """
+        if self.movement != "4":
+            raise ValueError("multi-agent planning needs 4-connected movement")
+        starts = self.starts if starts is None else [tuple(start) for start in starts]
+        goals = self.goals if goals is None else [tuple(goal) for goal in goals]
+        return MultiAgentPlanner(self, heuristic).plan(starts, goals, mode, budget)
+
+    def solve_nearest(self, starts=None, goals=None, heuristic="auto"):
+        """Finds the cheapest path from any of starts to the nearest of goals in one search.
+
+        Every start enters grid_search's frontier at cost 0 and the search
+        stops at the first goal it expands. starts and goals default to every
+        start and goal of the map. heuristic is a name, None for multi-source
+        Dijkstra, or "auto" for the one matching the movement model, unless
+        there are more than MAX_HEURISTIC_GOALS goals. Afterwards start and
+        goal are the pair the path joins. Any-angle movement is not supported.
+        """
+        if self.movement == "any-angle":
+            raise ValueError("nearest-target search needs 4- or 8-connected movement")
+        starts = self.starts if starts is None else [tuple(start) for start in starts]
+        goals = self.goals if goals is None else [tuple(goal) for goal in goals]
+
+        with phase(self.stats, "search"):
+            grid = self.flat_grid(self.movement == "8", self.corners)
+            sources = [grid.index(start) for start in starts]
+            targets = [grid.index(goal) for goal in goals]
+            if heuristic == "auto":
+                heuristic = MOVEMENTS[self.movement] if len(targets) <= MAX_HEURISTIC_GOALS else None
+            if heuristic is not None:
+                heuristic = nearest_heuristic(heuristic, grid, targets)
+            result = grid_search(grid, sources, targets, heuristic, stats=self.stats)
+
+        if result.found:
+            self.start = grid.state(result.start)
+            self.goal = grid.state(result.goal)
+        self.store_result(result)
+
+    def print_maze(self, file=None):
+        solution = set(self.solution[1]) if self.solution is not None else None
+        starts = set(self.starts) | {self.start}
+        goals = set(self.goals) | {self.goal}
+        terrain = self.terrain.tolist()
+        for i, row in enumerate(self.walls.tolist()):
+            for j, col in enumerate(row):
+                if col:
+                    print("██", end="", file=file)
+                elif (i, j) in starts:
+                    print("A", end="", file=file)
+                elif (i, j) in goals:
+                    print("B", end="", file=file)
+                elif solution is not None and (i, j) in solution:
+                    print("*", end="", file=file)
+                elif terrain[i][j] != LOW_COST:
+                    print(TERRAIN_SYMBOLS.get(terrain[i][j], str(terrain[i][j])), end="", file=file)
+                else:
+                    print(" ", end="", file=file)
+            print(file=file)
+
+    def neighbors(self, state):
+        row, col = state
+        candidates = [
+            ("up", (row - 1, col)),
+            ("down", (row + 1, col)),
+            ("left", (row, col - 1)),
+            ("right", (row, col + 1))
+        ]
+
+        walls = self.walls
+        result = []
+        for action, (r, c) in candidates:
+            if 0 <= r < self.height and 0 <= c < self.width and not walls[r, c]:
+                result.append((action, (r, c), int(self.terrain[r, c])))
+
+        return result
+
+    def cost_colors(self, heatmap=False):
+        """Colors of the cost grid: red for HIGH_COST and green otherwise, or a heatmap."""
+        return CostColors(self.costs, self.walls, heatmap, HIGH_COST)
+
+    def cell_colors(self, show_explored=True):
+        """Colors of the maze, with the solution and explored cells if solved."""
+        starts = [self.start] + self.starts
+        goals = [self.goal] + self.goals
+        if self.solution is None or not show_explored:
+            return MazeColors(self.walls, starts, goals)
+        return MazeColors(self.walls, starts, goals, self.solution[1], self.explored)
+
+    def output_cost_image(self, filename, cell_size=None, heatmap=False):
+        with phase(self.stats, "render"):
+            upscale(self.cost_colors(heatmap)[:, :], cell_size).save(filename)
+
+    def output_image(self, filename, show_explored=True, cell_size=None):
+        with phase(self.stats, "render"):
+            upscale(self.cell_colors(show_explored)[:, :], cell_size).save(filename)
+
+    def output_tiles(self, directory, show_explored=True, cell_size=DEFAULT_CELL_SIZE, tile_size=TILE_SIZE):
+        """Writes the output_image picture as a pyramid of PNG tiles; see render.write_tiles."""
+        with phase(self.stats, "render"):
+            return write_tiles(self.cell_colors(show_explored), directory, cell_size, tile_size=tile_size)
+
+    def output_strip_image(self, filename, show_explored=True, cell_size=DEFAULT_CELL_SIZE):
+        """Writes the output_image picture as one PNG streamed in bands of rows."""
+        with phase(self.stats, "render"):
+            write_strips(self.cell_colors(show_explored), filename, cell_size)
@@ -0,0 +1,184 @@
+import heapq
+import math
+
+from search_core import CORNER_RULES, F_DIGITS, INF, SQRT2, SearchResult
+
+# Movement model -> the heuristic that matches it: exact on an open grid
+MOVEMENTS = {
+    "4": "manhattan",
+    "8": "octile",
+    "any-angle": "euclidean",
+}
+
+
+def check_movement(movement, corners="never"):
+    if movement not in MOVEMENTS:
+        raise ValueError("unknown movement %r, expected one of %s" % (movement, ", ".join(MOVEMENTS)))
+    if corners not in CORNER_RULES:
+        raise ValueError("unknown corner rule %r, expected one of %s" % (corners, ", ".join(CORNER_RULES)))
+
+
+def line_steps(grid, a, b):
+    """Yields (index, row side, column side) for each cell the segment from a to b enters.
+
+    This is Bresenham's walk with integer error terms, extended to report
+    every cell the segment crosses. Where it passes exactly through a corner
+    it steps diagonally, and the two sides are the cells touching that
+    corner; on every other step both sides are -1.
+    """
+    stride = grid.stride
+    row_a, col_a = divmod(a, stride)
+    row_b, col_b = divmod(b, stride)
+    rows = abs(row_b - row_a)
+    cols = abs(col_b - col_a)
+    row_step = stride if row_b > row_a else -stride
+    col_step = 1 if col_b > col_a else -1
+
+    index = a
+    row = col = 0
+    while row < rows or col < cols:
+        # Compare where the segment next crosses a row line and a column line
+        error = (1 + 2 * col) * rows - (1 + 2 * row) * cols
+        if error == 0:
+            yield index + row_step + col_step, index + row_step, index + col_step
+            index += row_step + col_step
+            row += 1
+            col += 1
+            continue
+        if error < 0:
+            index += col_step
+            col += 1
+        else:
+            index += row_step
+            row += 1
+        yield index, -1, -1
+
+
+def line_of_sight(grid, a, b):
+    """Whether the straight segment between two cell centers stays clear of walls.
+
+    The same walk as line_steps, inlined because Theta* calls it for every
+    neighbor. Corners are passed under the grid's corner rule, like diagonal
+    moves.
+    """
+    blocked = grid.blocked
+    corners = grid.corners
+    stride = grid.stride
+    row_a, col_a = divmod(a, stride)
+    row_b, col_b = divmod(b, stride)
+    rows = abs(row_b - row_a)
+    cols = abs(col_b - col_a)
+    row_step = stride if row_b > row_a else -stride
+    col_step = 1 if col_b > col_a else -1
+
+    index = a
+    row = col = 0
+    while row < rows or col < cols:
+        error = (1 + 2 * col) * rows - (1 + 2 * row) * cols
+        if error == 0:
+            row_side = blocked[index + row_step]
+            col_side = blocked[index + col_step]
+            if corners == "never" and (row_side or col_side):
+                return False
+            if corners == "one" and row_side and col_side:
+                return False
+            index += row_step + col_step
+            row += 1
+            col += 1
+        elif error < 0:
+            index += col_step
+            col += 1
+        else:
+            index += row_step
+            row += 1
+        if blocked[index]:
+            return False
+    return True
+
+
+class AnyAngleResult(SearchResult):
+    """Search result whose parent pointers link the turning points of an any-angle path."""
+
+    def waypoints(self):
+        """Indices of the turning points after start, up to and including goal."""
+        return SearchResult.path(self)
+
+    def path(self):
+        # Every cell each straight segment passes through, so the path can be walked step by step
+        indices = []
+        previous = self.start
+        for index in self.waypoints():
+            indices.extend(cell for cell, _, _ in line_steps(self.grid, previous, index))
+            previous = index
+        return indices
+
+
+def distance(grid, a, b):
+    row_a, col_a = divmod(a, grid.stride)
+    row_b, col_b = divmod(b, grid.stride)
+    return math.hypot(row_a - row_b, col_a - col_b)
+
+
+def theta_star(grid, start, goal, heuristic=None, stats=None):
+    """Any-angle A* (Theta*) on a uniform-cost, diagonal FlatGrid.
+
+    Expansion is A* over 8-connected moves, except that a neighbor whose
+    line of sight reaches the expanding cell's parent is linked straight to
+    that parent, at the Euclidean length of the segment. Paths are therefore
+    chains of straight segments between wall corners rather than staircases.
+    """
+    if not grid.diagonal or not grid.uniform_cost:
+        raise ValueError("any-angle search needs a uniform-cost grid with diagonal moves")
+
+    size = grid.size
+    steps = [(move, 1, None) for move in grid.moves]
+    steps += [(move, SQRT2, corner) for move, corner in grid.diagonal_moves]
+    push = heapq.heappush
+    pop = heapq.heappop
+    if stats is not None:
+        stats.begin(grid)
+        push, pop = stats.heap_ops()
+
+    done = bytearray(grid.blocked)
+    g = [INF] * size
+    parent = [-1] * size
+
+    g[start] = 0
+    frontier = [(heuristic(start) if heuristic is not None else 0, 0, start)]
+    num_explored = 0
+    if stats is not None:
+        stats.heap_start(frontier)
+
+    while frontier:
+        _, _, index = pop(frontier)
+        if done[index]:
+            continue
+        done[index] = 1
+        num_explored += 1
+
+        if index == goal:
+            break
+
+        base = g[index]
+        source = parent[index]
+        for move, length, corner in steps:
+            neighbor = index + move
+            if done[neighbor] or (corner is not None and corner[index]):
+                continue
+
+            # Skip this cell and go straight from its parent when nothing is in the way
+            if source >= 0 and line_of_sight(grid, source, neighbor):
+                via = source
+                cost = g[source] + distance(grid, source, neighbor)
+            else:
+                via = index
+                cost = base + length
+            if cost < g[neighbor]:
+                g[neighbor] = cost
+                parent[neighbor] = via
+                h = heuristic(neighbor) if heuristic is not None else 0
+                push(frontier, (round(cost + h, F_DIGITS), -cost, neighbor))
+
+    if stats is not None:
+        stats.finish(num_explored)
+    return AnyAngleResult(grid, start, goal, g, parent, done, num_explored)
@@ -0,0 +1,463 @@
+import heapq
+import time
+
+from heuristics import make_heuristic
+from search_core import INF, FlatGrid
+
+MODES = ("prioritized", "cbs")
+HEURISTICS = ("distance", "manhattan")
+
+# Waiting in place for a tick costs the same as a step onto open ground
+WAIT_COST = 1
+
+# Searches look at the clock once every this many expansions
+CLOCK_INTERVAL = 256
+
+
+class ReverseResumableSearch():
+    """Exact cost to a goal index, worked out only as far as queries need it (Silver's RRA*).
+
+    A backward A* grows from the goal toward origin, the start of the first
+    agent to use it. Asking for a cell's cost resumes the search until that
+    cell is settled, so one agent's space-time search pays for about one
+    ordinary search, and later agents bound for the same goal mostly reuse
+    it. Calling the object gives the cost, so it serves as a heuristic.
+    """
+
+    def __init__(self, grid, goal, origin):
+        self.grid = grid
+        self.manhattan = make_heuristic("manhattan", grid, goal)
+        self.origin = divmod(origin, grid.stride)
+        self.distance = {}
+        self.g = {goal: 0}
+        self.frontier = [(self.estimate(goal), 0, goal)]
+
+    def estimate(self, index):
+        row, col = divmod(index, self.grid.stride)
+        return abs(row - self.origin[0]) + abs(col - self.origin[1])
+
+    def __call__(self, index):
+        cost = self.distance.get(index)
+        if cost is not None:
+            return cost
+        return self.resume(index)
+
+    def bound(self, index):
+        """(estimate, exact): the cost if already settled, else Manhattan distance, without searching."""
+        cost = self.distance.get(index)
+        if cost is not None:
+            return cost, True
+        return self.manhattan(index), False
+
+    def resume(self, target):
+        grid = self.grid
+        blocked = grid.blocked
+        step_costs = grid.step_costs
+        moves = grid.moves
+        stride = grid.stride
+        origin_row, origin_col = self.origin
+        distance = self.distance
+        g = self.g
+        frontier = self.frontier
+        push = heapq.heappush
+        pop = heapq.heappop
+
+        while frontier:
+            _, _, index = pop(frontier)
+            if index in distance:
+                continue
+            base = g[index]
+            distance[index] = base
+
+            # Walking from a neighbor onto this cell costs this cell's step cost
+            cost = base + step_costs[index]
+            for move in moves:
+                neighbor = index + move
+                if blocked[neighbor] or neighbor in distance or cost >= g.get(neighbor, INF):
+                    continue
+                g[neighbor] = cost
+                row, col = divmod(neighbor, stride)
+                push(frontier, (cost + abs(row - origin_row) + abs(col - origin_col), -cost, neighbor))
+            if index == target:
+                return base
+        return INF
+
+
+class ReservationTable():
+    """Cells and moves taken at each tick, stored as hashed integer keys.
+
+    Cell index taken at tick t is the key t * size + index, and a move from
+    a to b between ticks t and t + 1 is (t * size + a) * size + b. Once an
+    agent reaches its goal it stays there, so the goal is parked: taken from
+    the arrival tick on, for good. horizon is the last tick with any
+    reservation; after it the table no longer changes with time.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = set()
+        self.moves = set()
+        self.parked = {}
+        self.latest = {}
+        self.horizon = -1
+
+    def reserve_cell(self, index, tick):
+        self.cells.add(tick * self.size + index)
+        if tick > self.latest.get(index, -1):
+            self.latest[index] = tick
+        if tick > self.horizon:
+            self.horizon = tick
+
+    def reserve_move(self, a, b, tick):
+        self.moves.add((tick * self.size + a) * self.size + b)
+
+    def forbid_move(self, a, b, tick):
+        # move_free checks for the opposite move, which is what a swap would collide with
+        self.reserve_move(b, a, tick)
+
+    def reserve_path(self, path):
+        """Reserves a path of one index per tick, parking its last cell."""
+        for tick, index in enumerate(path):
+            self.reserve_cell(index, tick)
+            if tick and path[tick - 1] != index:
+                self.reserve_move(path[tick - 1], index, tick - 1)
+        self.parked[path[-1]] = len(path) - 1
+
+    def cell_free(self, index, tick):
+        return tick * self.size + index not in self.cells and self.parked.get(index, INF) > tick
+
+    def move_free(self, a, b, tick):
+        """Whether moving from a to b between tick and tick + 1 avoids swapping with a reserved move."""
+        return (tick * self.size + b) * self.size + a not in self.moves
+
+    def can_park(self, index, tick):
+        """Whether an agent at index from tick on could stay there for good."""
+        return index not in self.parked and self.latest.get(index, -1) < tick
+
+
+def space_time_search(grid, start, goal, table, blocked, heuristic, deadline=None, bound=None):
+    """A* over (cell, tick) pairs that avoids the reservations in table.
+
+    Each tick an agent moves to a 4-connected neighbor, paying its step cost,
+    or waits, paying WAIT_COST. The search ends at the goal once the agent
+    can park there. Past the table's horizon nothing changes with time, so
+    those ticks share one set of states and the search is finite. Returns
+    (path, num_explored) where path has one index per tick from start, or is
+    None if there is no path or the deadline passed.
+
+    bound optionally gives a cheap (estimate, exact) lower bound of the
+    heuristic. States are queued with it and only get the heuristic when
+    they come off the queue, going back on if it raises their estimate, and
+    among equal estimates exact ones go first. States that are never
+    reached never pay for the heuristic.
+    """
+    size = grid.size
+    step_costs = grid.step_costs
+    steps = [(move, None) for move in grid.moves] + [(0, WAIT_COST)]
+    push = heapq.heappush
+    pop = heapq.heappop
+    static = table.horizon + 1
+
+    if blocked[start] or not table.cell_free(start, 0) or goal in table.parked:
+        return None, 0
+    # Every tick costs at least 1, so an agent pays at least until the tick it can park
+    park = table.latest.get(goal, -1) + 1
+    g = {start: 0}
+    parent = {}
+    done = set()
+    frontier = [(max(heuristic(start), park), 0, False, 0, start)]
+    num_explored = 0
+
+    while frontier:
+        f, _, guessed, tick, index = pop(frontier)
+        key = min(tick, static) * size + index
+        if key in done:
+            continue
+        if guessed:
+            h = heuristic(index)
+            if h == INF:
+                continue
+            h = max(h, park - tick)
+            if g[key] + h > f:
+                push(frontier, (g[key] + h, -g[key], False, tick, index))
+                continue
+        done.add(key)
+        num_explored += 1
+        if deadline is not None and num_explored % CLOCK_INTERVAL == 0 and time.perf_counter() > deadline:
+            return None, num_explored
+
+        if index == goal and table.can_park(goal, tick):
+            path = [index]
+            while key in parent:
+                key = parent[key]
+                path.append(key % size)
+            path.reverse()
+            return path, num_explored
+
+        base = g[key]
+        for move, cost in steps:
+            neighbor = index + move
+            if blocked[neighbor]:
+                continue
+            if cost is None:
+                cost = step_costs[neighbor]
+                if not table.move_free(index, neighbor, tick):
+                    continue
+            elif tick >= static:
+                # Waiting gains nothing once the table stops changing
+                continue
+            if not table.cell_free(neighbor, tick + 1):
+                continue
+            child = min(tick + 1, static) * size + neighbor
+            if child in done or base + cost >= g.get(child, INF):
+                continue
+            if bound is None:
+                h, exact = heuristic(neighbor), True
+            else:
+                h, exact = bound(neighbor)
+            if h == INF:
+                continue
+            h = max(h, park - tick - 1)
+            g[child] = base + cost
+            parent[child] = key
+            push(frontier, (base + cost + h, -(base + cost), not exact, tick + 1, neighbor))
+
+    return None, num_explored
+
+
+def path_cost(grid, path):
+    """Cost of a path of one index per tick: step costs for moves, WAIT_COST for waits."""
+    return sum(WAIT_COST if a == b else grid.step_costs[b] for a, b in zip(path, path[1:]))
+
+
+def first_conflict(paths):
+    """The earliest collision between paths of one index per tick, or None.
+
+    Agents stay on their last cell. A collision is ("cell", tick, i, j, index)
+    when agents i and j share a cell at tick, or ("move", tick, i, j, a, b)
+    when agent i moves from a to b between tick and tick + 1 while j moves
+    from b to a.
+    """
+    live = [i for i, path in enumerate(paths) if path is not None]
+    length = max((len(paths[i]) for i in live), default=0)
+    for tick in range(length):
+        seen = {}
+        for i in live:
+            index = paths[i][min(tick, len(paths[i]) - 1)]
+            if index in seen:
+                return ("cell", tick, seen[index], i, index)
+            seen[index] = i
+        if tick + 1 == length:
+            break
+        moving = {}
+        for i in live:
+            path = paths[i]
+            a = path[min(tick, len(path) - 1)]
+            b = path[min(tick + 1, len(path) - 1)]
+            if a != b:
+                if (b, a) in moving:
+                    return ("move", tick, moving[(b, a)], i, b, a)
+                moving[(a, b)] = i
+    return None
+
+
+class MultiAgentResult():
+    """Collision-free paths for a group of agents, with one (row, col) per tick.
+
+    Every agent's path starts at its start; agents stay on their last cell.
+    failed lists the agents left without a path, and deferred those the
+    time budget ran out before; both stay at their start and the other
+    paths keep clear of them. optimal is True when conflict-based search
+    proved the sum of costs minimal.
+    """
+
+    def __init__(self, grid, mode, paths, failed, deferred, num_explored, optimal=False):
+        self.grid = grid
+        self.mode = mode
+        self.failed = failed
+        self.deferred = deferred
+        self.num_explored = num_explored
+        self.optimal = optimal
+        self.costs = [path_cost(grid, path) for path in paths]
+        self.paths = [[grid.state(index) for index in path] for path in paths]
+
+    @property
+    def sum_of_costs(self):
+        return sum(self.costs)
+
+    @property
+    def makespan(self):
+        return max((len(path) - 1 for path in self.paths), default=0)
+
+
+class MultiAgentPlanner():
+    """Plans collision-free paths for many agents on a Maze grid.
+
+    Prioritized planning plans agents one at a time, longest trip first,
+    each with space_time_search against a ReservationTable of the paths
+    planned before it. It is fast but incomplete: an agent can be boxed in
+    by earlier ones. Conflict-based search (mode "cbs") finds paths with
+    the least sum of costs by splitting on each collision, which grows
+    quickly with the number of agents; it is meant for small groups, and
+    falls back to prioritized planning if the budget runs out.
+
+    Agents not planned yet hold their start cell, so a plan cut short by the
+    budget is still collision-free, with the rest waiting for a later tick.
+    The planner keeps its per-goal heuristic searches, so planning those on
+    the same planner reuses the work already done.
+    """
+
+    def __init__(self, maze, heuristic="distance"):
+        if heuristic not in HEURISTICS:
+            raise ValueError("unknown heuristic %r, expected one of %s" % (heuristic, ", ".join(HEURISTICS)))
+        self.grid = FlatGrid(maze.walls, maze.terrain)
+        self.heuristic = heuristic
+        self.searches = {}
+
+    def goal_heuristic(self, start, goal):
+        """(heuristic, bound) for space_time_search toward goal.
+
+        The heuristic is the exact cost-to-goal of a ReverseResumableSearch
+        kept per goal, with Manhattan distance behind its cheap bound; space-time
+        search with Manhattan distance alone re-expands the same cells at
+        many ticks whenever the way is not straight.
+        """
+        if self.heuristic == "manhattan":
+            return make_heuristic("manhattan", self.grid, goal), None
+        if goal not in self.searches:
+            self.searches[goal] = ReverseResumableSearch(self.grid, goal, start)
+        search = self.searches[goal]
+        return search, search.bound
+
+    def check_agents(self, starts, goals):
+        if len(starts) != len(goals):
+            raise ValueError("expected one goal per agent, got %d starts and %d goals" % (len(starts), len(goals)))
+        for cells, name in ((starts, "start"), (goals, "goal")):
+            if len(set(cells)) != len(cells):
+                raise ValueError("two agents share a %s" % name)
+            for index in cells:
+                if self.grid.blocked[index]:
+                    raise ValueError("%s %r is a wall" % (name, self.grid.state(index)))
+
+    def plan(self, starts, goals, mode="prioritized", budget=None):
+        """Plans every agent from its start to its goal cell; returns a MultiAgentResult.
+
+        budget is an optional limit in seconds for the whole call.
+        """
+        if mode not in MODES:
+            raise ValueError("unknown mode %r, expected one of %s" % (mode, ", ".join(MODES)))
+        grid = self.grid
+        starts = [grid.index(start) for start in starts]
+        goals = [grid.index(goal) for goal in goals]
+        self.check_agents(starts, goals)
+        deadline = time.perf_counter() + budget if budget is not None else None
+        heuristics = [self.goal_heuristic(start, goal) for start, goal in zip(starts, goals)]
+
+        if mode == "cbs":
+            result = self.conflict_based_search(starts, goals, heuristics, deadline)
+            if result is not None:
+                return result
+        return self.prioritized(starts, goals, heuristics, deadline)
+
+    def prioritized(self, starts, goals, heuristics, deadline):
+        grid = self.grid
+        table = ReservationTable(grid.size)
+        blocked = bytearray(grid.blocked)
+        for start in starts:
+            blocked[start] = 1
+
+        def trip(agent):
+            row, col = grid.state(starts[agent])
+            goal_row, goal_col = grid.state(goals[agent])
+            return -(abs(row - goal_row) + abs(col - goal_col)), agent
+
+        paths = [[start] for start in starts]
+        failed = []
+        deferred = []
+        num_explored = 0
+        for agent in sorted(range(len(starts)), key=trip):
+            if deadline is not None and time.perf_counter() > deadline:
+                deferred.append(agent)
+                continue
+            start = starts[agent]
+            blocked[start] = grid.blocked[start]
+            heuristic, bound = heuristics[agent]
+            path, explored = space_time_search(grid, start, goals[agent], table, blocked, heuristic, deadline, bound)
+            num_explored += explored
+            if path is None:
+                # Stay put, as an obstacle to everyone planned after
+                blocked[start] = 1
+                if deadline is not None and time.perf_counter() > deadline:
+                    deferred.append(agent)
+                else:
+                    failed.append(agent)
+                continue
+            table.reserve_path(path)
+            paths[agent] = path
+        return MultiAgentResult(grid, "prioritized", paths, sorted(failed), sorted(deferred), num_explored)
+
+    def constrained_path(self, agent, constraints, starts, goals, heuristics, deadline):
+        """Space-time search for one agent under its CBS constraints."""
+        table = ReservationTable(self.grid.size)
+        for constraint in constraints:
+            if constraint[0] == "cell":
+                _, tick, index = constraint
+                table.reserve_cell(index, tick)
+            else:
+                _, tick, a, b = constraint
+                table.forbid_move(a, b, tick)
+        heuristic, bound = heuristics[agent]
+        return space_time_search(self.grid, starts[agent], goals[agent], table, self.grid.blocked,
+                                 heuristic, deadline, bound)
+
+    def conflict_based_search(self, starts, goals, heuristics, deadline):
+        """Conflict-based search on the sum of costs; returns None if the deadline passes first.
+
+        Each node holds a constraint list per agent and one path per agent
+        that obeys it. The cheapest node is split on its first collision
+        into two children, each forbidding the collision to one of the two
+        agents and replanning only that agent.
+        """
+        grid = self.grid
+        count = len(starts)
+        constraints = [() for _ in range(count)]
+        paths = []
+        num_explored = 0
+        for agent in range(count):
+            path, explored = self.constrained_path(agent, (), starts, goals, heuristics, deadline)
+            num_explored += explored
+            if path is None:
+                return None
+            paths.append(path)
+
+        tie = 0
+        open_nodes = [(sum(path_cost(grid, path) for path in paths), tie, constraints, paths)]
+        while open_nodes:
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            _, _, constraints, paths = heapq.heappop(open_nodes)
+            conflict = first_conflict(paths)
+            if conflict is None:
+                return MultiAgentResult(grid, "cbs", paths, [], [], num_explored, optimal=True)
+
+            if conflict[0] == "cell":
+                _, tick, i, j, index = conflict
+                splits = [(i, ("cell", tick, index)), (j, ("cell", tick, index))]
+            else:
+                _, tick, i, j, a, b = conflict
+                splits = [(i, ("move", tick, a, b)), (j, ("move", tick, b, a))]
+
+            for agent, constraint in splits:
+                child_constraints = list(constraints)
+                child_constraints[agent] = constraints[agent] + (constraint,)
+                path, explored = self.constrained_path(agent, child_constraints[agent], starts, goals,
+                                                       heuristics, deadline)
+                num_explored += explored
+                if path is None:
+                    continue
+                child_paths = list(paths)
+                child_paths[agent] = path
+                tie += 1
+                heapq.heappush(open_nodes, (sum(path_cost(grid, p) for p in child_paths), tie,
+                                            child_constraints, child_paths))
+        return None
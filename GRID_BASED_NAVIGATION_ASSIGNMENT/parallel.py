@@ -0,0 +1,112 @@
+import argparse
+import os
+import tempfile
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import planner
+from anytime import INITIAL_WEIGHT
+from hierarchical import DEFAULT_CLUSTER_SIZE, load_or_build
+from landmarks import DEFAULT_LANDMARKS
+
+# State of each worker process, set once by attach
+worker = {}
+
+
+class SharedMaze():
+    """A maze's walls and terrain copied once into shared memory blocks.
+
+    Workers map the blocks by name instead of receiving pickled arrays, so
+    starting a pool costs the same however large the map is. Use it as a
+    context manager; the blocks are unlinked on exit.
+    """
+
+    def __init__(self, maze):
+        self.blocks = []
+        self.spec = {"start": maze.start, "goal": maze.goal}
+        for name, array in (("walls", maze.walls), ("terrain", maze.terrain)):
+            block = SharedMemory(create=True, size=max(1, array.nbytes))
+            self.blocks.append(block)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(spec, solver, options):
+    """Pool initializer: maps the shared blocks and builds this worker's maze and grid around them."""
+    arrays = {}
+    for name in ("walls", "terrain"):
+        block_name, shape, dtype = spec[name]
+        block = SharedMemory(name=block_name)
+        worker.setdefault("blocks", []).append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    maze_class, solve = planner.SOLVERS[solver]
+    maze = maze_class.from_walls(arrays["walls"], spec["start"], spec["goal"], arrays["terrain"])
+    worker["maze"] = planner.prepare_maze(maze)
+    planner.prepare_grid(worker["maze"], options)
+    worker["solve"] = solve
+    worker["options"] = options
+
+
+def save_preprocessing(maze, solver, options, directory):
+    """Saves the HPA* abstraction or landmark table the workers need into directory, unless options name a file.
+
+    It is taken from maze, or built there once, and the workers load the
+    file instead of each building their own.
+    """
+    if solver == "hpa" and options.abstraction is None:
+        if maze.abstraction is None or maze.abstraction.cluster_size != options.cluster_size:
+            maze.abstraction = load_or_build(None, maze.walls, maze.terrain, options.cluster_size)
+        options.abstraction = os.path.join(directory, "abstraction.npz")
+        maze.abstraction.save(options.abstraction)
+    if solver in ("astar", "anytime") and options.heuristic == "landmarks" and options.landmark_file is None:
+        options.landmark_file = os.path.join(directory, "landmarks.npz")
+        maze.prepare_landmarks(options.landmarks).save(options.landmark_file)
+
+
+def plan_query(query):
+    start, goal = query
+    return planner.plan(worker["maze"], worker["solve"], worker["options"], tuple(start), tuple(goal))
+
+
+def plan_batch(maze, queries, solver="astar", processes=None, chunk_size=None, heuristic="auto",
+               weight=1.0, diagonal=False, movement="4", corners="never", cluster_size=DEFAULT_CLUSTER_SIZE,
+               abstraction=None, landmarks=DEFAULT_LANDMARKS, landmark_file=None, initial_weight=INITIAL_WEIGHT,
+               deadline=1.0, no_path=False):
+    """Plans (start, goal) queries on a pool of processes; returns the planner.plan results in order.
+
+    The map goes into shared memory once and every worker keeps its own
+    maze around it, so only queries and results cross process boundaries.
+    Queries are handed out in chunks of chunk_size (by default about four
+    chunks per process) to keep the workers evenly loaded. HPA* workers load
+    the abstraction file if one is given, and A* workers the landmark file
+    for heuristic="landmarks"; otherwise the parent saves its own to a
+    temporary file for them (see save_preprocessing).
+    """
+    queries = list(queries)
+    processes = processes or os.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, len(queries) // (4 * processes))
+    options = argparse.Namespace(solver=solver, heuristic=heuristic, weight=weight, diagonal=diagonal,
+                                 movement=movement, corners=corners, cluster_size=cluster_size,
+                                 abstraction=abstraction, landmarks=landmarks, landmark_file=landmark_file,
+                                 initial_weight=initial_weight, deadline=deadline, no_path=no_path)
+
+    with tempfile.TemporaryDirectory() as directory, SharedMaze(maze) as shared:
+        save_preprocessing(maze, solver, options, directory)
+        with Pool(processes, initializer=attach, initargs=(shared.spec, solver, options)) as pool:
+            return pool.map(plan_query, queries, chunk_size)
@@ -0,0 +1,315 @@
+import argparse
+import json
+import sys
+import time
+
+import A_star_algo
+import dijkstra_maze
+import parallel
+from anytime import INITIAL_WEIGHT, NoPathInTime
+from heuristics import HEURISTICS
+from hierarchical import DEFAULT_CLUSTER_SIZE, load_or_build
+from landmarks import DEFAULT_LANDMARKS
+from movement import MOVEMENTS
+from search_core import CORNER_RULES, NoSolution
+
+
+def solve_astar(maze, args):
+    maze.set_movement(args.movement, args.corners)
+    if args.heuristic == "landmarks":
+        maze.prepare_landmarks(args.landmarks, args.landmark_file)
+    maze.solve(args.heuristic, args.weight, True if args.diagonal else None)
+
+
+def solve_anytime(maze, args):
+    maze.set_movement(args.movement, args.corners)
+    if args.heuristic == "landmarks":
+        maze.prepare_landmarks(args.landmarks, args.landmark_file)
+    maze.solve_anytime(args.deadline, args.initial_weight, args.heuristic, True if args.diagonal else None)
+
+
+def solve_dijkstra(maze, args):
+    maze.solve()
+
+
+def solve_bidirectional(maze, args):
+    # Plain bidirectional Dijkstra unless a heuristic is named
+    maze.solve(True, None if args.heuristic == "auto" else args.heuristic)
+
+
+def solve_bfs(maze, args):
+    maze.solve_bfs()
+
+
+def solve_jump_points(maze, args):
+    maze.solve_jump_points(args.diagonal)
+
+
+def solve_hierarchical(maze, args):
+    maze.solve_hierarchical(args.cluster_size, args.abstraction)
+
+
+# Solver name -> (Maze class, solve function)
+SOLVERS = {
+    "astar": (A_star_algo.Maze, solve_astar),
+    "anytime": (A_star_algo.Maze, solve_anytime),
+    "dijkstra": (dijkstra_maze.Maze, solve_dijkstra),
+    "bidirectional": (dijkstra_maze.Maze, solve_bidirectional),
+    "bfs": (A_star_algo.Maze, solve_bfs),
+    "jps": (A_star_algo.Maze, solve_jump_points),
+    "hpa": (A_star_algo.Maze, solve_hierarchical),
+}
+
+
+def prepare_maze(maze):
+    """The Dijkstra front end searches its cost grid, which is filled in once per map."""
+    if isinstance(maze, dijkstra_maze.Maze):
+        maze.assign_costs()
+    return maze
+
+
+def prepare_grid(maze, args):
+    """Builds the FlatGrid the solver's queries search, so loading pays for it rather than the first query."""
+    if args.solver == "hpa":
+        # HPA* searches the small grids of its clusters instead
+        return
+    diagonal = args.diagonal if args.solver in ("astar", "anytime", "jps") else False
+    corners = "never"
+    if args.solver in ("astar", "anytime"):
+        maze.set_movement(args.movement, args.corners)
+        diagonal = diagonal or args.movement != "4"
+        corners = args.corners
+    maze.flat_grid(diagonal, corners)
+
+
+def load_maze(filename, solver):
+    """Loads the map once for a whole batch of queries."""
+    maze_class, _ = SOLVERS[solver]
+    return prepare_maze(maze_class(filename))
+
+
+def parse_query(line, number):
+    """Reads "start_row start_col goal_row goal_col" (spaces or commas) or a JSON object."""
+    if line.startswith("{"):
+        query = json.loads(line)
+        return tuple(query["start"]), tuple(query["goal"])
+    values = line.replace(",", " ").split()
+    if len(values) != 4:
+        raise ValueError("line %d: expected start_row start_col goal_row goal_col" % number)
+    start_row, start_col, goal_row, goal_col = (int(value) for value in values)
+    return (start_row, start_col), (goal_row, goal_col)
+
+
+def read_queries(stream):
+    """Yields (start, goal) pairs, skipping blank lines and # comments."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield parse_query(line, number)
+
+
+def check_options(args):
+    """Returns why the solver cannot run with these options, or None if it can."""
+    if args.heuristic not in ("auto", None, "landmarks") and args.heuristic not in HEURISTICS:
+        return "unknown heuristic %r" % args.heuristic
+    if args.heuristic == "landmarks":
+        if args.solver not in ("astar", "anytime"):
+            return "--heuristic landmarks needs --solver astar or anytime"
+        if args.movement != "4" or args.diagonal:
+            return "--heuristic landmarks needs 4-connected movement"
+    if args.solver == "anytime":
+        if args.heuristic is None:
+            return "--solver anytime needs a heuristic"
+        if args.movement == "any-angle" and not args.diagonal:
+            return "--solver anytime does not support any-angle movement"
+    if args.weight < 1 or args.initial_weight < 1:
+        return "--weight and --initial-weight must be at least 1"
+    return None
+
+
+def check_map(maze, args):
+    """Returns why the solver cannot run on the loaded map, or None if it can."""
+    any_angle = args.solver == "astar" and args.movement == "any-angle" and not args.diagonal
+    if (args.solver in ("bfs", "jps") or any_angle) and not maze.flat_grid().uniform_cost:
+        return "%s needs a map of uniform terrain" % ("any-angle movement" if any_angle else "--solver " + args.solver)
+    return None
+
+
+def check_cell(maze, state):
+    row, col = state
+    if not (0 <= row < maze.height and 0 <= col < maze.width) or maze.walls[row, col]:
+        raise ValueError("%r is not an open cell of the maze" % (state,))
+
+
+def plan(maze, solve, args, start, goal):
+    """Runs one query on the loaded maze and returns its result as a dict."""
+    result = {"start": list(start), "goal": list(goal)}
+    try:
+        check_cell(maze, start)
+        check_cell(maze, goal)
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+
+    maze.start = start
+    maze.goal = goal
+    maze.solution = None
+    maze.suboptimality = None
+    began = time.perf_counter()
+    try:
+        solve(maze, args)
+        found = True
+    except NoPathInTime as e:
+        result["error"] = str(e)
+        found = False
+    except NoSolution:
+        found = False
+    except ValueError as e:
+        # Options main could not rule out for the whole batch fail only this query
+        result["error"] = str(e)
+        return result
+    result["time"] = time.perf_counter() - began
+    result["found"] = found
+    result["num_explored"] = maze.num_explored
+    if maze.suboptimality is not None:
+        result["bound"] = maze.suboptimality
+
+    if found:
+        cost = maze.solution_cost
+        result["cost"] = cost if isinstance(cost, int) else float(cost)
+        if not args.no_path:
+            actions, cells = maze.solution
+            result["path"] = [list(start)] + [[int(row), int(col)] for row, col in cells]
+            result["actions"] = actions
+            if maze.movement == "any-angle":
+                result["waypoints"] = [[int(row), int(col)] for row, col in maze.waypoints]
+    else:
+        result["cost"] = None
+    return result
+
+
+def run_batch(maze, solve, args, queries, output):
+    """Plans every query, writing each result as it completes; returns (count, search seconds)."""
+    count = 0
+    search_time = 0
+    for index, (start, goal) in enumerate(queries):
+        result = {"index": index}
+        result.update(plan(maze, solve, args, start, goal))
+        output.write(json.dumps(result) + "\n")
+        count += 1
+        search_time += result.get("time", 0)
+
+        # Printing and images are opt-in so they never slow a plain batch down
+        if "error" in result:
+            continue
+        if args.print:
+            maze.print_maze(sys.stderr)
+        if args.image:
+            maze.output_image(args.image.format(index=index), show_explored=True)
+    return count, search_time
+
+
+def run_parallel(maze, args, queries, output):
+    """Plans the whole batch on a process pool, then writes the results in query order."""
+    results = parallel.plan_batch(maze, queries, args.solver, args.processes, heuristic=args.heuristic,
+                                  weight=args.weight, diagonal=args.diagonal, movement=args.movement,
+                                  corners=args.corners, cluster_size=args.cluster_size,
+                                  abstraction=args.abstraction, landmarks=args.landmarks,
+                                  landmark_file=args.landmark_file, initial_weight=args.initial_weight,
+                                  deadline=args.deadline, no_path=args.no_path)
+    for index, result in enumerate(results):
+        output.write(json.dumps(dict(index=index, **result)) + "\n")
+    return len(results), sum(result.get("time", 0) for result in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Plans a batch of start/goal queries on one map and writes one JSON result per line."
+    )
+    parser.add_argument("map", help="text or binary map file")
+    parser.add_argument("--queries", help="query file, one \"start_row start_col goal_row goal_col\" per line; "
+                                          "- reads stdin; default is the map's own A and B")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="astar")
+    parser.add_argument("--heuristic", default="auto",
+                        help="manhattan, octile, euclidean, auto or none (astar and bidirectional), "
+                             "or landmarks for ALT (astar)")
+    parser.add_argument("--weight", type=float, default=1.0, help="weighted A* factor (astar)")
+    parser.add_argument("--initial-weight", type=float, default=INITIAL_WEIGHT,
+                        help="weighted A* factor of the first path (anytime)")
+    parser.add_argument("--deadline", type=float, default=1.0,
+                        help="time limit in seconds per query; the best path by then is kept (anytime)")
+    parser.add_argument("--diagonal", action="store_true", help="allow diagonal moves (astar and jps)")
+    parser.add_argument("--movement", choices=sorted(MOVEMENTS), default="4", help="movement model (astar)")
+    parser.add_argument("--corners", choices=CORNER_RULES, default="never",
+                        help="when diagonal moves may pass a wall corner (astar)")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE, help="HPA* cluster size (hpa)")
+    parser.add_argument("--abstraction", help="load the HPA* abstraction from this file, or build and save it "
+                                              "there (hpa)")
+    parser.add_argument("--landmarks", type=int, default=DEFAULT_LANDMARKS,
+                        help="landmark count for --heuristic landmarks (astar)")
+    parser.add_argument("--landmark-file", help="load the landmark table from this file, or build and save it "
+                                                "there (astar)")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--no-path", action="store_true", help="leave paths out of the results")
+    parser.add_argument("--print", action="store_true", help="print each solved maze to stderr")
+    parser.add_argument("--image", help="write each solution image to this pattern, e.g. solution_{index}.png")
+    parser.add_argument("--summary", action="store_true", help="print query count and timings to stderr")
+    parser.add_argument("--stats", help="write frontier counters and phase timings to this JSON file")
+    parser.add_argument("--trace", help="write every frontier pop to this CSV file (slow; for profiling)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="plan on this many worker processes sharing the map")
+    args = parser.parse_args(argv)
+
+    if args.heuristic == "none":
+        args.heuristic = None
+    if args.processes > 1 and (args.print or args.image or args.stats or args.trace):
+        parser.error("--print, --image, --stats and --trace need --processes 1")
+    problem = check_options(args)
+    if problem:
+        parser.error(problem)
+
+    began = time.perf_counter()
+    maze = load_maze(args.map, args.solver)
+    problem = check_map(maze, args)
+    if problem:
+        parser.error(problem)
+    prepare_grid(maze, args)
+    if args.solver == "hpa":
+        # Preprocessing counts as loading, and a saved abstraction is ready for the workers
+        maze.abstraction = load_or_build(args.abstraction, maze.walls, maze.terrain, args.cluster_size)
+    if args.solver in ("astar", "anytime") and args.heuristic == "landmarks":
+        maze.prepare_landmarks(args.landmarks, args.landmark_file)
+    load_time = time.perf_counter() - began
+    _, solve = SOLVERS[args.solver]
+
+    if args.queries is None:
+        queries = [(maze.start, maze.goal)]
+    elif args.queries == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.queries) as f:
+            queries = list(read_queries(f))
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    trace = open(args.trace, "w") if args.trace else None
+    if args.stats or trace:
+        maze.instrument(trace)
+    try:
+        if args.processes > 1:
+            count, search_time = run_parallel(maze, args, queries, output)
+        else:
+            count, search_time = run_batch(maze, solve, args, queries, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if trace:
+            trace.close()
+    if args.stats:
+        maze.stats.write_json(args.stats)
+
+    if args.summary:
+        print("%d queries, load %.4f s, search %.4f s" % (count, load_time, search_time), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
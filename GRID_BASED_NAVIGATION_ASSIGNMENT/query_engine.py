@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from map_format import load_grid
+from distance_transform import distance_transform
+from search_core import FlatGrid
+
+DEFAULT_MEMORY_LIMIT = 256 * 2 ** 20
+
+
+class MazeQueryEngine():
+    """Answers many (start, goal) queries on one static map.
+
+    Each query source gets a full single-source distance field and parent
+    tree, stored as compact float32/int32 arrays. Fields are kept in an LRU
+    cache capped at memory_limit bytes, so any later query that starts (or,
+    by reversing the path, ends) at a cached source is answered by walking
+    parent pointers in O(path length).
+    """
+
+    def __init__(self, filename, memory_limit=DEFAULT_MEMORY_LIMIT):
+        walls, starts, goals, terrain = load_grid(filename)
+        self.init_engine(walls, terrain, memory_limit)
+        self.start = starts[0]
+        self.goal = goals[0]
+
+    @classmethod
+    def from_maze(cls, maze, costs=None, memory_limit=DEFAULT_MEMORY_LIMIT):
+        """Builds an engine over an already loaded Maze, by default with its terrain costs."""
+        engine = cls.__new__(cls)
+        engine.init_engine(maze.walls, maze.terrain if costs is None else costs, memory_limit)
+        engine.start = maze.start
+        engine.goal = maze.goal
+        return engine
+
+    def init_engine(self, walls, costs, memory_limit):
+        self.walls = walls
+        self.grid = FlatGrid(walls, costs)
+        self.memory_limit = memory_limit
+        self.fields = OrderedDict()
+        self.cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def check_cell(self, state):
+        row, col = state
+        if not (0 <= row < self.grid.height and 0 <= col < self.grid.width) or self.walls[row, col]:
+            raise ValueError("%r is not an open cell of the maze" % (state,))
+
+    def field(self, source):
+        """Returns the cached (distance, parent) arrays for source, computing them if needed."""
+        self.check_cell(source)
+        entry = self.fields.get(source)
+        if entry is not None:
+            self.fields.move_to_end(source)
+            return entry
+
+        distance, parent = distance_transform(self.grid, self.grid.index(source))
+        entry = (np.array(distance, dtype=np.float32), np.array(parent, dtype=np.int32))
+        self.store(source, entry)
+        return entry
+
+    def store(self, source, entry):
+        size = entry[0].nbytes + entry[1].nbytes
+        if size > self.memory_limit:
+            return
+
+        # Evict least recently used fields until the new one fits under the cap
+        while self.fields and self.cache_bytes + size > self.memory_limit:
+            _, (distance, parent) = self.fields.popitem(last=False)
+            self.cache_bytes -= distance.nbytes + parent.nbytes
+        self.fields[source] = entry
+        self.cache_bytes += size
+
+    def tree_path(self, parent, source, target):
+        """Cells from target back up a parent tree to source, target first."""
+        grid = self.grid
+        root = grid.index(source)
+        index = grid.index(target)
+        cells = []
+        while index != root:
+            cells.append(grid.state(index))
+            index = int(parent[index])
+        cells.append(source)
+        return cells
+
+    def query(self, start, goal):
+        """Returns (cost, cells from start to goal inclusive), or None if unreachable."""
+        self.check_cell(start)
+        self.check_cell(goal)
+        grid = self.grid
+
+        if start in self.fields:
+            self.hits += 1
+        elif goal in self.fields:
+            # Reversing a path changes its cost by step_cost(goal) - step_cost(start)
+            # whatever the path, so the reverse of the best goal-start path is a best path
+            self.hits += 1
+            distance, parent = self.field(goal)
+            if distance[grid.index(start)] == np.inf:
+                return None
+            cost = float(distance[grid.index(start)])
+            cost += grid.step_costs[grid.index(goal)] - grid.step_costs[grid.index(start)]
+            return cost, self.tree_path(parent, goal, start)
+        else:
+            self.misses += 1
+
+        distance, parent = self.field(start)
+        if distance[grid.index(goal)] == np.inf:
+            return None
+        cells = self.tree_path(parent, start, goal)
+        cells.reverse()
+        return float(distance[grid.index(goal)]), cells
@@ -0,0 +1,284 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_CELL_SIZE = 50
+
+# Pixel size of exported tiles, and rough pixel budget of one streamed band
+TILE_SIZE = 256
+STRIP_PIXELS = 2 ** 22
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Automatic cell sizes shrink so the longest image side stays under this many pixels
+MAX_IMAGE_SIZE = 4096
+
+# Palette indices, in the order output_image has always used
+EMPTY, WALL, START, GOAL, SOLUTION, EXPLORED = range(6)
+PALETTE = np.array([
+    (237, 240, 252),
+    (40, 40, 40),
+    (255, 0, 0),
+    (0, 171, 28),
+    (220, 235, 113),
+    (212, 97, 85),
+], dtype=np.uint8)
+
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+
+# Heatmap colors from cheapest to most expensive, interpolated into a 256-entry table
+HEAT_STOPS = np.array([
+    (0, 128, 64),
+    (0, 255, 0),
+    (255, 255, 0),
+    (255, 128, 0),
+    (255, 0, 0),
+], dtype=np.float64)
+HEAT_TABLE = np.stack([
+    np.interp(np.linspace(0, 1, 256), np.linspace(0, 1, len(HEAT_STOPS)), HEAT_STOPS[:, channel])
+    for channel in range(3)
+], axis=1).round().astype(np.uint8)
+
+
+def auto_cell_size(height, width, max_size=MAX_IMAGE_SIZE):
+    """Largest cell size up to DEFAULT_CELL_SIZE that keeps the image within max_size pixels."""
+    return max(1, min(DEFAULT_CELL_SIZE, max_size // max(height, width)))
+
+
+def cell_mask(cells, shape):
+    """Boolean (height, width) mask from a boolean array or an iterable of (row, col) cells."""
+    if isinstance(cells, np.ndarray) and cells.dtype == bool:
+        return cells
+    mask = np.zeros(shape, dtype=bool)
+    cells = np.array(list(cells), dtype=np.intp).reshape(-1, 2)
+    mask[cells[:, 0], cells[:, 1]] = True
+    return mask
+
+
+def window_origin(window):
+    rows, cols = window
+    return rows.start or 0, cols.start or 0
+
+
+class MazeColors():
+    """RGB colors of a maze, computed for one window of cells at a time.
+
+    Index it with a pair of row and column slices, e.g. colors[0:64, :];
+    colors[:, :] gives the whole maze. starts and goals are lists of cells.
+    Later layers win, so walls are painted last.
+    """
+
+    def __init__(self, walls, starts, goals, solution=None, explored=None):
+        self.walls = walls
+        self.shape = walls.shape
+        self.starts = starts
+        self.goals = goals
+        self.solution = cell_mask(solution, walls.shape) if solution is not None else None
+        self.explored = cell_mask(explored, walls.shape) if explored is not None else None
+
+    def __getitem__(self, window):
+        walls = self.walls[window]
+        colors = np.full(walls.shape, EMPTY, dtype=np.uint8)
+        if self.explored is not None:
+            colors[self.explored[window]] = EXPLORED
+        if self.solution is not None:
+            colors[self.solution[window]] = SOLUTION
+
+        top, left = window_origin(window)
+        for cells, color in ((self.goals, GOAL), (self.starts, START)):
+            for row, col in cells:
+                if 0 <= row - top < colors.shape[0] and 0 <= col - left < colors.shape[1]:
+                    colors[row - top, col - left] = color
+        colors[walls] = WALL
+        return PALETTE[colors]
+
+
+class CostColors():
+    """RGB colors of a cost grid, indexed by windows like MazeColors.
+
+    By default cells costing high_cost are red and all others green. As a
+    heatmap, the finite costs of open cells are scaled across HEAT_TABLE and
+    everything else takes the wall color.
+    """
+
+    def __init__(self, costs, walls, heatmap=False, high_cost=None):
+        self.costs = costs
+        self.walls = walls
+        self.shape = costs.shape
+        self.heatmap = heatmap
+        self.high_cost = high_cost
+        if heatmap:
+            # Scan a band of rows at a time for the range, so no full-size temporaries
+            self.low = np.inf
+            high = -np.inf
+            band = max(1, 2 ** 22 // max(1, self.shape[1]))
+            for top in range(0, self.shape[0], band):
+                values, shown = self.shown((slice(top, top + band), slice(None)))
+                if shown.any():
+                    self.low = min(self.low, values[shown].min())
+                    high = max(high, values[shown].max())
+            self.span = high - self.low
+
+    def shown(self, window):
+        values = np.asarray(self.costs[window], dtype=np.float64)
+        return values, ~self.walls[window] & np.isfinite(values)
+
+    def __getitem__(self, window):
+        if not self.heatmap:
+            high = (self.costs[window] == self.high_cost)[..., None]
+            return np.where(high, RED, GREEN).astype(np.uint8)
+
+        values, shown = self.shown(window)
+        colors = np.empty(values.shape + (3,), dtype=np.uint8)
+        colors[...] = PALETTE[WALL]
+        if shown.any():
+            if self.span:
+                scaled = (values[shown] - self.low) * (255 / self.span)
+            else:
+                scaled = np.zeros(int(shown.sum()))
+            colors[shown] = HEAT_TABLE[scaled.astype(np.intp)]
+        return colors
+
+
+def upscale(colors, cell_size=None, cell_border=None):
+    """Scales an RGB-per-cell array up to an RGBA image with black cell borders.
+
+    cell_size defaults to auto_cell_size and cell_border to cell_size // 25,
+    so small maps keep the original 50px cells with a 2px border.
+    """
+    height, width = colors.shape[:2]
+    if cell_size is None:
+        cell_size = auto_cell_size(height, width)
+    if cell_border is None:
+        cell_border = cell_size // 25
+
+    img = Image.fromarray(colors, "RGB").convert("RGBA")
+    img = img.resize((width * cell_size, height * cell_size), Image.NEAREST)
+
+    # Black out the border strips on both sides of every cell edge, one paste per strip
+    if cell_border:
+        black = (0, 0, 0, 255)
+        for count, horizontal in ((height, True), (width, False)):
+            for i in range(count):
+                edge = i * cell_size
+                for low, high in ((edge, edge + cell_border), (edge + cell_size - cell_border + 1, edge + cell_size)):
+                    if low < high:
+                        img.paste(black, (0, low, img.width, high) if horizontal else (low, 0, high, img.height))
+    return img
+
+
+def write_tiles(colors, directory, cell_size=DEFAULT_CELL_SIZE, cell_border=None, tile_size=TILE_SIZE):
+    """Writes colors as a pyramid of tile_size PNG tiles under directory.
+
+    Level 0 is full resolution, at directory/0/<col>_<row>.png; each further
+    level halves the previous one until a single tile covers the map. Every
+    tile is rendered from only the cells under it, and each coarser tile is
+    built from its four children, so memory stays at a few tiles however
+    large the map is. tiles.json records the image size and level count.
+    """
+    height, width = colors.shape
+    if cell_border is None:
+        cell_border = cell_size // 25
+    image_width = width * cell_size
+    image_height = height * cell_size
+
+    level_dir = os.path.join(directory, "0")
+    os.makedirs(level_dir, exist_ok=True)
+    columns = -(-image_width // tile_size)
+    rows = -(-image_height // tile_size)
+    for row in range(rows):
+        for col in range(columns):
+            left = col * tile_size
+            top = row * tile_size
+            right = min(left + tile_size, image_width)
+            bottom = min(top + tile_size, image_height)
+
+            # Render the whole cells under the tile, then crop to its pixels
+            first_row, first_col = top // cell_size, left // cell_size
+            block = colors[first_row:-(-bottom // cell_size), first_col:-(-right // cell_size)]
+            img = upscale(block, cell_size, cell_border)
+            offset_x = first_col * cell_size
+            offset_y = first_row * cell_size
+            img = img.crop((left - offset_x, top - offset_y, right - offset_x, bottom - offset_y))
+            img.save(os.path.join(level_dir, "%d_%d.png" % (col, row)))
+
+    levels = 1
+    level_width, level_height = image_width, image_height
+    while columns > 1 or rows > 1:
+        child_dir = level_dir
+        level_dir = os.path.join(directory, str(levels))
+        os.makedirs(level_dir, exist_ok=True)
+        level_width, level_height = -(-level_width // 2), -(-level_height // 2)
+        child_columns, child_rows = columns, rows
+        columns, rows = -(-columns // 2), -(-rows // 2)
+        for row in range(rows):
+            for col in range(columns):
+                canvas = Image.new("RGBA", (2 * tile_size, 2 * tile_size))
+                for dy in range(2):
+                    for dx in range(2):
+                        if 2 * col + dx < child_columns and 2 * row + dy < child_rows:
+                            child = os.path.join(child_dir, "%d_%d.png" % (2 * col + dx, 2 * row + dy))
+                            with Image.open(child) as img:
+                                canvas.paste(img, (dx * tile_size, dy * tile_size))
+                size = (min(tile_size, level_width - col * tile_size), min(tile_size, level_height - row * tile_size))
+                canvas = canvas.crop((0, 0, 2 * size[0], 2 * size[1]))
+                canvas.resize(size, Image.BOX).save(os.path.join(level_dir, "%d_%d.png" % (col, row)))
+        levels += 1
+
+    with open(os.path.join(directory, "tiles.json"), "w") as f:
+        json.dump({
+            "width": image_width,
+            "height": image_height,
+            "cell_size": cell_size,
+            "tile_size": tile_size,
+            "levels": levels,
+        }, f, indent=2)
+    return levels
+
+
+def png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+
+def write_strips(colors, filename, cell_size=DEFAULT_CELL_SIZE, cell_border=None, strip_pixels=STRIP_PIXELS):
+    """Streams colors into one RGBA PNG, a band of cell rows at a time.
+
+    Each band of about strip_pixels pixels is rendered, filtered and fed to
+    a running zlib stream, so only one band is ever held in memory. The
+    output matches output_image at the same cell size.
+    """
+    height, width = colors.shape
+    if cell_border is None:
+        cell_border = cell_size // 25
+    image_width = width * cell_size
+    band = max(1, strip_pixels // (image_width * cell_size))
+
+    compressor = zlib.compressobj(6)
+    previous = np.zeros((1, image_width * 4), dtype=np.uint8)
+    with open(filename, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", image_width, height * cell_size, 8, 6, 0, 0, 0))
+        for top in range(0, height, band):
+            pixels = np.asarray(upscale(colors[top:top + band, :], cell_size, cell_border))
+            pixels = pixels.reshape(pixels.shape[0], -1)
+
+            # "Up" filter: each scanline minus the one above, which is mostly
+            # zeros for blocky cell images and compresses well
+            scanlines = np.empty((pixels.shape[0], pixels.shape[1] + 1), dtype=np.uint8)
+            scanlines[:, 0] = 2
+            np.subtract(pixels, np.concatenate((previous, pixels[:-1])), out=scanlines[:, 1:])
+            previous = pixels[-1:]
+
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                png_chunk(f, b"IDAT", data)
+        png_chunk(f, b"IDAT", compressor.flush())
+        png_chunk(f, b"IEND", b"")
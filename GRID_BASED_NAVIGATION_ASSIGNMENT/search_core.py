@@ -0,0 +1,412 @@
+import heapq
+import math
+from collections import deque
+from collections.abc import Iterable
+import numpy as np
+
+INF = float("inf")
+SQRT2 = math.sqrt(2)
+
+# Largest step cost for which Dijkstra runs on a ring of buckets instead of a heap
+MAX_BUCKET_COST = 255
+
+# Diagonal costs are sums of sqrt(2) that drift in the last bits, so equal f
+# values come out a hair apart and defeat the larger-g tie break. A* rounds f
+# to this many decimals on diagonal grids to keep those ties.
+F_DIGITS = 9
+
+# When a diagonal move may pass the corner between its two side cells:
+# "never" if either side is a wall, "one" unless both are, "always" regardless
+CORNER_RULES = ("never", "one", "always")
+
+
+class NoSolution(Exception):
+    """Raised when the goal cannot be reached from the start."""
+
+    def __init__(self, message="no solution"):
+        Exception.__init__(self, message)
+
+
+class FlatGrid():
+    """Maze walls and step costs laid out as flat, wall-padded index arrays.
+
+    Cell (row, col) lives at index (row + 1) * stride + col + 1 with
+    stride = width + 2, so the one-cell wall border means neighbor lookups
+    never need a bounds check.
+    """
+
+    def __init__(self, walls, step_costs=None, diagonal=False, corners="never"):
+        self.height, self.width = walls.shape
+        self.stride = self.width + 2
+        self.size = (self.height + 2) * self.stride
+
+        padded = np.ones((self.height + 2, self.stride), dtype=bool)
+        padded[1:-1, 1:-1] = walls
+        self.blocked = bytearray(padded.tobytes())
+
+        # Cost of stepping onto each cell; the border is never entered
+        padded_costs = np.ones((self.height + 2, self.stride), dtype=np.int64)
+        if step_costs is not None:
+            padded_costs[1:-1, 1:-1] = step_costs
+        self.step_costs = padded_costs.ravel().tolist()
+        self.max_step_cost = int(padded_costs.max())
+        self.uniform_cost = step_costs is None or bool(np.all(np.asarray(step_costs)[~walls] == 1))
+
+        stride = self.stride
+        self.moves = [-stride, stride, -1, 1]
+        self.actions = {-stride: "up", stride: "down", -1: "left", 1: "right"}
+
+        # Diagonal moves as (move, corner flags), where the flags mark the cells the
+        # move may not be taken from under the corner rule. They are worked out
+        # once here, so a search pays one lookup per diagonal move.
+        if corners not in CORNER_RULES:
+            raise ValueError("unknown corner rule %r, expected one of %s" % (corners, ", ".join(CORNER_RULES)))
+        self.diagonal = diagonal
+        self.corners = corners
+        self.diagonal_moves = []
+        if diagonal:
+            flat = padded.ravel()
+            for vertical, vertical_name in ((-stride, "up"), (stride, "down")):
+                for horizontal, horizontal_name in ((-1, "left"), (1, "right")):
+                    vertical_side = np.roll(flat, -vertical)
+                    horizontal_side = np.roll(flat, -horizontal)
+                    if corners == "never":
+                        flags = vertical_side | horizontal_side
+                    elif corners == "one":
+                        flags = vertical_side & horizontal_side
+                    else:
+                        flags = np.zeros_like(flat)
+                    self.diagonal_moves.append((vertical + horizontal, bytearray(flags.tobytes())))
+                    self.actions[vertical + horizontal] = vertical_name + "-" + horizontal_name
+
+    def index(self, state):
+        return (int(state[0]) + 1) * self.stride + int(state[1]) + 1
+
+    def state(self, index):
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def to_array(self, values, dtype=np.float32):
+        """Converts a per-index value list into a (height, width) array."""
+        padded = np.array(values, dtype=dtype).reshape(self.height + 2, self.stride)
+        return padded[1:-1, 1:-1].copy()
+
+    def mask(self, flags):
+        """Converts a per-index flag buffer into a (height, width) bool array."""
+        padded = np.frombuffer(flags, dtype=np.uint8).reshape(self.height + 2, self.stride)
+        return padded[1:-1, 1:-1].astype(bool)
+
+
+class SearchResult():
+    def __init__(self, grid, start, goal, g, parent, done, num_explored):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.g = g
+        self.parent = parent
+        self.done = done
+        self.num_explored = num_explored
+
+    @property
+    def found(self):
+        return self.g[self.goal] < INF
+
+    @property
+    def cost(self):
+        return self.g[self.goal]
+
+    def path(self):
+        """Indices from the first step after start up to and including goal."""
+        parent = self.parent
+        indices = []
+        index = self.goal
+        while index != self.start:
+            indices.append(index)
+            index = parent[index]
+        indices.reverse()
+        return indices
+
+    def solution(self):
+        """Path in the (actions, cells) form used by Maze.solution."""
+        grid = self.grid
+        indices = self.path()
+        actions = []
+        previous = self.start
+        for index in indices:
+            actions.append(grid.actions[index - previous])
+            previous = index
+        return actions, [grid.state(index) for index in indices]
+
+    def explored_mask(self):
+        """Expanded cells: flagged as done but not walls."""
+        return self.grid.mask(self.done) & ~self.grid.mask(self.grid.blocked)
+
+
+def search_ends(grid, start, goal):
+    """(start indices, goal flags) for grid_search's start and goal, each one index or several.
+
+    goal may already be a bytearray of grid.size flags; -1 marks no goal.
+    """
+    starts = list(start) if isinstance(start, Iterable) else [start]
+    if isinstance(goal, bytearray):
+        return starts, goal
+    targets = bytearray(grid.size)
+    for index in goal if isinstance(goal, Iterable) else [goal]:
+        if index >= 0:
+            targets[index] = 1
+    return starts, targets
+
+
+def end_result(grid, start, goal, g, parent, done, num_explored, found):
+    """The SearchResult of a search that expanded the goal found, or none if found is -1.
+
+    With several starts its start is the one the path grew from, and with
+    several goals its goal is the one reached, or -1.
+    """
+    if found >= 0:
+        start = found
+        while parent[start] >= 0:
+            start = parent[start]
+        goal = found
+    else:
+        if isinstance(start, Iterable):
+            start = -1
+        if isinstance(goal, Iterable):
+            goal = -1
+    return SearchResult(grid, start, goal, g, parent, done, num_explored)
+
+
+def grid_search(grid, start, goal, heuristic=None, max_cost=INF, stats=None):
+    """Best-first search between two flat indices of a FlatGrid.
+
+    Frontier entries are plain (f, tie, index) tuples. A cell is expanded at
+    most once; entries left behind by a cheaper push are skipped when popped.
+    On a diagonal grid, diagonal steps cost sqrt(2) times the cell cost.
+    Without a heuristic this is Dijkstra's algorithm with first-in-first-out
+    ties. With one it is A* on f = g + h, breaking ties toward larger g so the
+    search dives along the cheapest-looking path instead of widening (see
+    F_DIGITS for diagonal grids).
+
+    Cells whose cost from start exceeds max_cost are never expanded. Passing
+    goal=-1 runs the search out to that bound (or the whole reachable grid).
+
+    start may also be a list of indices, which all enter the frontier at
+    cost 0 as if joined to one virtual source, and goal a collection of
+    indices or a bytearray of grid.size flags; the search then stops at the
+    first goal it expands. The heuristic must estimate the cost to the
+    nearest goal (see heuristics.nearest_heuristic). The result's start and
+    goal are the pair its path joins (see end_result).
+
+    Without a heuristic, 4-connected grids with small integer step costs are
+    handed to bucket_search, which expands cells in the same order. A
+    SearchStats passed as stats counts the frontier operations.
+    """
+    if heuristic is None and not grid.diagonal and grid.max_step_cost <= MAX_BUCKET_COST:
+        return bucket_search(grid, start, goal, max_cost, stats)
+
+    size = grid.size
+    step_costs = grid.step_costs
+    moves = grid.moves
+    diagonal_moves = grid.diagonal_moves
+    push = heapq.heappush
+    pop = heapq.heappop
+    if stats is not None:
+        stats.begin(grid)
+        push, pop = stats.heap_ops()
+    starts, targets = search_ends(grid, start, goal)
+
+    # Walls and expanded cells share one flag buffer, so each neighbor costs a single lookup
+    done = bytearray(grid.blocked)
+    g = [INF] * size
+    parent = [-1] * size
+
+    tie = 0
+    frontier = []
+    for index in starts:
+        if g[index] == INF:
+            g[index] = 0
+            if heuristic is None:
+                tie += 1
+                frontier.append((0, tie, index))
+            else:
+                frontier.append((heuristic(index), 0, index))
+    heapq.heapify(frontier)
+    found = -1
+    num_explored = 0
+    if stats is not None:
+        stats.heap_start(frontier)
+
+    while frontier:
+        _, _, index = pop(frontier)
+        if done[index]:
+            continue
+        if g[index] > max_cost:
+            # Without a heuristic every entry left costs at least as much
+            if heuristic is None:
+                break
+            continue
+        done[index] = 1
+        num_explored += 1
+
+        if targets[index]:
+            found = index
+            break
+
+        base = g[index]
+        for move in moves:
+            neighbor = index + move
+            if done[neighbor]:
+                continue
+            cost = base + step_costs[neighbor]
+            if cost < g[neighbor]:
+                g[neighbor] = cost
+                parent[neighbor] = index
+                if heuristic is None:
+                    tie += 1
+                    push(frontier, (cost, tie, neighbor))
+                elif diagonal_moves:
+                    push(frontier, (round(cost + heuristic(neighbor), F_DIGITS), -cost, neighbor))
+                else:
+                    push(frontier, (cost + heuristic(neighbor), -cost, neighbor))
+
+        for move, corner in diagonal_moves:
+            neighbor = index + move
+            if done[neighbor] or corner[index]:
+                continue
+            cost = base + SQRT2 * step_costs[neighbor]
+            if cost < g[neighbor]:
+                g[neighbor] = cost
+                parent[neighbor] = index
+                if heuristic is None:
+                    tie += 1
+                    push(frontier, (cost, tie, neighbor))
+                else:
+                    push(frontier, (round(cost + heuristic(neighbor), F_DIGITS), -cost, neighbor))
+
+    if stats is not None:
+        stats.finish(num_explored)
+    return end_result(grid, start, goal, g, parent, done, num_explored, found)
+
+
+def bucket_search(grid, start, goal, max_cost=INF, stats=None):
+    """Dijkstra's algorithm on a bucket queue (Dial's algorithm).
+
+    With integer step costs of at most C, every cell waiting in the frontier
+    costs between the current cost and the current cost + C. A ring of C + 1
+    lists indexed by cost therefore replaces the heap: pushes are appends and
+    pops walk the ring, so weighted search costs about as much as unit-cost
+    search. Each bucket is drained first-in-first-out. start and goal are as
+    in grid_search.
+    """
+    size = grid.size
+    step_costs = grid.step_costs
+    moves = grid.moves
+    ring = grid.max_step_cost + 1
+    starts, targets = search_ends(grid, start, goal)
+
+    done = bytearray(grid.blocked)
+    g = [INF] * size
+    parent = [-1] * size
+    buckets = [[] for _ in range(ring)]
+    push = list.append
+    if stats is not None:
+        stats.begin(grid)
+        push = stats.bucket_push
+
+    pending = 0
+    for index in starts:
+        if g[index] == INF:
+            g[index] = 0
+            push(buckets[0], index)
+            pending += 1
+    current = 0
+    found = -1
+    num_explored = 0
+
+    while pending and current <= max_cost:
+        bucket = buckets[current % ring]
+        pending -= len(bucket)
+        if stats is not None and bucket:
+            stats.drained(bucket, targets, current)
+
+        # Step costs are at least 1, so nothing lands in this bucket while it drains
+        for index in bucket:
+            if done[index]:
+                continue
+            done[index] = 1
+            num_explored += 1
+
+            if targets[index]:
+                found = index
+                pending = 0
+                break
+
+            for move in moves:
+                neighbor = index + move
+                if done[neighbor]:
+                    continue
+                cost = current + step_costs[neighbor]
+                if cost < g[neighbor]:
+                    g[neighbor] = cost
+                    parent[neighbor] = index
+                    push(buckets[cost % ring], neighbor)
+                    pending += 1
+
+        bucket.clear()
+        current += 1
+
+    if stats is not None:
+        stats.finish(num_explored)
+    return end_result(grid, start, goal, g, parent, done, num_explored, found)
+
+
+def breadth_first_search(grid, start, targets, stats=None):
+    """Fewest-steps search from a flat index to the first of several targets, ignoring step costs.
+
+    targets is a bytearray of grid.size flags. Every step counts 1, so the
+    frontier is a plain FIFO queue and each cell is first reached along a
+    shortest path; the search stops as soon as a target is reached, before
+    it is expanded. The result's goal is that target, or -1 if none can be
+    reached (or start is a wall), and its explored_mask holds every cell
+    reached rather than expanded.
+    """
+    parent = [-1] * grid.size
+    seen = bytearray(grid.blocked)
+    if seen[start]:
+        return SearchResult(grid, start, -1, {-1: INF}, parent, seen, 0)
+    seen[start] = 1
+    found = start if targets[start] else -1
+    moves = grid.moves
+    queue = deque([start])
+    pop = queue.popleft
+    append = queue.append
+    if stats is not None:
+        stats.begin(grid)
+        stats.pushed_cell(start, 1)
+        append, pop = stats.queue_ops(queue)
+
+    # parent records from where each cell was first reached
+    num_explored = 0
+    while queue and found < 0:
+        index = pop()
+        num_explored += 1
+        for move in moves:
+            neighbor = index + move
+            if not seen[neighbor]:
+                seen[neighbor] = 1
+                parent[neighbor] = index
+                if targets[neighbor]:
+                    found = neighbor
+                    break
+                append(neighbor)
+    if stats is not None:
+        stats.finish(num_explored)
+    if found < 0:
+        return SearchResult(grid, start, -1, {-1: INF}, parent, seen, num_explored)
+
+    steps = 0
+    index = found
+    while index != start:
+        steps += 1
+        index = parent[index]
+    return SearchResult(grid, start, found, {found: steps}, parent, seen, num_explored)
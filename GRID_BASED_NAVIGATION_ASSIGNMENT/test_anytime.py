@@ -0,0 +1,75 @@
+import math
+import time
+
+import numpy as np
+
+import maze_generator
+from anytime import AnytimeSearch
+from heuristics import make_heuristic
+from search_core import INF, FlatGrid, grid_search
+
+
+def random_maps(count=40):
+    # Seeded maps up to 24 cells across with walls over terrain costing 1 to 9 in 2x2 patches
+    for seed in range(count):
+        walls, _, _, terrain = maze_generator.weighted_terrain(5 + seed % 20, 0.3, seed, patch_size=2)
+        yield seed, walls, terrain
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def walk_cost(walls, terrain, start, cells):
+    # Cost of a route of single steps, each costing the cell it enters, times sqrt(2) on a diagonal
+    cost = 0
+    for cell in cells:
+        dr, dc = cell[0] - start[0], cell[1] - start[1]
+        assert max(abs(dr), abs(dc)) == 1 and not walls[cell]
+        cost += terrain[cell] * (math.sqrt(2) if dr and dc else 1)
+        start = cell
+    return cost
+
+
+def test_passes_tighten_to_the_optimum():
+    for seed, walls, terrain in random_maps():
+        for diagonal, name in ((False, "manhattan"), (True, "octile")):
+            grid = FlatGrid(walls, terrain, diagonal)
+            cells = random_cells(walls, 10, seed)
+            for start, goal in zip(cells[::2], cells[1::2]):
+                start_index, goal_index = grid.index(start), grid.index(goal)
+                optimum = grid_search(grid, start_index, goal_index).cost
+                results = list(AnytimeSearch(grid, start_index, goal_index,
+                                             make_heuristic(name, grid, goal_index)).results())
+                if optimum == INF:
+                    assert results == []
+                    continue
+
+                previous = INF
+                for result in results:
+                    assert 1 <= result.bound <= result.weight
+                    assert optimum - 1e-9 <= result.cost <= result.bound * optimum + 1e-9
+                    assert result.cost <= previous + 1e-9
+                    previous = result.cost
+                    cells = result.solution()[1]
+                    assert (cells[-1] if cells else start) == goal
+                    assert math.isclose(walk_cost(walls, terrain, start, cells), result.cost, abs_tol=1e-9)
+                assert results[-1].bound == 1 and math.isclose(results[-1].cost, optimum)
+
+
+def test_search_resumes_after_deadline():
+    for seed, walls, terrain in random_maps(10):
+        grid = FlatGrid(walls, terrain)
+        start, goal = random_cells(walls, 2, seed)
+        start_index, goal_index = grid.index(start), grid.index(goal)
+        heuristic = make_heuristic("manhattan", grid, goal_index)
+
+        # A deadline already gone gives nothing, and the search then carries on as if never stopped
+        search = AnytimeSearch(grid, start_index, goal_index, heuristic)
+        assert list(search.results(time.perf_counter())) == []
+        resumed = [(result.cost, result.weight) for result in search.results()]
+        fresh = [(result.cost, result.weight) for result in
+                 AnytimeSearch(grid, start_index, goal_index, heuristic).results()]
+        assert resumed == fresh
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+
+import dijkstra_algo
+import maze_generator
+from bidirectional import bidirectional_search
+from search_core import FlatGrid, grid_search
+
+
+def random_maps(count=40):
+    # Small seeded maps with walls over terrain costing 1 to 9 in 2x2 patches
+    for seed in range(count):
+        walls, _, _, terrain = maze_generator.weighted_terrain(5 + seed % 12, 0.3, seed, patch_size=2)
+        yield seed, walls, terrain
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def path_cost(grid, terrain, result):
+    # Each step goes to an open neighbor and costs the terrain it enters, sqrt(2) times that diagonally
+    cost = 0
+    previous = grid.state(result.start)
+    for cell in result.solution()[1]:
+        dr, dc = cell[0] - previous[0], cell[1] - previous[1]
+        assert max(abs(dr), abs(dc)) == 1 and (grid.diagonal or not (dr and dc))
+        assert not grid.blocked[grid.index(cell)]
+        cost += terrain[cell] * (math.sqrt(2) if dr and dc else 1)
+        previous = cell
+    return cost
+
+
+def test_bidirectional_matches_grid_search():
+    for seed, walls, terrain in random_maps():
+        for diagonal, heuristic in ((False, "manhattan"), (True, "octile")):
+            grid = FlatGrid(walls, terrain, diagonal)
+            cells = random_cells(walls, 10, seed)
+            for start, goal in zip(cells[::2], cells[1::2]):
+                start_index, goal_index = grid.index(start), grid.index(goal)
+                expected = grid_search(grid, start_index, goal_index, lambda index: 0).cost
+                for potential in (None, heuristic):
+                    result = bidirectional_search(grid, start_index, goal_index, potential)
+                    if expected == math.inf:
+                        assert not result.found
+                    else:
+                        assert math.isclose(result.cost, expected)
+                        assert math.isclose(path_cost(grid, terrain, result), expected)
+
+
+def test_bidirectional_dijkstra_algo_matches_one_way():
+    for seed, walls, _ in random_maps():
+        grid = walls.astype(int)
+        cells = random_cells(walls, 10, seed)
+        for start, goal in zip(cells[::2], cells[1::2]):
+            expected = dijkstra_algo.dijkstra(grid, start, goal)
+            path = dijkstra_algo.dijkstra(grid, start, goal, bidirectional=True)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == len(expected)
+                assert tuple(path[0]) == start and tuple(path[-1]) == goal
+                for a, b in zip(path, path[1:]):
+                    assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and not walls[tuple(b)]
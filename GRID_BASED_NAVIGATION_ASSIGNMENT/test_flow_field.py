@@ -0,0 +1,49 @@
+import numpy as np
+
+import A_star_algo
+import maze_generator
+from flow_field import FlowField
+from search_core import INF, FlatGrid, grid_search
+
+
+def check_field(maze, field, seed):
+    # Costs and routes from a sample of cells agree with a search on the maze as it now is
+    grid = FlatGrid(maze.walls, maze.terrain)
+    goal = grid.index(maze.goal)
+    cells = np.argwhere(~maze.walls)
+    for cell in cells[np.random.default_rng(seed).integers(len(cells), size=10)]:
+        cell = tuple(int(v) for v in cell)
+        expected = grid_search(grid, grid.index(cell), goal).cost
+        assert field.cost(cell) == expected
+        if expected < INF:
+            _, path = field.route(cell)
+            assert (path[-1] if path else cell) == maze.goal
+            assert sum(maze.terrain[step] for step in path) == expected
+
+
+def test_field_repair_matches_search():
+    for seed in range(20):
+        walls, start, goal, terrain = maze_generator.weighted_terrain(6 + seed % 10, 0.2, seed, patch_size=2)
+        maze = A_star_algo.Maze.from_walls(walls, start, goal, terrain)
+        field = maze.flow_field()
+        check_field(maze, field, seed)
+
+        # Rounds of random wall toggles and cost changes, never walling the goal in
+        rng = np.random.default_rng(seed)
+        size = maze.walls.shape[0]
+        for edit in range(4):
+            wall_edits = {}
+            cost_edits = {}
+            for _ in range(4):
+                cell = (int(rng.integers(size)), int(rng.integers(size)))
+                if cell != maze.goal:
+                    wall_edits[cell] = not maze.walls[cell]
+                cell = (int(rng.integers(size)), int(rng.integers(size)))
+                cost_edits[cell] = int(rng.integers(1, 10))
+            field.update_cells(wall_edits, cost_edits)
+            check_field(maze, field, seed + edit)
+
+            # The repaired field matches one built from scratch everywhere
+            fresh = FlowField(maze)
+            assert field.g == fresh.g
+            assert (field.directions == fresh.directions).all()
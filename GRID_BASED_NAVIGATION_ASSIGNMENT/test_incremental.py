@@ -0,0 +1,49 @@
+import numpy as np
+
+import A_star_algo
+from incremental import IncrementalPlanner
+
+
+def corridor_maze():
+    # One open row, so every path from A to B crosses every cell of it
+    walls = np.ones((3, 5), dtype=bool)
+    walls[1, :] = False
+    return A_star_algo.Maze.from_walls(walls, (1, 0), (1, 4))
+
+
+def test_cost_edit_reaches_maze_solve():
+    maze = corridor_maze()
+    planner = IncrementalPlanner(maze)
+    planner.plan()
+    assert maze.solution_cost == 4
+
+    planner.update_cells(costs={(1, 2): 5})
+    planner.plan()
+    assert maze.solution_cost == 8
+
+    maze.solve()
+    assert maze.terrain[1, 2] == 5
+    assert maze.solution_cost == 8
+
+
+def test_edits_drop_abstraction_and_landmarks():
+    maze = corridor_maze()
+    maze.prepare_landmarks(2)
+    maze.solve_hierarchical(4)
+    assert maze.landmarks is not None and maze.abstraction is not None
+
+    IncrementalPlanner(maze).update_cells(walls={(1, 2): True})
+    assert maze.landmarks is None and maze.abstraction is None
+
+
+def test_hierarchical_after_wall_edit():
+    walls = np.zeros((8, 8), dtype=bool)
+    maze = A_star_algo.Maze.from_walls(walls, (0, 0), (7, 7))
+    maze.solve_hierarchical(4)
+    assert maze.solution_cost == 14
+
+    # A wall across row 4 but for its last cell, which the first path may not have used
+    IncrementalPlanner(maze).update_cells(walls={(4, col): True for col in range(7)})
+    maze.solve_hierarchical(4)
+    assert maze.solution_cost == 14
+    assert (4, 7) in maze.solution[1]
@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+
+import maze_generator
+from jump_point import JumpPointSearch
+from search_core import FlatGrid, grid_search
+
+
+def random_maps(count=40):
+    # Small seeded uniform-cost maps, from open floor to dense obstacles
+    for seed in range(count):
+        walls, _, _, _ = maze_generator.random_obstacles(5 + seed % 14, (seed % 5) / 10, seed)
+        yield seed, walls
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def path_cost(grid, result):
+    # Each step goes to an open neighbor without cutting a wall corner
+    cost = 0
+    previous = grid.state(result.start)
+    for cell in result.solution()[1]:
+        dr, dc = cell[0] - previous[0], cell[1] - previous[1]
+        assert max(abs(dr), abs(dc)) == 1
+        assert not grid.blocked[grid.index(cell)]
+        if dr and dc:
+            assert not grid.blocked[grid.index((previous[0] + dr, previous[1]))]
+            assert not grid.blocked[grid.index((previous[0], previous[1] + dc))]
+            cost += math.sqrt(2)
+        else:
+            cost += 1
+        previous = cell
+    return cost
+
+
+def test_jump_points_match_grid_search():
+    for seed, walls in random_maps():
+        for diagonal in (False, True):
+            grid = FlatGrid(walls, diagonal=diagonal)
+            search = JumpPointSearch(grid)
+            cells = random_cells(walls, 10, seed)
+            for start, goal in zip(cells[::2], cells[1::2]):
+                expected = grid_search(grid, grid.index(start), grid.index(goal)).cost
+                result = search.search(grid.index(start), grid.index(goal))
+                if expected == math.inf:
+                    assert not result.found
+                else:
+                    assert math.isclose(result.cost, expected)
+                    assert math.isclose(path_cost(grid, result), expected)
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+import maze_generator
+from landmarks import ACTIVE_LANDMARKS, LandmarkTable
+from search_core import INF, FlatGrid, grid_search
+
+
+def random_maps(count=30):
+    # Small seeded maps with walls over terrain costing 1 to 9 in 2x2 patches
+    for seed in range(count):
+        walls, _, _, terrain = maze_generator.weighted_terrain(5 + seed % 12, 0.3, seed, patch_size=2)
+        yield seed, walls, terrain
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def test_landmark_heuristic_is_admissible_and_consistent():
+    for seed, walls, terrain in random_maps():
+        grid = FlatGrid(walls, terrain)
+        open_cells = [grid.index(tuple(cell)) for cell in np.argwhere(~walls)]
+        # More landmarks than ACTIVE_LANDMARKS, so a start picks among them
+        table = LandmarkTable(walls, terrain, 2 * ACTIVE_LANDMARKS, seed)
+        cells = random_cells(walls, 6, seed)
+        for start, goal in zip(cells[::2], cells[1::2]):
+            start_index, goal_index = grid.index(start), grid.index(goal)
+            # Reversing a path changes its cost by c(goal) - c(v), so one search from goal gives d(v, goal)
+            from_goal = grid_search(grid, goal_index, -1).g
+            to_goal = {v: from_goal[v] + grid.step_costs[goal_index] - grid.step_costs[v]
+                       for v in open_cells if from_goal[v] < INF}
+
+            for estimate in (table.heuristic(grid, goal_index), table.heuristic(grid, goal_index, start=start_index)):
+                assert estimate(goal_index) == 0
+                for v, cost in to_goal.items():
+                    assert estimate(v) <= cost
+                    for move in grid.moves:
+                        if not grid.blocked[v + move]:
+                            assert estimate(v) <= grid.step_costs[v + move] + estimate(v + move)
+
+                result = grid_search(grid, start_index, goal_index, estimate)
+                assert result.cost == to_goal.get(start_index, INF)
+
+
+def test_saved_table_gives_the_same_estimates(tmp_path):
+    for seed, walls, terrain in random_maps(10):
+        grid = FlatGrid(walls, terrain)
+        table = LandmarkTable(walls, terrain, 4, seed)
+        filename = os.path.join(tmp_path, "landmarks_%d.npz" % seed)
+        table.save(filename)
+        loaded = LandmarkTable.load(filename, walls, terrain)
+        assert loaded.cells == table.cells
+
+        goal = grid.index(random_cells(walls, 1, seed)[0])
+        before, after = table.heuristic(grid, goal), loaded.heuristic(grid, goal)
+        assert all(before(grid.index(tuple(cell))) == after(grid.index(tuple(cell))) for cell in np.argwhere(~walls))
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+import maze_generator
+from map_format import LOW_COST, is_binary_map, load_binary, load_grid, save_binary
+
+
+def random_maps(count=30):
+    # Seeded maps whose widths rarely fill whole bytes of the wall plane; every other one has terrain
+    for seed in range(count):
+        if seed % 2:
+            yield seed, maze_generator.weighted_terrain(3 + seed % 19, 0.3, seed, patch_size=2)
+        else:
+            yield seed, maze_generator.random_obstacles(3 + seed % 19, 0.3, seed)
+
+
+def test_binary_round_trip(tmp_path):
+    for seed, (walls, start, goal, terrain) in random_maps():
+        # Up to three starts and goals, so the endpoint list is written as well as the header's pair
+        cells = np.argwhere(~walls)
+        picks = np.random.default_rng(seed).integers(len(cells), size=4)
+        extra = [tuple(int(v) for v in cells[i]) for i in picks]
+        starts = [start] + extra[:seed % 3]
+        goals = [goal] + extra[2:2 + seed % 3]
+
+        filename = os.path.join(tmp_path, "map_%d.map" % seed)
+        save_binary(filename, walls, starts, goals, terrain)
+        assert is_binary_map(filename)
+        loaded_walls, loaded_starts, loaded_goals, loaded_terrain = load_binary(filename)
+        assert (loaded_walls == walls).all()
+        assert (loaded_terrain == terrain).all()
+        assert loaded_starts == starts and loaded_goals == goals
+
+
+def test_text_round_trip(tmp_path):
+    for seed, (walls, start, goal, terrain) in random_maps():
+        filename = os.path.join(tmp_path, "map_%d.txt" % seed)
+        maze_generator.write_text(filename, walls, start, goal, terrain)
+        with open(filename, "rb") as f:
+            contents = f.read()
+        crlf = os.path.join(tmp_path, "map_%d_crlf.txt" % seed)
+        with open(crlf, "wb") as f:
+            f.write(contents.replace(b"\n", b"\r\n"))
+
+        for path in (filename, crlf):
+            assert not is_binary_map(path)
+            loaded_walls, starts, goals, loaded_terrain = load_grid(path)
+            assert (loaded_walls == walls).all()
+            # Text has no cost under a wall; load_text gives walls LOW_COST
+            assert (loaded_terrain[~walls] == terrain[~walls]).all()
+            assert (loaded_terrain[walls] == LOW_COST).all()
+            assert starts == [start] and goals == [goal]
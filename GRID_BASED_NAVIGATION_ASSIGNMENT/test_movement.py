@@ -0,0 +1,113 @@
+import heapq
+import math
+
+import numpy as np
+
+import maze_generator
+from heuristics import make_heuristic
+from movement import distance, line_of_sight, theta_star
+from search_core import CORNER_RULES, FlatGrid, grid_search
+
+
+def random_maps(count=40):
+    # Small seeded maps with walls over terrain costing 1 to 9 in 2x2 patches
+    for seed in range(count):
+        walls, _, _, terrain = maze_generator.weighted_terrain(5 + seed % 12, 0.3, seed, patch_size=2)
+        yield seed, walls, terrain
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def corner_open(walls, cell, dr, dc, corners):
+    # Whether a diagonal step from cell may pass the corner between its two side cells
+    sides = [walls[cell[0] + dr, cell[1]], walls[cell[0], cell[1] + dc]]
+    if corners == "never":
+        return not any(sides)
+    if corners == "one":
+        return not all(sides)
+    return True
+
+
+def reference_costs(walls, terrain, start, corners):
+    """Plain 8-connected Dijkstra over (row, col) cells; a diagonal step costs sqrt(2) times the cell it enters."""
+    height, width = walls.shape
+    costs = np.full(walls.shape, math.inf)
+    costs[start] = 0
+    frontier = [(0, start)]
+    while frontier:
+        cost, (row, col) = heapq.heappop(frontier)
+        if cost > costs[row, col]:
+            continue
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                neighbor = (row + dr, col + dc)
+                if (dr, dc) == (0, 0) or not (0 <= neighbor[0] < height and 0 <= neighbor[1] < width):
+                    continue
+                if walls[neighbor] or (dr and dc and not corner_open(walls, (row, col), dr, dc, corners)):
+                    continue
+                step = terrain[neighbor] * (math.sqrt(2) if dr and dc else 1)
+                if cost + step < costs[neighbor]:
+                    costs[neighbor] = cost + step
+                    heapq.heappush(frontier, (costs[neighbor], neighbor))
+    return costs
+
+
+def test_corner_rules_match_dijkstra():
+    for seed, walls, terrain in random_maps():
+        cells = random_cells(walls, 10, seed)
+        for start, goal in zip(cells[::2], cells[1::2]):
+            previous = math.inf
+            for corners in CORNER_RULES:
+                expected = reference_costs(walls, terrain, start, corners)[goal]
+                grid = FlatGrid(walls, terrain, True, corners)
+                start_index, goal_index = grid.index(start), grid.index(goal)
+                for heuristic in (None, make_heuristic("octile", grid, goal_index)):
+                    result = grid_search(grid, start_index, goal_index, heuristic)
+                    assert result.cost == expected or math.isclose(result.cost, expected)
+                    if not result.found:
+                        continue
+
+                    cell = start
+                    for step in result.solution()[1]:
+                        dr, dc = step[0] - cell[0], step[1] - cell[1]
+                        assert max(abs(dr), abs(dc)) == 1 and not walls[step]
+                        assert not (dr and dc) or corner_open(walls, cell, dr, dc, corners)
+                        cell = step
+
+                # Each rule allows every move the one before it does
+                assert expected <= previous + 1e-9
+                previous = expected
+
+
+def test_theta_star_paths():
+    for seed, walls, _ in random_maps():
+        for corners in CORNER_RULES:
+            grid = FlatGrid(walls, diagonal=True, corners=corners)
+            cells = random_cells(walls, 10, seed)
+            for start, goal in zip(cells[::2], cells[1::2]):
+                start_index, goal_index = grid.index(start), grid.index(goal)
+                octile = grid_search(grid, start_index, goal_index).cost
+                result = theta_star(grid, start_index, goal_index, make_heuristic("euclidean", grid, goal_index))
+                if octile == math.inf:
+                    assert not result.found
+                    continue
+
+                # Straight, clear segments no longer than the 8-connected path and no shorter than the crow flies
+                assert distance(grid, start_index, goal_index) - 1e-9 <= result.cost <= octile + 1e-9
+                length = 0
+                previous = start_index
+                for waypoint in result.waypoints():
+                    assert line_of_sight(grid, previous, waypoint)
+                    length += distance(grid, previous, waypoint)
+                    previous = waypoint
+                assert math.isclose(length, result.cost, abs_tol=1e-9)
+
+                cell = start
+                for step in result.solution()[1]:
+                    assert max(abs(step[0] - cell[0]), abs(step[1] - cell[1])) == 1 and not walls[step]
+                    cell = step
+                assert cell == goal
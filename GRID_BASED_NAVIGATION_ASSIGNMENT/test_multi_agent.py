@@ -0,0 +1,70 @@
+import numpy as np
+
+import A_star_algo
+import maze_generator
+from multi_agent import first_conflict, path_cost
+from search_core import INF, FlatGrid, grid_search
+
+
+def random_groups(count=30):
+    # Small seeded terrain maps, each with two to four agents on distinct starts and goals
+    for seed in range(count):
+        walls, start, goal, terrain = maze_generator.weighted_terrain(5 + seed % 6, 0.2, seed, patch_size=2)
+        cells = [tuple(int(v) for v in cell) for cell in np.argwhere(~walls)]
+        picks = np.random.default_rng(seed).permutation(len(cells))[:2 * (2 + seed % 3)]
+        agents = [cells[i] for i in picks]
+        yield seed, A_star_algo.Maze.from_walls(walls, start, goal, terrain), agents[::2], agents[1::2]
+
+
+def check_plan(maze, grid, result, starts, goals):
+    # Every path starts at its start, moves a cell at a time over open ground and, unless it failed, ends at its goal
+    paths = [[grid.index(cell) for cell in path] for path in result.paths]
+    for agent, path in enumerate(result.paths):
+        assert path[0] == starts[agent]
+        if agent in result.failed or agent in result.deferred:
+            assert path == [starts[agent]]
+        else:
+            assert path[-1] == goals[agent]
+        for a, b in zip(path, path[1:]):
+            assert abs(a[0] - b[0]) + abs(a[1] - b[1]) <= 1 and not maze.walls[b]
+        assert result.costs[agent] == path_cost(grid, paths[agent])
+    assert first_conflict(paths) is None
+
+
+def test_plans_are_collision_free():
+    for seed, maze, starts, goals in random_groups():
+        grid = FlatGrid(maze.walls, maze.terrain)
+        alone = [grid_search(grid, grid.index(start), grid.index(goal)).cost for start, goal in zip(starts, goals)]
+        optimum = None
+        for heuristic in ("distance", "manhattan"):
+            prioritized = maze.plan_agents(starts, goals, "prioritized", heuristic=heuristic)
+            check_plan(maze, grid, prioritized, starts, goals)
+            assert not prioritized.deferred
+            assert all(agent in prioritized.failed for agent, cost in enumerate(alone) if cost == INF)
+
+            cbs = maze.plan_agents(starts, goals, "cbs", budget=5, heuristic=heuristic)
+            check_plan(maze, grid, cbs, starts, goals)
+            if not cbs.optimal:
+                # Someone cannot reach their goal at all, so it fell back to prioritized planning
+                assert cbs.mode == "prioritized" and INF in alone
+                continue
+
+            # No cheaper than every agent alone, and no dearer than any other collision-free plan
+            assert cbs.sum_of_costs >= sum(alone)
+            if not prioritized.failed:
+                assert cbs.sum_of_costs <= prioritized.sum_of_costs
+            if optimum is not None:
+                assert cbs.sum_of_costs == optimum
+            optimum = cbs.sum_of_costs
+
+
+def test_single_agent_matches_search():
+    for seed, maze, starts, goals in random_groups():
+        grid = FlatGrid(maze.walls, maze.terrain)
+        expected = grid_search(grid, grid.index(starts[0]), grid.index(goals[0])).cost
+        for mode in ("prioritized", "cbs"):
+            result = maze.plan_agents(starts[:1], goals[:1], mode)
+            if expected == INF:
+                assert result.failed == [0]
+            else:
+                assert result.costs == [expected] and result.paths[0][-1] == goals[0]
@@ -0,0 +1,37 @@
+import math
+
+import numpy as np
+
+import A_star_algo
+import maze_generator
+from query_engine import MazeQueryEngine
+from search_core import FlatGrid, grid_search
+
+
+def test_queries_match_grid_search():
+    for seed in range(30):
+        walls, start, goal, terrain = maze_generator.weighted_terrain(5 + seed % 12, 0.3, seed, patch_size=2)
+        maze = A_star_algo.Maze.from_walls(walls, start, goal, terrain)
+        grid = FlatGrid(walls, terrain)
+        # A field is 8 bytes a cell, so the cache holds two and evicts the rest
+        engine = MazeQueryEngine.from_maze(maze, memory_limit=20 * grid.size)
+
+        # Few distinct cells, so later queries start or end at cached sources
+        rng = np.random.default_rng(seed)
+        cells = np.argwhere(~walls)
+        cells = [tuple(int(v) for v in cell) for cell in cells[rng.integers(len(cells), size=4)]]
+        for _ in range(12):
+            start, goal = cells[rng.integers(4)], cells[rng.integers(4)]
+            expected = grid_search(grid, grid.index(start), grid.index(goal)).cost
+            answer = engine.query(start, goal)
+            if expected == math.inf:
+                assert answer is None
+                continue
+
+            cost, path = answer
+            assert cost == expected
+            assert path[0] == start and path[-1] == goal
+            for a, b in zip(path, path[1:]):
+                assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and not walls[b]
+            assert sum(terrain[cell] for cell in path[1:]) == cost
+        assert engine.hits > 0 and engine.cache_bytes <= engine.memory_limit
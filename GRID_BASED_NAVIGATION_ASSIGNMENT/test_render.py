@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+import A_star_algo
+import maze_generator
+from render import MazeColors, upscale, write_strips, write_tiles
+
+
+def random_pictures(count=12):
+    # Seeded solved mazes, each with a cell size, border and tile size that rarely divide evenly
+    for seed in range(count):
+        rng = np.random.default_rng(seed)
+        walls, start, goal, terrain = maze_generator.random_obstacles(int(rng.integers(3, 20)), 0.2, seed)
+        maze = A_star_algo.Maze.from_walls(walls, start, goal, terrain)
+        maze.solve()
+        colors = MazeColors(maze.walls, [maze.start], [maze.goal], maze.solution[1], maze.explored)
+        cell_size = int(rng.integers(1, 12))
+        cell_border = int(rng.integers(0, 3)) if cell_size > 4 else 0
+        yield seed, colors, cell_size, cell_border, int(rng.integers(8, 64))
+
+
+def test_strips_match_one_canvas(tmp_path):
+    for seed, colors, cell_size, cell_border, _ in random_pictures():
+        expected = np.asarray(upscale(colors[:, :], cell_size, cell_border))
+        filename = os.path.join(tmp_path, "strips_%d.png" % seed)
+        # A small pixel budget, so the image is streamed in several bands
+        write_strips(colors, filename, cell_size, cell_border, strip_pixels=3 * expected.shape[1] * cell_size)
+        with Image.open(filename) as img:
+            assert (np.asarray(img) == expected).all()
+
+
+def test_tiles_match_one_canvas(tmp_path):
+    for seed, colors, cell_size, cell_border, tile_size in random_pictures():
+        expected = np.asarray(upscale(colors[:, :], cell_size, cell_border))
+        directory = os.path.join(tmp_path, "tiles_%d" % seed)
+        levels = write_tiles(colors, directory, cell_size, cell_border, tile_size)
+        with open(os.path.join(directory, "tiles.json")) as f:
+            info = json.load(f)
+        assert (info["height"], info["width"], info["levels"]) == expected.shape[:2] + (levels,)
+
+        # Level 0 pieced back together is the full image
+        stitched = np.zeros_like(expected)
+        for row in range(-(-expected.shape[0] // tile_size)):
+            for col in range(-(-expected.shape[1] // tile_size)):
+                with Image.open(os.path.join(directory, "0", "%d_%d.png" % (col, row))) as img:
+                    tile = np.asarray(img)
+                stitched[row * tile_size:row * tile_size + tile.shape[0],
+                         col * tile_size:col * tile_size + tile.shape[1]] = tile
+        assert (stitched == expected).all()
+
+        # The top level is one tile, the full image halved once per level
+        height, width = expected.shape[:2]
+        for _ in range(levels - 1):
+            height, width = -(-height // 2), -(-width // 2)
+        assert os.listdir(os.path.join(directory, str(levels - 1))) == ["0_0.png"]
+        with Image.open(os.path.join(directory, str(levels - 1), "0_0.png")) as img:
+            assert img.size == (width, height) and max(img.size) <= tile_size
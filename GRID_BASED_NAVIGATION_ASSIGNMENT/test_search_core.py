@@ -0,0 +1,104 @@
+import heapq
+import math
+
+import numpy as np
+
+import maze_generator
+from heuristics import make_heuristic, nearest_heuristic
+from search_core import MAX_BUCKET_COST, FlatGrid, bucket_search, grid_search
+
+
+def random_maps(count=40):
+    # Small seeded maps with walls over terrain costing 1 to 9 in 2x2 patches
+    for seed in range(count):
+        walls, _, _, terrain = maze_generator.weighted_terrain(5 + seed % 12, 0.3, seed, patch_size=2)
+        yield seed, walls, terrain
+
+
+def random_cells(walls, count, seed):
+    cells = np.argwhere(~walls)
+    picks = cells[np.random.default_rng(seed).integers(len(cells), size=count)]
+    return [tuple(int(v) for v in cell) for cell in picks]
+
+
+def reference_costs(walls, terrain, sources):
+    """Plain Dijkstra over (row, col) cells; a step costs the terrain of the cell it enters."""
+    height, width = walls.shape
+    costs = np.full(walls.shape, math.inf)
+    frontier = []
+    for cell in sources:
+        costs[cell] = 0
+        frontier.append((0, cell))
+    heapq.heapify(frontier)
+    while frontier:
+        cost, (row, col) = heapq.heappop(frontier)
+        if cost > costs[row, col]:
+            continue
+        for neighbor in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= neighbor[0] < height and 0 <= neighbor[1] < width and not walls[neighbor]:
+                if cost + terrain[neighbor] < costs[neighbor]:
+                    costs[neighbor] = cost + terrain[neighbor]
+                    heapq.heappush(frontier, (costs[neighbor], neighbor))
+    return costs
+
+
+def check_path(grid, terrain, result):
+    # Each step goes to an open neighbor, and the steps add up to the reported cost
+    cost = 0
+    previous = grid.state(result.start)
+    for cell in result.solution()[1]:
+        assert abs(cell[0] - previous[0]) + abs(cell[1] - previous[1]) == 1
+        assert not grid.blocked[grid.index(cell)]
+        cost += terrain[cell]
+        previous = cell
+    assert cost == result.cost
+
+
+def test_grid_search_matches_dijkstra():
+    for seed, walls, terrain in random_maps():
+        grid = FlatGrid(walls, terrain)
+        cells = random_cells(walls, 10, seed)
+        for start, goal in zip(cells[::2], cells[1::2]):
+            expected = reference_costs(walls, terrain, [start])[goal]
+            start_index, goal_index = grid.index(start), grid.index(goal)
+            # A zero heuristic keeps the search on its heap; Manhattan makes it A*
+            for heuristic in (lambda index: 0, make_heuristic("manhattan", grid, goal_index)):
+                result = grid_search(grid, start_index, goal_index, heuristic)
+                assert result.cost == expected
+                if result.found:
+                    check_path(grid, terrain, result)
+
+
+def test_bucket_search_matches_dijkstra():
+    for seed, walls, terrain in random_maps():
+        # Also costs past MAX_BUCKET_COST, which grid_search leaves to its heap
+        for scale in (1, MAX_BUCKET_COST // 4):
+            costs = terrain.astype(np.int64) * scale
+            grid = FlatGrid(walls, costs)
+            cells = random_cells(walls, 10, seed)
+            for start, goal in zip(cells[::2], cells[1::2]):
+                expected = reference_costs(walls, costs, [start])[goal]
+                for search in (bucket_search, grid_search):
+                    result = search(grid, grid.index(start), grid.index(goal))
+                    assert result.cost == expected
+                    if result.found:
+                        check_path(grid, costs, result)
+
+
+def test_several_starts_and_goals_match_dijkstra():
+    for seed, walls, terrain in random_maps():
+        grid = FlatGrid(walls, terrain)
+        for count in (1, 2, 4):
+            cells = random_cells(walls, 2 * count, seed + count)
+            starts, goals = cells[:count], cells[count:]
+            costs = reference_costs(walls, terrain, starts)
+            expected = min(costs[goal] for goal in goals)
+            sources = [grid.index(start) for start in starts]
+            targets = [grid.index(goal) for goal in goals]
+            for heuristic in (None, nearest_heuristic("manhattan", grid, targets)):
+                result = grid_search(grid, sources, targets, heuristic)
+                assert result.cost == expected
+                if result.found:
+                    # The path joins one of the starts to the goal it reached
+                    assert grid.state(result.start) in starts and grid.state(result.goal) in goals
+                    check_path(grid, terrain, result)